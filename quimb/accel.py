@@ -59,6 +59,12 @@ def get_thread_pool(num_workers):
     return ThreadPoolExecutor(num_workers)
 
 
+@CacheThreadPool
+def get_process_pool(num_workers):
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(num_workers)
+
+
 def par_reduce(fn, seq, nthreads=_NUM_THREAD_WORKERS):
     """Parallel reduce.
 
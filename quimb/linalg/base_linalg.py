@@ -19,6 +19,7 @@ from .numpy_linalg import (
     numpy_svds,
 )
 from .scipy_linalg import seigsys_scipy, scipy_svds
+from .davidson import seigsys_davidson
 from . import SLEPC4PY_FOUND
 
 if SLEPC4PY_FOUND:
@@ -137,6 +138,7 @@ _SEIGSYS_METHODS = {
     'NUMPY': seigsys_numpy,
     'DENSE': seigsys_numpy,
     'SCIPY': seigsys_scipy,
+    'DAVIDSON': seigsys_davidson,
     'SLEPC': seigsys_slepc_spawn,
     'SLEPC-NOMPI': seigsys_slepc,
 }
@@ -200,8 +202,9 @@ def seigsys(a, k=6,
         An initial vector guess to iterate with.
     sort : bool, optional
         Whether to sort by ascending eigenvalue order.
-    backend : {'AUTO', 'NUMPY', 'SCIPY', 'SLEPC', 'SLEPC-NOMPI'}, optional
-        Which solver to use.
+    backend : {'AUTO', 'NUMPY', 'SCIPY', 'DAVIDSON', 'SLEPC', 'SLEPC-NOMPI'}
+        Which solver to use, see also
+        :func:`~quimb.linalg.davidson.seigsys_davidson`.
     backend_opts
         Supplied to the backend solver.
 
@@ -492,8 +495,87 @@ def expm(a, herm=False):
         return dot_dense(evecs, ldmul(np.exp(evals), evecs.H))
 
 
+def krylov_expm_multiply(mat, vec, tol=1e-12, max_krylov=50):
+    """Compute the action of ``expm(mat)`` on ``vec`` by projecting into the
+    Krylov subspace generated by ``mat`` and ``vec``, with an Arnoldi
+    iteration, and exponentiating the small projected matrix. The subspace
+    is grown until the a posteriori error estimate of Saad, SIAM J. Numer.
+    Anal. 29, 209 (1992), drops below ``tol``. If ``max_krylov`` vectors are
+    not enough, the exponential is instead applied in several substeps,
+    ``expm(tau * mat)``, each small enough to contribute an error of at most
+    ``tau * tol``. Only the action of ``mat`` is needed, so this is well
+    suited to small time steps with e.g. a
+    :class:`scipy.sparse.linalg.LinearOperator`.
+
+    Parameters
+    ----------
+    mat : matrix-like
+        Matrix to exponentiate, anything supporting ``mat.dot(v)``.
+    vec : vector-like
+        Vector to act with exponential of matrix on.
+    tol : float, optional
+        The target error in the result.
+    max_krylov : int, optional
+        The maximum size of the Krylov subspace.
+
+    Returns
+    -------
+    vector
+        Result of ``expm(mat) @ vec``, with the same shape as ``vec``.
+    """
+    v = np.asarray(vec)
+    shape, v = v.shape, v.reshape(-1)
+    dtype = np.result_type(v.dtype, mat.dtype)
+
+    m = min(max_krylov, v.size)
+    V = np.empty((m, v.size), dtype=dtype)
+    h = np.empty((m + 1, m), dtype=dtype)
+
+    def step(tau, j, beta):
+        # the krylov coefficients of ``expm(tau * mat) @ v``, and their error
+        y = sla.expm(tau * h[:j + 1, :j + 1])[:, 0]
+        return y, abs(tau * h[j + 1, j] * y[j]) * beta
+
+    t = 0.0
+    while t < 1.0:
+        beta = nla.norm(v)
+        if beta == 0.0:
+            return np.zeros(shape, dtype=dtype)
+
+        tau = 1.0 - t
+        h[...] = 0.0
+        V[0] = v / beta
+
+        for j in range(m):
+            w = np.asarray(mat.dot(V[j])).reshape(-1).astype(dtype,
+                                                              copy=False)
+
+            # full, twice repeated, gram-schmidt for stability
+            for _ in range(2):
+                c = V[:j + 1].conj() @ w
+                w = w - c @ V[:j + 1]
+                h[:j + 1, j] += c
+            h[j + 1, j] = nla.norm(w)
+
+            y, err = step(tau, j, beta)
+            if (err < tol * tau) or (j == m - 1):
+                break
+            V[j + 1] = w / h[j + 1, j]
+
+        # subspace too small for the rest of the evolution -> shorten step
+        while err >= tol * tau:
+            tau /= 2
+            y, err = step(tau, j, beta)
+
+        v = beta * (y @ V[:j + 1])
+        t += tau
+
+    return v.reshape(shape)
+
+
 _EXPM_MULTIPLY_METHODS = {
     'SCIPY': spla.expm_multiply,
+    'KRYLOV': krylov_expm_multiply,
     'SLEPC': functools.partial(mfn_multiply_slepc_spawn, fntype='exp'),
     'SLEPC-KRYLOV': functools.partial(
         mfn_multiply_slepc_spawn, fntype='exp', MFNType='KRYLOV'),
@@ -512,8 +594,10 @@ def expm_multiply(mat, vec, backend="AUTO", **kwargs):
         Matrix to exponentiate.
     vec : vector-like
         Vector to act with exponential of matrix on.
-    backend : {'AUTO', 'SCIPY', 'SLEPC', 'SLEPC-KRYLOV', 'SLEPC-EXPOKIT'}
-        Which backend to use.
+    backend : {'AUTO', 'SCIPY', 'KRYLOV', 'SLEPC', 'SLEPC-KRYLOV',
+               'SLEPC-EXPOKIT'}
+        Which backend to use, see :func:`krylov_expm_multiply` for
+        ``'KRYLOV'``.
     kwargs
         Supplied to backend function.
 
@@ -0,0 +1,222 @@
+"""Block Davidson eigensolver, suited to problems with a good initial guess,
+such as the local eigenproblems of DMRG.
+"""
+
+import numpy as np
+import scipy.linalg as sla
+
+
+class DavidsonNoConvergence(RuntimeError):
+    """Raised when :func:`seigsys_davidson` reaches ``maxiter`` without
+    converging, like ``scipy``'s ``ArpackNoConvergence``. The unconverged
+    ritz pairs and their residual norms are kept as the attributes
+    ``eigenvalues``, ``eigenvectors`` and ``residuals``.
+    """
+
+    def __init__(self, msg, eigenvalues, eigenvectors, residuals):
+        super().__init__(msg)
+        self.eigenvalues = eigenvalues
+        self.eigenvectors = eigenvectors
+        self.residuals = residuals
+
+
+def _orthonormalize_against(T, V, tol=1e-10):
+    """Orthonormalize the rows of ``T`` against the orthonormal rows of ``V``
+    and each other, dropping any that are (nearly) linearly dependent.
+    """
+    single = T.shape[0] == 1
+    if single:
+        nrm0 = np.linalg.norm(T)
+
+    # two rounds of classical gram-schmidt are enough for stability
+    for _ in range(2):
+        T -= (T @ V.conj().T) @ V
+
+    if single:
+        nrm = np.linalg.norm(T)
+        return T / nrm if nrm > tol * nrm0 else T[:0]
+
+    Q, R = sla.qr(T.T, mode='economic', check_finite=False)
+    keep = np.abs(np.diag(R)) > tol * max(1.0, np.abs(R).max())
+    return np.ascontiguousarray(Q.T[keep])
+
+
+def _apply_precond(precond, R, theta, X):
+    """Compute the correction vectors from the residuals ``R`` of the ritz
+    pairs ``theta, X``, all stored as rows.
+    """
+    if precond is None:
+        return R.copy()
+
+    if callable(precond):
+        return np.stack([precond(r, th) for r, th in zip(R, theta)])
+
+    # jacobi style preconditioner -> M = diag(A) - theta, with near singular
+    #     entries regularized
+    M = precond.reshape(1, -1) - theta.reshape(-1, 1)
+    tiny = np.abs(M) < 1e-8
+    M[tiny] = np.where(M[tiny].real < 0, -1e-8, 1e-8)
+
+    # olsen's correction -> t = M^-1 (r - eps x), with t orthogonal to x
+    MR, MX = R / M, X / M
+    eps = (np.sum(X.conj() * MR, axis=1) /
+           np.sum(X.conj() * MX, axis=1)).reshape(-1, 1)
+    return MR - eps * MX
+
+
+def seigsys_davidson(a, k=1, *, which=None, return_vecs=True, sigma=None,
+                     isherm=True, ncv=None, sort=True, tol=None, v0=None,
+                     maxiter=None, precond=None, **kwargs):
+    """Find a few extremal eigenpairs of a hermitian operator using the block
+    Davidson method with thick restarts. Each iteration only requires a
+    single (block) product with ``a``, so this works well for expensive
+    operators with a good initial guess ``v0``, in which case often only
+    a few iterations are needed.
+
+    Parameters
+    ----------
+    a : dense, sparse matrix or LinearOperator
+        The hermitian operator to solve.
+    k : int, optional
+        The number of eigenpairs to find.
+    which : {'SA', 'LA'}, optional
+        Whether to find the smallest or largest algebraic eigenvalues.
+    return_vecs : bool, optional
+        Whether to return the eigenvectors as well.
+    sigma : None
+        Shift-invert is not supported.
+    isherm : bool, optional
+        Only hermitian operators are supported.
+    ncv : int, optional
+        The maximum size of the search space before restarting, at least
+        ``3 * k``, defaults to ``max(20, 3 * k)``.
+    sort : bool, optional
+        Whether to sort by ascending eigenvalue.
+    tol : float, optional
+        Converge once the norm of each residual, ``A x - theta x``, is below
+        this, defaults to ``1e-10``.
+    v0 : array_like, optional
+        Initial guess for the lowest (highest) eigenvector. Further starting
+        vectors if ``k > 1`` are random.
+    maxiter : int, optional
+        Maximum number of iterations, defaults to ``max(100, 10 * k)``.
+    precond : None, 1d-array or callable, optional
+        Preconditioner for the correction equation. If an array, it is taken
+        to be the diagonal of ``a`` (Jacobi-Davidson style), else if callable
+        it should be ``precond(r, theta) -> t``, approximately solving
+        ``(a - theta) t = r``. If None, the plain residual is used.
+
+    Returns
+    -------
+    lk : 1d-array
+        The ``k`` eigenvalues.
+    {vk : 2d-matrix
+        matrix with ``k`` eigenvectors as columns if ``return_vecs``}
+
+    Raises
+    ------
+    DavidsonNoConvergence
+        If not converged within ``maxiter`` iterations, holding the current
+        approximations, which can be used if a loose solution is enough.
+    """
+    if sigma is not None:
+        raise ValueError("The davidson backend does not support `sigma`.")
+    if not isherm:
+        raise ValueError("The davidson backend requires a hermitian "
+                         "operator.")
+    which = 'SA' if which is None else which.upper()
+    if which not in ('SA', 'LA'):
+        raise ValueError(f"The davidson backend does not support "
+                         f"``which={which}``, only 'SA' or 'LA'.")
+
+    d = a.shape[0]
+    k = min(k, d)
+    ncv = min(d, max(20 if ncv is None else ncv, 3 * k))
+    tol = 1e-10 if tol is None else tol
+    maxiter = max(100, 10 * k) if maxiter is None else maxiter
+
+    dtype = np.result_type(a.dtype, np.float64)
+    if v0 is not None:
+        dtype = np.result_type(dtype, np.asarray(v0).dtype)
+
+    # initial block of guesses, as rows
+    X = np.random.randn(k, d).astype(dtype)
+    if v0 is not None:
+        X[0, :] = np.asarray(v0).reshape(-1)
+
+    # the orthonormal search space, its image, and the projected operator,
+    #     all filled up to size ``m``
+    V = np.empty((ncv, d), dtype=dtype)
+    AV = np.empty((ncv, d), dtype=dtype)
+    H = np.empty((ncv, ncv), dtype=dtype)
+    m = 0
+    T = X
+    theta = S_prev = None
+    converged = True
+
+    for _ in range(maxiter):
+        T = _orthonormalize_against(T, V[:m])
+        if T.shape[0] == 0 and theta is not None:
+            # preconditioned corrections were degenerate -> plain residuals
+            T = _orthonormalize_against(R[unconverged], V[:m])
+        nt = min(T.shape[0], ncv - m)
+        if nt == 0:
+            # search space can't be extended -> exact within it
+            break
+
+        V[m:m + nt] = T[:nt]
+        AV[m:m + nt] = np.asarray(a @ T[:nt].T).T
+        H[m:m + nt, :m + nt] = V[m:m + nt].conj() @ AV[:m + nt].T
+        H[:m, m:m + nt] = H[m:m + nt, :m].conj().T
+        m += nt
+
+        # rayleigh-ritz in the search space
+        evals, evecs = sla.eigh(H[:m, :m], check_finite=False)
+        sl = slice(0, k) if which == 'SA' else slice(m - k, m)
+        theta, S = evals[sl], evecs[:, sl]
+
+        X = S.T @ V[:m]
+        R = S.T @ AV[:m] - theta.reshape(-1, 1) * X
+        rnorms = np.linalg.norm(R, axis=1)
+
+        unconverged = rnorms > tol
+        if not np.any(unconverged):
+            break
+
+        T = _apply_precond(precond, R[unconverged], theta[unconverged],
+                           X[unconverged])
+
+        if m + T.shape[0] > ncv:
+            # restart keeping the current and previous ritz vectors, which
+            #     both lie in the search space, so no products are needed
+            if S_prev is not None:
+                S_prev = np.concatenate((S_prev, np.zeros(
+                    (m - S_prev.shape[0], k), dtype=S.dtype)))
+                C = sla.orth(np.concatenate((S, S_prev), axis=1))
+            else:
+                C = S
+            c = C.shape[1]
+            V[:c] = C.T @ V[:m]
+            AV[:c] = C.T @ AV[:m]
+            H[:c, :c] = C.conj().T @ H[:m, :m] @ C
+            S = C.conj().T @ S
+            m = c
+
+        S_prev = S
+
+    else:
+        converged = False
+
+    if sort:
+        so = np.argsort(theta)
+        theta, X, rnorms = theta[so], X[so], rnorms[so]
+
+    if not converged:
+        raise DavidsonNoConvergence(
+            "Davidson did not converge within {} iterations, residual "
+            "norms: {}.".format(maxiter, rnorms), theta,
+            np.asmatrix(X.T) if return_vecs else None, rnorms)
+
+    if return_vecs:
+        return theta, np.asmatrix(X.T)
+    return theta
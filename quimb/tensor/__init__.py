@@ -3,9 +3,22 @@ from .tensor_core import (
     einsum_path,
     tensor_contract,
     tensor_direct_product,
+    get_contract_path_cache,
+    set_contract_path_cache,
+    get_contract_strategy,
+    set_contract_strategy,
+    contract_strategy,
+    RandomGreedyOptimizer,
+    ContractionPlan,
+    EffHamLinearOperator,
     Tensor,
     TensorNetwork,
 )
+from .tensor_block_sparse import (
+    BlockIndex,
+    BlockSparseArray,
+    BlockSparseTNLinearOperator,
+)
 from .tensor_gen import (
     rand_tensor,
     MPS_rand_state,
@@ -25,19 +38,37 @@ from .tensor_gen import (
     MPO_ham_XY,
     MPO_ham_heis,
     MPO_ham_mbl,
+    NNI_ham_ising,
+    NNI_ham_XY,
+    NNI_ham_heis,
 )
 from .tensor_1d import (
     MatrixProductState,
     MatrixProductOperator,
     align_TN_1D,
+    left_canonize_batch,
+    right_canonize_batch,
+    canonize_batch,
+)
+from .tensor_tebd import (
+    NNI,
+    TEBD,
 )
 from .tensor_algo_static import (
     MovingEnvironment,
+    MPO_apply_fit,
     DMRG,
     DMRG1,
     DMRG2,
+    DMRGParallel,
     DMRGX,
 )
+from .tensor_tdvp import (
+    TDVP,
+)
+from .tensor_observables import (
+    MPSObservables,
+)
 
 
 __all__ = (
@@ -45,8 +76,19 @@ __all__ = (
     "einsum_path",
     "tensor_contract",
     "tensor_direct_product",
+    "get_contract_path_cache",
+    "set_contract_path_cache",
+    "get_contract_strategy",
+    "set_contract_strategy",
+    "contract_strategy",
+    "RandomGreedyOptimizer",
+    "ContractionPlan",
+    "EffHamLinearOperator",
     "Tensor",
     "TensorNetwork",
+    "BlockIndex",
+    "BlockSparseArray",
+    "BlockSparseTNLinearOperator",
     "rand_tensor",
     "MPS_rand_state",
     "MPS_product_state",
@@ -65,12 +107,24 @@ __all__ = (
     "MPO_ham_XY",
     "MPO_ham_heis",
     "MPO_ham_mbl",
+    "NNI_ham_ising",
+    "NNI_ham_XY",
+    "NNI_ham_heis",
     "MatrixProductState",
     "MatrixProductOperator",
     "align_TN_1D",
+    "left_canonize_batch",
+    "right_canonize_batch",
+    "canonize_batch",
+    "NNI",
+    "TEBD",
     "MovingEnvironment",
+    "MPO_apply_fit",
     "DMRG",
     "DMRG1",
     "DMRG2",
+    "DMRGParallel",
     "DMRGX",
+    "TDVP",
+    "MPSObservables",
 )
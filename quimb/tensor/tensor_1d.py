@@ -2,12 +2,20 @@
 """
 import functools
 import copy
+import weakref
 import numpy as np
 from ..utils import three_line_multi_print, pairwise
 from .tensor_core import (
     Tensor,
     TensorNetwork,
     rand_uuid,
+    tensor_contract,
+)
+from .tensor_block_sparse import (
+    BlockIndex,
+    BlockSparseArray,
+    infer_array_charge,
+    infer_bond_charges,
 )
 try:
     from opt_einsum import parser
@@ -75,6 +83,17 @@ class TensorNetwork1D(TensorNetwork):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # copies share the data, and thus the canonical form, of the original
+        if args and isinstance(args[0], TensorNetwork1D):
+            left, right, refs = args[0]._canonical_state()
+            self._canonical = [left, right, dict(refs)]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # the data won't be the same objects once unpickled
+        state.pop('_canonical', None)
+        return state
+
     @property
     def site_tag_id(self):
         """The string specifier for tagging each site of this 1D TN.
@@ -92,6 +111,82 @@ class TensorNetwork1D(TensorNetwork):
         """
         return tuple(self.site_tag(i) for i in self.sites)
 
+    # ----------------------- canonical form tracking ----------------------- #
+
+    def _canonical_state(self):
+        """The mutable ``[left, right, refs]`` record of the canonical form,
+        where ``refs`` holds a weak reference to the data of each site as it
+        was when last decomposed here.
+        """
+        try:
+            return self._canonical
+        except AttributeError:
+            self._canonical = [0, self.nsites - 1, {}]
+            return self._canonical
+
+    def _site_unchanged(self, i, refs):
+        ref = refs.get(i, None)
+        return (ref is not None) and (ref() is self.site[i].data)
+
+    @property
+    def canonical_range(self):
+        """tuple[int, int] : The range ``(i, j)`` such that every site before
+        ``i`` is known to be left canonical, and every site after ``j`` right
+        canonical, so that the orthogonality center lies within ``[i, j]``.
+        This is tracked through the canonization and compression methods,
+        which use it to skip any sites already in the desired form. A site
+        whose data has since been replaced by any other means, e.g.
+        :meth:`~quimb.tensor.tensor_core.Tensor.modify`, is assumed to be
+        no longer canonical, though changes made in-place to the arrays
+        themselves can't be detected.
+        """
+        state = self._canonical_state()
+        left, right, refs = state
+
+        for i in range(left):
+            if not self._site_unchanged(i, refs):
+                left = i
+                break
+        for i in range(self.nsites - 1, right, -1):
+            if not self._site_unchanged(i, refs):
+                right = i
+                break
+
+        state[0], state[1] = left, right
+        return left, right
+
+    @property
+    def canonize_counts(self):
+        """dict : The number of sites decomposed by the canonization and
+        compression methods, ``'decomposed'``, and the number of sites
+        canonization skipped as being already canonical, ``'skipped'``.
+        """
+        try:
+            return self._canonize_counts
+        except AttributeError:
+            self._canonize_counts = {'decomposed': 0, 'skipped': 0}
+            return self._canonize_counts
+
+    def _track_decomp_site(self, i, j, isometric):
+        """Update the canonical form after site ``i`` has been decomposed,
+        and the remainder absorbed into site ``j``, either ``i + 1`` or
+        ``i - 1``, leaving site ``i`` as an isometry if ``isometric``.
+        """
+        state = self._canonical_state()
+        left, right, refs = state
+
+        if j > i:
+            left = j if (isometric and left >= i) else min(left, i)
+            right = max(right, j)
+        else:
+            right = j if (isometric and right <= i) else max(right, i)
+            left = min(left, j)
+
+        refs[i] = weakref.ref(self.site[i].data)
+        refs[j] = weakref.ref(self.site[j].data)
+        state[0], state[1] = left, right
+        self.canonize_counts['decomposed'] += 1
+
     def _left_decomp_site(self, i, bra=None, **split_opts):
         T1 = self.site[i]
         T2 = self.site[i + 1]
@@ -100,10 +195,12 @@ class TensorNetwork1D(TensorNetwork):
         t2_inds_set = set(T2.inds)
 
         old_shared_bond, = t1_inds_set & t2_inds_set
-        left_inds = t1_inds_set - t2_inds_set
+        # keep the order of ``T1``, rather than of the set, so that the
+        #     rounding errors of the split don't depend on string hashing
+        left_inds = [ix for ix in T1.inds if ix not in t2_inds_set]
 
-        Q, R = T1.split(left_inds, get='tensors', **split_opts)
-        R = R @ T2
+        Q, C = T1.split(left_inds, get='tensors', **split_opts)
+        R = C @ T2
 
         new_shared_bond, = (j for j in Q.inds if j not in t1_inds_set)
         Q.reindex({new_shared_bond: old_shared_bond}, inplace=True)
@@ -114,9 +211,17 @@ class TensorNetwork1D(TensorNetwork):
         self.site[i].modify(data=Q.data)
         self.site[i + 1].modify(data=R.data)
 
+        isometric = split_opts.get('method') == 'qr' or (
+            split_opts.get('absorb', 'both') == 'right')
+        self._track_decomp_site(i, i + 1, isometric)
+
         if bra is not None:
             bra.site[i].modify(data=Q.data.conj())
             bra.site[i + 1].modify(data=R.data.conj())
+            bra._track_decomp_site(i, i + 1, isometric)
+
+        # the non-isometric part, before being absorbed
+        return C
 
     def _right_decomp_site(self, i, bra=None, **split_opts):
         T1 = self.site[i]
@@ -140,9 +245,14 @@ class TensorNetwork1D(TensorNetwork):
         self.site[i - 1].modify(data=L.data)
         self.site[i].modify(data=Q.data)
 
+        isometric = split_opts.get('method') == 'lq' or (
+            split_opts.get('absorb', 'both') == 'left')
+        self._track_decomp_site(i, i - 1, isometric)
+
         if bra is not None:
             bra.site[i - 1].modify(data=L.data.conj())
             bra.site[i].modify(data=Q.data.conj())
+            bra._track_decomp_site(i, i - 1, isometric)
 
     def left_canonize_site(self, i, bra=None):
         """Left canonize this TN's ith site, inplace::
@@ -204,8 +314,16 @@ class TensorNetwork1D(TensorNetwork):
         if stop is None:
             stop = self.nsites - 1
 
+        # sites before this are already left canonical
+        left = self.canonical_range[0]
+        if bra is not None:
+            left = min(left, bra.canonical_range[0])
+
         for i in range(start, stop):
-            self.left_canonize_site(i, bra=bra)
+            if i < left:
+                self.canonize_counts['skipped'] += 1
+            else:
+                self.left_canonize_site(i, bra=bra)
 
         if normalize:
             factor = self.site[-1].norm()
@@ -240,8 +358,16 @@ class TensorNetwork1D(TensorNetwork):
         if stop is None:
             stop = 0
 
+        # sites after this are already right canonical
+        right = self.canonical_range[1]
+        if bra is not None:
+            right = max(right, bra.canonical_range[1])
+
         for i in range(start, stop, -1):
-            self.right_canonize_site(i, bra=bra)
+            if i > right:
+                self.canonize_counts['skipped'] += 1
+            else:
+                self.right_canonize_site(i, bra=bra)
 
         if normalize:
             factor = self.site[0].norm()
@@ -257,6 +383,10 @@ class TensorNetwork1D(TensorNetwork):
             | | | | |...| | |...| | | | |  ->  | | |
             >->->->->- ->-o-<- -<-<-<-<-<      +-o-+
 
+        Only the sites not already known to be in this form, see
+        :attr:`canonical_range`, are decomposed, so e.g. moving the center
+        of a mixed canonical state by one site costs a single decomposition.
+
         Parameters
         ----------
         orthogonality_center : int, optional
@@ -282,11 +412,9 @@ class TensorNetwork1D(TensorNetwork):
             MPS too, assuming it to be the conjugate state.
         """
         if new > current:
-            for i in range(current, new):
-                self.left_canonize_site(i, bra=bra)
+            self.left_canonize(start=current, stop=new, bra=bra)
         else:
-            for i in range(current, new, -1):
-                self.right_canonize_site(i, bra=bra)
+            self.right_canonize(start=current, stop=new, bra=bra)
 
     def left_compress_site(self, i, bra=None, **compress_opts):
         """Left compress this 1D TN's ith site, such that the site is then
@@ -467,6 +595,45 @@ class TensorNetwork1D(TensorNetwork):
         left_inds = Tm1.shared_inds(self.site[i - 1])
         return Tm1.singular_values(left_inds, method=method)
 
+    def gen_singular_values(self, current_orthog_centre=None, method='svd'):
+        """Generate the singular values associated with every bond, in order,
+        with a single sweep::
+
+               o-o-o-o-o-o-o-o        >-o-<-<-<-<-<-<        >->->-o-<-<-<-<
+               | | | | | | | |  -->   | | | | | | | |  -->   | | | | | | | |
+                                       i=1 ...                   i=3 ...
+
+        First the orthogonality center is moved to the first site, then, for
+        each bond ``i`` in turn, the site to its left is left canonized by a
+        QR decomposition, the singular values of the remainder being those of
+        the bond. Compared to calling :meth:`singular_values` for each bond,
+        the canonization is never repeated. The TN is left in mixed canonical
+        form at whichever site the sweep reached, i.e. left canonized, if the
+        generator is exhausted.
+
+        Parameters
+        ----------
+        current_orthog_centre : int, optional
+            If given, the known current orthogonality center, to save
+            canonizing the whole TN first.
+        method : {'svd', 'eig'}, optional
+            How to find the singular values of each bond.
+
+        Yields
+        ------
+        svals : 1d-array
+            The singular values of bond ``i``, between sites ``i - 1`` and
+            ``i``, for ``i = 1, ..., nsites - 1``.
+        """
+        if current_orthog_centre is None:
+            self.right_canonize()
+        else:
+            self.shift_orthogonality_center(current_orthog_centre, 0)
+
+        for i in range(self.nsites - 1):
+            C = self._left_decomp_site(i, method='qr')
+            yield C.singular_values(C.inds[:1], method=method)
+
     def expand_bond_dimension(self, new_bond_dim, inplace=True, bra=None):
         """Expand the bond dimensions of this 1D tensor network to at least
         ``new_bond_dim``.
@@ -489,13 +656,95 @@ class TensorNetwork1D(TensorNetwork):
                     (0, max(new_bond_dim - d, 0))
                     for d, i in zip(tensor.shape, tensor.inds)]
 
-            tensor.modify(data=np.pad(tensor.data, pads, mode='constant'))
+            # leave the data untouched if the bonds are already large enough
+            if not any(p for _, p in pads):
+                continue
+
+            if isinstance(tensor.data, BlockSparseArray):
+                data = tensor.data
+                for ax, (_, p) in enumerate(pads):
+                    if p:
+                        data = data.pad(ax, p)
+                tensor.modify(data=data)
+            else:
+                tensor.modify(data=np.pad(tensor.data, pads, mode='constant'))
 
             if bra is not None:
                 bra.site[i].modify(data=tensor.data.conj())
 
         return expanded
 
+    def to_block_sparse(self, site_charges, symmetry='U1', inplace=False,
+                        tol=1e-12):
+        """Convert the tensors of this 1D network to block sparse arrays,
+        given the charges of the physical basis states. The charges of the
+        bonds are inferred from left to right, and the last tensor carries
+        the total charge. The network should have open boundary conditions
+        and respect the symmetry, e.g. an MPO of a hamiltonian conserving
+        total magnetization, or an MPS with definite magnetization.
+
+        Parameters
+        ----------
+        site_charges : sequence of int, or sequence of such
+            The charge of each physical basis state, e.g. ``(1, -1)`` for
+            twice the z-spin of a spin-1/2, either for all sites, or for each
+            site separately.
+        symmetry : {'U1', 'Z2'}, optional
+            How charges are combined.
+        inplace : bool, optional
+            Whether to convert this network in place.
+        tol : float, optional
+            Elements smaller than this are treated as zero.
+
+        Returns
+        -------
+        TensorNetwork1D
+        """
+        tn = self if inplace else self.copy()
+
+        if not isinstance(site_charges[0], (int, np.integer)):
+            site_charges = dict(zip(tn.sites, site_charges))
+        else:
+            site_charges = {i: site_charges for i in tn.sites}
+
+        # the charged index of each known index name
+        charged = {}
+        for i in tn.sites:
+            for ix, flow in tn._site_ind_flows(i).items():
+                charged[ix] = BlockIndex(site_charges[i], flow)
+
+        for n, i in enumerate(tn.sites):
+            t = tn.site[i]
+            x = np.asarray(t.data)
+
+            if n < len(tn.sites) - 1:
+                r_bond = tn.bond(i, tn.sites[n + 1])
+            else:
+                r_bond = None
+
+            known = {ax: charged[ix] for ax, ix in enumerate(t.inds)
+                     if ix != r_bond}
+            if len(known) != t.ndim - (r_bond is not None):
+                raise ValueError("Can only convert 1D networks with open "
+                                 "boundary conditions to block sparse.")
+
+            if r_bond is None:
+                indices = [known[ax] for ax in range(t.ndim)]
+                charge = infer_array_charge(x, indices, symmetry, tol=tol)
+            else:
+                ax = t.inds.index(r_bond)
+                r_ix = infer_bond_charges(x, known, ax, flow=-1,
+                                          symmetry=symmetry, tol=tol)
+                known[ax] = r_ix
+                charged[r_bond] = r_ix.conj()
+                indices = [known[ax] for ax in range(t.ndim)]
+                charge = 0
+
+            t.modify(data=BlockSparseArray.from_dense(
+                x, indices, charge=charge, symmetry=symmetry, tol=tol))
+
+        return tn
+
     def count_canonized(self, **allclose_opts):
         ov = self.H & self
         num_can_l = 0
@@ -539,6 +788,44 @@ class TensorNetwork1D(TensorNetwork):
         three_line_multi_print(l1, l2, l3, max_width=max_width)
 
 
+def _schmidt_profile(spectra, renyi=(), squeeze=False):
+    """Compute the entropies, schmidt gaps and Renyi entropies of each of
+    the schmidt ``spectra``, vectorized by padding them with zeros.
+    """
+    m = max(len(S) for S in spectra)
+    P = np.zeros((len(spectra), max(m, 2)))
+    for i, S in enumerate(spectra):
+        P[i, :len(S)] = np.sort(np.asarray(S).real)[::-1]
+    P = np.maximum(P, 0.0)
+
+    nz = P > 0.0
+    logP = np.log2(P, where=nz, out=np.zeros_like(P))
+
+    renyis = []
+    for alpha in renyi:
+        if alpha == 1:
+            renyis.append(-np.sum(P * logP, axis=1))
+        elif alpha == np.inf:
+            renyis.append(-np.log2(P[:, 0]))
+        elif alpha == 0:
+            renyis.append(np.log2(np.sum(nz, axis=1)))
+        else:
+            renyis.append(np.log2(np.sum(P**alpha, axis=1)) / (1 - alpha))
+
+    profile = {
+        'entropy': -np.sum(P * logP, axis=1),
+        'schmidt_gap': P[:, 0] - P[:, 1],
+        'renyi': np.array(renyis).reshape(len(renyis), len(spectra)),
+    }
+
+    if squeeze:
+        profile = {'entropy': profile['entropy'][0],
+                   'schmidt_gap': profile['schmidt_gap'][0],
+                   'renyi': profile['renyi'][:, 0]}
+
+    return profile
+
+
 class MatrixProductState(TensorNetwork1D):
     """Initialise a matrix product state, with auto labelling and tagging.
 
@@ -803,9 +1090,79 @@ class MatrixProductState(TensorNetwork1D):
                                 method=method)
         return S[0] - S[1]
 
+    def gen_schmidt_values(self, current_orthog_centre=None, method='svd'):
+        """Generate the schmidt values of every bipartition of this MPS, in
+        order, with a single sweep, see
+        :meth:`~quimb.tensor.tensor_1d.TensorNetwork1D.gen_singular_values`.
+
+        Parameters
+        ----------
+        current_orthog_centre : int, optional
+            If given, the known current orthogonality center, to save
+            canonizing the whole MPS first.
+        method : {'svd', 'eig'}, optional
+            How to find the singular values of each bond.
+
+        Yields
+        ------
+        S : 1d-array
+            The schmidt values of the bipartition into the first ``i`` sites
+            and the rest, for ``i = 1, ..., nsites - 1``.
+        """
+        for svals in self.gen_singular_values(current_orthog_centre, method):
+            yield svals**2
+
+    def entanglement_profile(self, renyi=(), current_orthog_centre=None,
+                             method='svd', stream=False):
+        """Compute the entanglement of every bipartition of this MPS, in a
+        single sweep, see :meth:`gen_schmidt_values`. This costs ``O(N)``,
+        rather than the ``O(N^2)`` of calling e.g. :meth:`entropy` for each
+        bipartition without tracking the orthogonality center.
+
+        Parameters
+        ----------
+        renyi : sequence of float, optional
+            The orders, ``alpha``, of any Renyi entropies to also compute.
+            ``alpha=1`` is the von Neumann entropy and ``alpha=inf`` the
+            min-entropy.
+        current_orthog_centre : int, optional
+            If given, the known current orthogonality center, to save
+            canonizing the whole MPS first.
+        method : {'svd', 'eig'}, optional
+            How to find the singular values of each bond.
+        stream : bool, optional
+            If True, return a generator yielding the results for each
+            bipartition in turn, as the sweep proceeds, rather than arrays
+            over all of them, e.g. for very long chains.
+
+        Returns
+        -------
+        profile : dict or generator of dict
+            With keys:
+
+                - ``'entropy'``: the von Neumann entropies, shape ``(N - 1,)``.
+                - ``'schmidt_gap'``: the schmidt gaps, shape ``(N - 1,)``.
+                - ``'renyi'``: the Renyi entropies, shape
+                  ``(len(renyi), N - 1)``.
+
+            Or, if ``stream=True``, a generator of such dicts, for each
+            bipartition ``i = 1, ..., N - 1``, with scalar entropies and
+            schmidt gap and Renyi entropies of shape ``(len(renyi),)``.
+        """
+        gen = self.gen_schmidt_values(current_orthog_centre, method)
+
+        if stream:
+            return (_schmidt_profile([S], renyi, squeeze=True) for S in gen)
+
+        return _schmidt_profile(list(gen), renyi)
+
     def partial_trace(self, keep, upper_ind_id="b{}", rescale_sites=True):
         """Partially trace this matrix product state, producing a matrix
-        product operator.
+        product operator. The sites outside of the range spanned by ``keep``
+        are first canonized towards it, so that they trace out to the
+        identity and only that range need be contracted. Any of these sites
+        already known to be canonical, see :attr:`canonical_range`, are not
+        decomposed again.
 
         Parameters
         ----------
@@ -823,23 +1180,41 @@ class MatrixProductState(TensorNetwork1D):
         rho : MatrixProductOperator
             The density operator in MPO form.
         """
-        p_bra = self.copy()
-        p_bra.reindex_sites(upper_ind_id, where=keep, inplace=True)
-        rho = self.H & p_bra
-        # now have e.g:
-        #     | |     |   |
-        # o-o-o-o-o-o-o-o-o
-        # | |     | |   |
-        # o-o-o-o-o-o-o-o-o
-        #     | |     |   |
-
         if isinstance(keep, slice):
             keep = range(*self.parse_tag_slice(keep))
 
         keep = sorted(keep)
         n = len(keep)
+        psi = self.copy()
 
-        for i in self.sites:
+        cyclic = self.nsites > 2 and bool(
+            self.site[0].shared_inds(self.site[self.nsites - 1]))
+        if cyclic:
+            # can't trace out the ends by canonizing, contract everything
+            lo, hi = 0, self.nsites - 1
+        else:
+            #     lo     hi
+            # >->-o-o-o-o-<-<
+            # | | | | | | | |
+            lo, hi = keep[0], keep[-1]
+            psi._canonize_counts = self.canonize_counts
+            psi.left_canonize(stop=lo)
+            psi.right_canonize(stop=hi)
+
+        # the dangling outer bonds are shared and so trace out to identities
+        k = psi.select([self.site_tag(i) for i in range(lo, hi + 1)],
+                       mode='any')
+        p_bra = k.reindex({self.site_ind(i): upper_ind_id.format(i)
+                           for i in keep})
+        rho = k.H & p_bra
+        # now have e.g:
+        #     |     |   |
+        #   +-o-o-o-o-o-o-+
+        #   | | |     | | |
+        #   +-o-o-o-o-o-o-+
+        #     |     |   |
+
+        for i in range(lo, hi + 1):
             if i in keep:
                 #      |
                 #     -o-             |
@@ -852,13 +1227,18 @@ class MatrixProductState(TensorNetwork1D):
                 # ...  |    ... -> ... -OO- ...
                 #     -o-o-              |i+1
                 #      i |i+1
-                if i < self.nsites - 1:
+                if i < hi:
                     rho >>= [self.site_tag(i), self.site_tag(i + 1)]
                 else:
-                    rho >>= [self.site_tag(i), self.site_tag(max(keep))]
+                    rho >>= [self.site_tag(i), self.site_tag(keep[-1])]
 
                 rho.drop_tags(self.site_tag(i))
 
+            if isinstance(rho, Tensor):
+                # a single site is kept, and everything has been contracted
+                rho = TensorNetwork((rho,), structure=self.structure,
+                                    nsites=self.nsites, virtual=True)
+
         # transpose upper and lower tags to match other MPOs
         rho = view_TN_as_MPO(rho, lower_ind_id=upper_ind_id,
                              upper_ind_id=self.site_ind_id,
@@ -888,13 +1268,17 @@ class MatrixProductState(TensorNetwork1D):
         return self.partial_trace(keep, upper_ind_id,
                                   rescale_sites=rescale_sites)
 
-    def to_dense(self):
+    def to_dense(self, **contract_opts):
         """Return the dense ket version of this MPS, i.e. a ``numpy.matrix``
-        with shape (-1, 1).
+        with shape (-1, 1). Any ``contract_opts``, e.g. ``max_memory``, are
+        passed to ``tensor_contract``.
         """
-        return np.asmatrix(self.contract(...)
-                           .fuse({'all': self.site_inds})
-                           .data.reshape(-1, 1))
+        return np.asmatrix(np.asarray(self.contract(..., **contract_opts)
+                                      .fuse({'all': self.site_inds})
+                                      .data).reshape(-1, 1))
+
+    def _site_ind_flows(self, i):
+        return {self.site_ind(i): 1}
 
     def phys_dim(self, i=None):
         if i is None:
@@ -1148,7 +1532,75 @@ class MatrixProductOperator(TensorNetwork1D):
 
         return out
 
-    def apply(self, other, compress=False, **compress_opts):
+    def _apply_mps(self, other, compress=False, **compress_opts):
+        """This MPO acting on an MPS, by contracting each pair of site tensors
+        then fusing the bonds, which therefore grow to ``D * chi``.
+        """
+        A, x = self.copy(), other.copy()
+
+        # align the indices and combine into a ladder
+        A.lower_ind_id = "__tmp{}__"
+        A.upper_ind_id = x.site_ind_id
+        both = A | x
+
+        # contract each pair of tensors at each site
+        for i in range(A.nsites):
+            both ^= A.site_tag(i)
+
+        # convert back to MPS and fuse the double bonds
+        both.reindex({A.lower_ind(i): x.site_ind(i) for i in x.sites},
+                     inplace=True)
+        x.imprint(both)
+        both.fuse_multibonds(inplace=True)
+
+        # optionally compress
+        if compress:
+            both.compress(**compress_opts)
+
+        return both
+
+    def _apply_mps_zipup(self, other, **compress_opts):
+        """This MPO acting on an MPS using the 'zip-up' algorithm, see
+        Stoudenmire & White, New J. Phys. 12, 055026 (2010). The product is
+        formed site by site from the left, with each new site immediately
+        split off and truncated, so that the full ``D * chi`` bond is only
+        ever present on a single tensor. A final right compression sweep
+        then makes the truncation optimal.
+        """
+        A, x = self.copy(), other.copy()
+        x.right_canonize()
+
+        A.lower_ind_id = "__tmp{}__"
+        A.upper_ind_id = x.site_ind_id
+
+        # the norm of the remaining right part isn't fixed during the zip, so
+        #     only truncate relative to the largest singular value here
+        split_opts = {**compress_opts, 'absorb': 'right', 'get': 'tensors',
+                      'cutoff_mode': 'rel'}
+
+        carry = ()
+        for i in range(x.nsites):
+            Tx = x.site[i]
+            T = tensor_contract(*carry, A.site[i], Tx)
+
+            if i < x.nsites - 1:
+                left_inds = [ix for ix in T.inds
+                             if ix not in A.site[i + 1].inds and
+                             ix not in x.site[i + 1].inds]
+                T, V = T.split(left_inds, **split_opts)
+                carry = (V,)
+
+            Tx.modify(data=T.data, inds=T.inds)
+
+        x.reindex({A.lower_ind(i): x.site_ind(i) for i in x.sites},
+                  inplace=True)
+
+        # the zipped state is left canonical -> sweep back compressing
+        x.right_compress(**compress_opts)
+        return x
+
+    def apply(self, other, compress=False, algorithm='direct',
+              **compress_opts):
         """Act with this MPO on another MPO or MPS, such that the resulting
         object has the same tensor network structure/indices as the input.
 
@@ -1157,12 +1609,44 @@ class MatrixProductOperator(TensorNetwork1D):
         other : MatrixProductOperator or MatrixProductState
             The object to act on.
         compress : bool, optional
-            Whether to compress the resulting object.
+            Whether to compress the resulting object, only relevant for
+            ``algorithm='direct'``.
+        algorithm : {'direct', 'zipup', 'fit'}, optional
+            How to act on an MPS:
+
+                - 'direct': contract each pair of site tensors, giving bonds
+                  of size ``D * chi``, then optionally compress these.
+                - 'zipup': form and truncate the product site by site, such
+                  that the ``D * chi`` bond only ever exists on one tensor.
+                - 'fit': variationally optimize a MPS with bond dimension
+                  ``max_bond`` to match the product, see
+                  :func:`~quimb.tensor.tensor_algo_static.MPO_apply_fit`.
+
+            The last two require ``max_bond`` and/or ``cutoff`` in
+            ``compress_opts``.
         compress_opts
-            Supplied to :meth:`TensorNetwork1D.compress`.
+            Supplied to :meth:`TensorNetwork1D.compress`, or, if
+            ``algorithm='fit'``, to
+            :func:`~quimb.tensor.tensor_algo_static.MPO_apply_fit`.
         """
         if isinstance(other, MatrixProductOperator):
+            if algorithm != 'direct':
+                raise ValueError("Only ``algorithm='direct'`` is supported "
+                                 "for MPO-MPO products.")
             return self._apply_mpo(other, compress=compress, **compress_opts)
+
+        elif isinstance(other, MatrixProductState):
+            if algorithm == 'direct':
+                return self._apply_mps(other, compress=compress,
+                                       **compress_opts)
+            if algorithm == 'zipup':
+                return self._apply_mps_zipup(other, **compress_opts)
+            if algorithm == 'fit':
+                from .tensor_algo_static import MPO_apply_fit
+                return MPO_apply_fit(self, other, **compress_opts)
+            raise ValueError("``algorithm`` should be one of 'direct', "
+                             "'zipup' or 'fit', got {}.".format(algorithm))
+
         else:
             raise TypeError("Can only Dot with a MatrixProductOperator or a "
                             "MatrixProductState, got {}".format(type(other)))
@@ -1234,9 +1718,15 @@ class MatrixProductOperator(TensorNetwork1D):
         """
         return tuple(self.upper_ind(i) for i in self.sites)
 
-    def to_dense(self):
-        data = self.contract(...).fuse((('lower', self.lower_inds),
-                                        ('upper', self.upper_inds))).data
+    def to_dense(self, **contract_opts):
+        """Return the dense operator version of this MPO, i.e. a
+        ``numpy.matrix``. Any ``contract_opts``, e.g. ``max_memory``, are
+        passed to ``tensor_contract``.
+        """
+        T = self.contract(..., **contract_opts)
+        data = T.fuse((('lower', self.lower_inds),
+                       ('upper', self.upper_inds))).data
+        data = np.asarray(data)
         d = int(data.size**0.5)
         return np.matrix(data.reshape(d, d))
 
@@ -1245,6 +1735,10 @@ class MatrixProductOperator(TensorNetwork1D):
             i = self.sites[0]
         return self.site[i].ind_size(self.upper_ind(i))
 
+    def _site_ind_flows(self, i):
+        # the upper (ket) inds contract with an MPS, the lower with its dual
+        return {self.upper_ind(i): -1, self.lower_ind(i): 1}
+
     def show(self, max_width=None):
         l1 = ""
         l2 = ""
@@ -1293,3 +1787,187 @@ def view_TN_as_MPO(tn, upper_ind_id, lower_ind_id, site_tag_id, inplace=False):
     tn._lower_ind_id = lower_ind_id
     tn._site_tag_id = site_tag_id
     return tn
+
+
+# --------------------------------------------------------------------------- #
+#                          Batched canonization                               #
+# --------------------------------------------------------------------------- #
+
+def _batch_decomp_stack(A, method):
+    """Decompose a stack of matrices, ``A = Q @ R``, with ``Q`` isometric.
+    """
+    if method == 'qr':
+        return np.linalg.qr(A)
+    if method == 'svd':
+        U, s, VH = np.linalg.svd(A, full_matrices=False)
+        return U, s[..., :, None] * VH
+    raise ValueError("``method`` should be 'qr' or 'svd', got {}."
+                     .format(method))
+
+
+def _batch_decomp_site(tns, i, j, method, buffers):
+    """Canonize site ``i`` of every TN in ``tns`` at once, absorbing the
+    non-isometric part into site ``j`` (``i - 1`` or ``i + 1``). TNs whose
+    tensors at ``i, j`` have matching shapes, bond positions and dtypes are
+    decomposed together with a single stacked LAPACK call, the rest (and any
+    with block sparse data) fall back to the usual site by site method.
+    Either way site ``i`` is left an isometry.
+    """
+    groups = {}
+    for tn in tns:
+        T1, T2 = tn.site[i], tn.site[j]
+
+        if not (isinstance(T1.data, np.ndarray) and
+                isinstance(T2.data, np.ndarray)):
+            if j > i:
+                tn._left_decomp_site(i, method=method, absorb='right')
+            else:
+                tn._right_decomp_site(
+                    i, method={'qr': 'lq'}.get(method, method),
+                    absorb='left')
+            continue
+
+        bond, = T1.shared_inds(T2)
+        key = (T1.shape, T1.inds.index(bond), T2.shape, T2.inds.index(bond),
+               np.result_type(T1.dtype, T2.dtype))
+        groups.setdefault(key, []).append((tn, T1, T2))
+
+    for (shp1, ax1, shp2, ax2, dtype), pairs in groups.items():
+        k = shp1[ax1]
+        shp1_q = shp1[:ax1] + shp1[ax1 + 1:]
+        shp2_r = shp2[:ax2] + shp2[ax2 + 1:]
+        m, n = int(np.prod(shp1_q)), int(np.prod(shp2_r))
+
+        # fetch (or create) the stacked buffers for this shape
+        nb = len(pairs)
+        try:
+            A1, A2 = buffers[nb, m, k, n, dtype]
+        except KeyError:
+            A1 = np.empty((nb, m, k), dtype=dtype)
+            A2 = np.empty((nb, k, n), dtype=dtype)
+            buffers[nb, m, k, n, dtype] = A1, A2
+
+        # site i as (.., m, k) with the bond last, site j as (.., k, n)
+        for b, (_, T1, T2) in enumerate(pairs):
+            A1[b] = np.moveaxis(T1.data, ax1, -1).reshape(m, k)
+            A2[b] = np.moveaxis(T2.data, ax2, 0).reshape(k, n)
+
+        # whichever the direction, site j absorbs R along the shared bond
+        Q, R = _batch_decomp_stack(A1, method)
+        RA2 = np.matmul(R, A2)
+        r = Q.shape[-1]
+
+        for b, (tn, T1, T2) in enumerate(pairs):
+            T1.modify(data=np.moveaxis(Q[b].reshape(*shp1_q, r), -1, ax1))
+            T2.modify(data=np.moveaxis(RA2[b].reshape(r, *shp2_r), 0, ax2))
+            tn._track_decomp_site(i, j, True)
+
+
+def left_canonize_batch(tns, stop=None, start=None, normalize=False,
+                        method='qr'):
+    """Left canonize a group of independent 1D tensor networks, such as an
+    ensemble of MPS, inplace. This is equivalent to calling
+    :meth:`~quimb.tensor.tensor_1d.TensorNetwork1D.left_canonize` on each,
+    but the tensors at each site are decomposed together using stacked
+    ``numpy.linalg`` calls, which is much faster when there are many small
+    tensors.
+
+    Parameters
+    ----------
+    tns : sequence of TensorNetwork1D
+        The tensor networks to canonize, all should have the same sites.
+    stop : int, optional
+        If given, the site to stop left canonizing at.
+    start : int, optional
+        If given, the site to start left canonizing at.
+    normalize : bool, optional
+        Whether to normalize the states.
+    method : {'qr', 'svd'}, optional
+        How to decompose each site.
+    """
+    tns = tuple(tns)
+    if start is None:
+        start = 0
+    if stop is None:
+        stop = tns[0].nsites - 1
+
+    # sites before these are already left canonical
+    lefts = [tn.canonical_range[0] for tn in tns]
+
+    buffers = {}
+    for i in range(start, stop):
+        todo = []
+        for tn, left in zip(tns, lefts):
+            if i < left:
+                tn.canonize_counts['skipped'] += 1
+            else:
+                todo.append(tn)
+        _batch_decomp_site(todo, i, i + 1, method, buffers)
+
+    if normalize:
+        for tn in tns:
+            tn.site[-1] /= tn.site[-1].norm()
+
+
+def right_canonize_batch(tns, stop=None, start=None, normalize=False,
+                         method='qr'):
+    """Right canonize a group of independent 1D tensor networks, such as an
+    ensemble of MPS, inplace. This is equivalent to calling
+    :meth:`~quimb.tensor.tensor_1d.TensorNetwork1D.right_canonize` on each,
+    but the tensors at each site are decomposed together using stacked
+    ``numpy.linalg`` calls, which is much faster when there are many small
+    tensors.
+
+    Parameters
+    ----------
+    tns : sequence of TensorNetwork1D
+        The tensor networks to canonize, all should have the same sites.
+    stop : int, optional
+        If given, the site to stop right canonizing at.
+    start : int, optional
+        If given, the site to start right canonizing at.
+    normalize : bool, optional
+        Whether to normalize the states.
+    method : {'qr', 'svd'}, optional
+        How to decompose each site.
+    """
+    tns = tuple(tns)
+    if start is None:
+        start = tns[0].nsites - 1
+    if stop is None:
+        stop = 0
+
+    # sites after these are already right canonical
+    rights = [tn.canonical_range[1] for tn in tns]
+
+    buffers = {}
+    for i in range(start, stop, -1):
+        todo = []
+        for tn, right in zip(tns, rights):
+            if i > right:
+                tn.canonize_counts['skipped'] += 1
+            else:
+                todo.append(tn)
+        _batch_decomp_site(todo, i, i - 1, method, buffers)
+
+    if normalize:
+        for tn in tns:
+            tn.site[0] /= tn.site[0].norm()
+
+
+def canonize_batch(tns, orthogonality_center, method='qr'):
+    """Mixed canonize a group of independent 1D tensor networks around the
+    same site, inplace, see :func:`left_canonize_batch`.
+
+    Parameters
+    ----------
+    tns : sequence of TensorNetwork1D
+        The tensor networks to canonize, all should have the same sites.
+    orthogonality_center : int
+        Which site to orthogonalize around.
+    method : {'qr', 'svd'}, optional
+        How to decompose each site.
+    """
+    tns = tuple(tns)
+    left_canonize_batch(tns, stop=orthogonality_center, method=method)
+    right_canonize_batch(tns, stop=orthogonality_center, method=method)
@@ -1,16 +1,30 @@
 """DMRG-like variational algorithms, but in tensor network language.
 """
-import numpy as np
+import os
+import pickle
+import random
+import inspect
 import itertools
+import weakref
+
+import numpy as np
 
 from ..utils import progbar
-from ..accel import prod
+from ..accel import prod, get_process_pool
 from ..linalg.base_linalg import eigsys, seigsys
+from ..linalg.davidson import DavidsonNoConvergence
 from .tensor_core import (
     Tensor,
     TensorNetwork,
     tensor_contract,
-    TNLinearOperator
+    rand_uuid,
+    EffHamLinearOperator,
+)
+from .tensor_1d import TensorNetwork1D
+from .tensor_block_sparse import (
+    BlockSparseArray,
+    BlockSparseTNLinearOperator,
+    concatenate as bs_concatenate,
 )
 from .tensor_gen import MPS_rand_state
 
@@ -48,7 +62,7 @@ class MovingEnvironment:
 
     which can then be used to efficiently generate the left environments as
     each site is updated. For example if ``bsz=2`` and the environements have
-    been shifted many sites into the middle, then ``MovingEnvironment[i]``
+    been shifted many sites into the middle, then ``MovingEnvironment()``
     returns something like::
 
              <---> bsz sites
@@ -59,6 +73,19 @@ class MovingEnvironment:
              \o-o/
         0 ... i i+1 ... n-1
 
+    Only the contracted left and right boundary tensors are stored, one per
+    block position, the local sites are always taken directly from ``tn``,
+    so that setting up and moving the environment scales linearly with
+    ``n``. Each boundary tensor is tagged with the site tag of the closest
+    site it contains, as well as any other tags, e.g. ``'_HAM'``, of the
+    tensors it was formed from.
+
+    The environment can be kept around and reused after the underlying tensors
+    have been changed elsewhere, e.g. between sweeps, by calling
+    :meth:`invalidate`, which drops only those boundary tensors containing
+    sites that have changed. These are then lazily rebuilt from the nearest
+    still valid boundary when next needed.
+
     Does not necessarily need to be an operator overlap tensor network. Useful
     for any kind of sweep where only local tensor updates are being made. Note
     that *only* the current site is completely up-to-date.
@@ -77,64 +104,136 @@ class MovingEnvironment:
     """
 
     def __init__(self, tn, n, start, bsz=1):
+        self.tn = tn
         self.n = n
         self.start = start
         self.bsz = bsz
         self.num_blocks = self.n - self.bsz + 1
 
         if start == 'left':
-            initial_j = n - self.bsz
-            sweep = reversed(range(0, self.num_blocks - 1))
-            previous_step = 1
             self.pos = 0
         elif start == 'right':
-            initial_j = 0
-            sweep = range(1, self.num_blocks)
-            previous_step = -1
-            self.pos = n - self.bsz
+            self.pos = self.num_blocks - 1
         else:
             raise ValueError("'start' must be one of {'left', 'right'}.")
 
-        self.envs = {initial_j: tn.copy(virtual=True)}
-        for j in sweep:
-            # get the env from previous step
-            env = self.envs[j + previous_step].copy(virtual=True)
+        # ``_left[i]`` is the contraction of all sites ``< i`` and
+        # ``_right[i]`` that of all sites ``>= i + bsz``, ``None`` if empty
+        self._left = {0: None}
+        self._right = {self.num_blocks - 1: None}
 
-            # contract it with one more site, no-op if near end, to get jth env
-            if start == 'left':
-                env ^= slice(j + self.bsz, min(n, j + self.bsz + 2))
-            else:
-                env ^= slice(max(0, j - 2), j)
-            self.envs[j] = env
+        # the data and indices of each site as it was last absorbed into a
+        # boundary, used to check which boundaries are out of date
+        self._absorbed = {}
+
+        self._ensure_left(self.pos)
+        self._ensure_right(self.pos)
+
+    def _site_tensors(self, i):
+        """The live tensors of site ``i`` in the underlying network.
+        """
+        return self.tn.select_tensors(self.tn.structure.format(i))
+
+    def _contract_site(self, env, i, prev):
+        """Absorb site ``i`` into the boundary tensor ``env``, which currently
+        ends at site ``prev``. Only the newest site tag is kept, so that the
+        number of tags of each boundary doesn't grow with ``n``.
+        """
+        ts = self._site_tensors(i)
+        self._absorbed[i] = tuple((weakref.ref(t.data), t.inds) for t in ts)
+
+        if env is None:
+            return tensor_contract(*ts)
+
+        new_env = tensor_contract(env, *ts)
+        new_env.tags.discard(self.tn.structure.format(prev))
+        return new_env
+
+    def _ensure_left(self, i):
+        """Make sure the left environment of block ``i`` exists, building it
+        up from the nearest existing one.
+        """
+        j = i
+        while j not in self._left:
+            j -= 1
+        while j < i:
+            self._left[j + 1] = self._contract_site(self._left[j], j, j - 1)
+            j += 1
+
+    def _ensure_right(self, i):
+        """Make sure the right environment of block ``i`` exists, building it
+        up from the nearest existing one.
+        """
+        j = i
+        while j not in self._right:
+            j += 1
+        while j > i:
+            self._right[j - 1] = self._contract_site(
+                self._right[j], j - 1 + self.bsz, j + self.bsz)
+            j -= 1
+
+    def _site_changed(self, i):
+        """Check whether site ``i`` has changed since it was last absorbed.
+        """
+        ts = self._site_tensors(i)
+        record = self._absorbed[i]
+        return (len(ts) != len(record)) or any(
+            (ref() is not t.data) or (inds != t.inds)
+            for t, (ref, inds) in zip(ts, record))
+
+    def invalidate(self, sites=None):
+        """Drop any boundary tensors that contain changed sites.
+
+        Parameters
+        ----------
+        sites : sequence of int, optional
+            The sites which have changed. If not given, check every site for
+            new data or indices, which will catch any change not made in-place
+            to the arrays themselves.
+
+        Returns
+        -------
+        dirty : tuple of int
+            The sites that were found to have changed.
+        """
+        if sites is None:
+            sites = [i for i in self._absorbed if self._site_changed(i)]
+        dirty = tuple(sorted(sites))
+
+        if dirty:
+            for i in dirty:
+                self._absorbed.pop(i, None)
+
+            # the empty boundaries at either end are always kept
+            for j in [j for j in self._left if j > dirty[0]]:
+                del self._left[j]
+            for j in [j for j in self._right if j + self.bsz <= dirty[-1]]:
+                del self._right[j]
+
+        return dirty
 
     def move_right(self):
         i = self.pos + 1
 
-        if i > 1:
-            # replace left env with new effective left env
-            for j in range(i - 1):
-                del self.envs[i].site[j]
-            self.envs[i] |= self.envs[i - 1].site[i - 2]
-
-        if i > 0:
-            # contract left env with new minimized, canonized site
-            self.envs[i] ^= slice(max(0, i - 2), i)
+        # contract left env with new minimized, canonized site
+        self._ensure_left(self.pos)
+        self._left[i] = self._contract_site(self._left[self.pos],
+                                            self.pos, self.pos - 1)
 
+        # the old right env now contains sites which are about to be updated
+        self._right.pop(self.pos, None)
         self.pos += 1
 
     def move_left(self):
         i = self.pos - 1
 
-        if i < self.n - self.bsz - 1:
-            # replace right env with new effective right env
-            for j in range(self.n - 1, i + self.bsz, -1):
-                del self.envs[i].site[j]
-            self.envs[i] |= self.envs[i + 1].site[i + self.bsz + 1]
+        # contract right env with new minimized, canonized site
+        self._ensure_right(self.pos)
+        self._right[i] = self._contract_site(self._right[self.pos],
+                                             i + self.bsz, i + self.bsz + 1)
 
-        if i < self.n - self.bsz:
-            # contract right env with new minimized, canonized site
-            self.envs[i] ^= slice(min(self.n - 1, i + self.bsz + 1),
-                                  i + self.bsz - 1)
+        # the old left env now contains sites which are about to be updated
+        self._left.pop(self.pos, None)
         self.pos -= 1
 
     def move_to(self, i):
@@ -148,10 +247,183 @@ class MovingEnvironment:
             while self.pos != i:
                 self.move_right()
 
+    def boundaries(self):
+        """Get the current left and right boundary tensors, either of which
+        is ``None`` if there are no sites on that side.
+        """
+        self._ensure_left(self.pos)
+        self._ensure_right(self.pos)
+        return self._left[self.pos], self._right[self.pos]
+
     def __call__(self):
-        """Get the current environment.
+        """Get the current environment, as a virtual tensor network of the
+        left boundary, the ``bsz`` live local sites, and the right boundary.
         """
-        return self.envs[self.pos]
+        self._ensure_left(self.pos)
+        self._ensure_right(self.pos)
+
+        ts = []
+        if self._left[self.pos] is not None:
+            ts.append(self._left[self.pos])
+        for i in range(self.pos, self.pos + self.bsz):
+            ts.extend(self._site_tensors(i))
+        if self._right[self.pos] is not None:
+            ts.append(self._right[self.pos])
+
+        # the boundaries are tagged with their closest site
+        sites = range(max(0, self.pos - 1),
+                      min(self.n, self.pos + self.bsz + 1))
+        return TensorNetwork(ts, virtual=True, check_collisions=False,
+                             structure=self.tn.structure,
+                             structure_bsz=self.tn.structure_bsz,
+                             nsites=self.n, sites=sites)
+
+
+# --------------------------------------------------------------------------- #
+#                            Variational MPO-MPS                              #
+# --------------------------------------------------------------------------- #
+
+def MPO_apply_fit(A, psi, max_bond=None, cutoff=1e-10, bsz=2, p0=None,
+                  tol=1e-9, max_sweeps=10, info=None, verbose=False,
+                  **split_opts):
+    """Find the MPS with bond dimension ``max_bond`` closest to ``A |psi>``
+    by variationally sweeping, without ever forming the product with its
+    bonds of size ``D * chi``. Each sweep updates each block of ``bsz`` sites
+    of the fitted state to its optimal value given the rest, which (in
+    mixed canonical form) is simply the overlap of ``A |psi>`` with the
+    environment of the block::
+
+        o-o-o-o-     -o-o-o-o-o                 o-o-o-o     o-o-o-o-o
+        | | | |       | | | | |      --->       | | | |     | | | | |
+        A-A-A-A-A-A-A-A-A-A-A-A      --->       A-A-A-A-A-A-A-A-A-A-A-A
+        | | | | | | | | | | | |                 | | | | | | | | | | | |
+        p-p-p-p-p-p-p-p-p-p-p-p                 p-p-p-p-p-p-p-p-p-p-p-p
+
+    The environments are handled by a :class:`MovingEnvironment`, so each
+    sweep costs ``O(n D chi^3)``.
+
+    Parameters
+    ----------
+    A : MatrixProductOperator
+        The operator.
+    psi : MatrixProductState
+        The state to act on.
+    max_bond : int, optional
+        The maximum bond dimension of the fitted state. If ``bsz=1`` this is
+        instead fixed by ``p0``.
+    cutoff : float, optional
+        The singular value cutoff used when splitting two site blocks.
+    bsz : {2, 1}, optional
+        How many sites to update at once. Two site updates can grow the bond
+        dimension up to ``max_bond``, one site updates are cheaper but keep
+        the bond dimensions of ``p0``.
+    p0 : MatrixProductState, optional
+        The initial guess, by default the (cheap but approximate) zip-up
+        product, see :meth:`MatrixProductOperator.apply`.
+    tol : float, optional
+        Stop once the relative change in the norm of the fitted state over
+        a sweep is smaller than this.
+    max_sweeps : int, optional
+        The maximum number of sweeps to perform.
+    info : dict, optional
+        If given, store the norm of the fitted state after each sweep in
+        ``info['norms']`` and the number of sweeps in ``info['sweeps']``.
+    verbose : bool, optional
+        Print the norm of the fitted state after each sweep.
+    split_opts
+        Supplied to :func:`~quimb.tensor.tensor_core.tensor_split` when
+        splitting two site blocks, e.g. ``method``, ``cutoff_mode``, or
+        ``oversample`` and ``n_iter`` for ``method='rsvd'``. The ``absorb``
+        and ``get`` options are set by the sweeps, so can't be given.
+
+    Returns
+    -------
+    MatrixProductState
+    """
+    if bsz not in (1, 2):
+        raise ValueError("``bsz`` should be 1 or 2, got {}.".format(bsz))
+    for opt in ('absorb', 'get'):
+        if opt in split_opts:
+            raise ValueError("The ``{}`` option of ``tensor_split`` is set "
+                             "by the fitting sweeps, so can't be given."
+                             .format(opt))
+
+    n = psi.nsites
+    split_opts = {**split_opts, 'max_bond': max_bond, 'cutoff': cutoff,
+                  'get': 'tensors'}
+
+    if p0 is not None:
+        bra = p0.copy()
+    else:
+        bra = A.apply(psi, algorithm='zipup', max_bond=max_bond,
+                      cutoff=cutoff)
+
+    # only the conjugate of the fitted state is stored and updated, with the
+    #     orthogonality center starting at the left
+    bra.right_canonize()
+    bra = bra.H
+    bra.site_ind_id = "__fit{}__"
+
+    A = A.copy()
+    A.lower_ind_id = bra.site_ind_id
+    A.upper_ind_id = psi.site_ind_id
+
+    # any clashing bonds are renamed here
+    tn = bra | A | psi.copy()
+    env = MovingEnvironment(tn, n=n, start='left', bsz=bsz)
+
+    norms = []
+    for sweep in range(max_sweeps):
+        right = (sweep % 2 == 0)
+        sites = range(n - bsz + 1)
+        if not right:
+            sites = reversed(sites)
+
+        for i in sites:
+            env.move_to(i)
+            block = [bra.site[j] for j in range(i, i + bsz)]
+            others = [t for t in env().tensors
+                      if not any(t is b for b in block)]
+
+            # the optimal (conjugate) block given its environment
+            inner = set.intersection(*(set(b.inds) for b in block))
+            out_inds = [ix for b in block for ix in b.inds
+                        if (bsz == 1) or (ix not in inner)]
+            E = tensor_contract(*others, output_inds=out_inds).conj()
+
+            if bsz == 1:
+                block[0].modify(data=E.data)
+                nrm = np.linalg.norm(E.data)
+                if right and i < n - 1:
+                    bra.left_canonize_site(i)
+                elif not right and i > 0:
+                    bra.right_canonize_site(i)
+            else:
+                T1, T2 = block
+                bond, = T1.shared_inds(T2)
+                left_inds = [ix for ix in T1.inds if ix != bond]
+                L, R = E.split(left_inds, absorb='right' if right else 'left',
+                               **split_opts)
+                new_bond, = L.shared_inds(R)
+                L.reindex({new_bond: bond}, inplace=True)
+                R.reindex({new_bond: bond}, inplace=True)
+                T1.modify(data=L.transpose(*T1.inds).data)
+                T2.modify(data=R.transpose(*T2.inds).data)
+                nrm = np.linalg.norm((R if right else L).data)
+
+        norms.append(nrm)
+        if verbose:
+            print("Sweep {}: norm = {}".format(sweep + 1, nrm))
+        if len(norms) > 1 and abs(norms[-1] - norms[-2]) <= tol * nrm:
+            break
+
+    if info is not None:
+        info['norms'] = norms
+        info['sweeps'] = len(norms)
+
+    x = bra.H
+    x.site_ind_id = psi.site_ind_id
+    return x
 
 
 # --------------------------------------------------------------------------- #
@@ -190,6 +462,122 @@ def parse_2site_inds_dims(k, b, i):
     return dims, lix_L, lix_R, lix, uix_L, uix_R, uix, l_bond_ind, u_bond_ind
 
 
+# --------------------------------------------------------------------------- #
+#                                Checkpointing                                #
+# --------------------------------------------------------------------------- #
+
+class _Schedule:
+    """The per-sweep values of e.g. the bond dimension, repeating the final
+    value indefinitely. Unlike a plain iterator this can be pickled, so that
+    the position in the schedule can be checkpointed.
+    """
+
+    def __init__(self, values):
+        self.values = tuple(values)
+        self.pos = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = self.values[min(self.pos, len(self.values) - 1)]
+        self.pos += 1
+        return value
+
+
+class _Checkpointer:
+    """Save the state of a solver to ``filename`` as a sequence of pickled
+    records. The first is a full snapshot, subsequent ones only contain the
+    sites whose data or indices have changed since the previous record, and
+    the state of the random number generators, if that has changed. Once
+    these have grown to twice the size of the snapshot, a new snapshot is
+    written, atomically replacing the file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._snapshot_size = None
+        self._size = 0
+        self._saved = {}
+        self._saved_rng_state = None
+
+    def _changed(self, i, t):
+        try:
+            data_ref, inds = self._saved[i]
+        except KeyError:
+            return True
+        return (data_ref() is not t.data) or (inds != t.inds)
+
+    def write(self, static, header, state, rng_state=None):
+        """Write a new record.
+
+        Parameters
+        ----------
+        static : callable
+            Called to get the information that is fixed throughout the solve,
+            only needed for snapshots.
+        header : dict
+            The solver's attributes, solve options and progress.
+        state : MatrixProductState
+            The current state.
+        rng_state : bytes, optional
+            The pickled state of the random number generators, for solvers
+            that use them.
+        """
+        if (self._snapshot_size is None or
+                self._size > 3 * self._snapshot_size):
+            record = {'static': static(), 'header': header, 'state': state,
+                      'rng_state': rng_state}
+            tmp_filename = self.filename + '.tmp'
+            with open(tmp_filename, 'wb') as f:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self._snapshot_size = self._size = f.tell()
+            os.replace(tmp_filename, self.filename)
+        else:
+            sites = {i: (state.site[i].data, state.site[i].inds)
+                     for i in state.sites if self._changed(i, state.site[i])}
+            record = {'header': header, 'sites': sites}
+            if rng_state != self._saved_rng_state:
+                record['rng_state'] = rng_state
+            with open(self.filename, 'ab') as f:
+                start = f.tell()
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self._size += f.tell() - start
+
+        self._saved = {i: (weakref.ref(state.site[i].data), state.site[i].inds)
+                       for i in state.sites}
+        self._saved_rng_state = rng_state
+
+
+def _read_checkpoint(filename):
+    """Replay the records written by a ``_Checkpointer`` to ``filename``,
+    returning the static information, the latest header, the state and the
+    pickled state of the random number generators. An incompletely written
+    final record, e.g. from a killed job, is ignored.
+    """
+    static = header = state = rng_state = None
+
+    with open(filename, 'rb') as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError, ValueError, TypeError):
+                break
+
+            if 'static' in record:
+                static, state = record['static'], record['state']
+            else:
+                for i, (data, inds) in record['sites'].items():
+                    state.site[i].modify(data=data, inds=inds)
+            header = record['header']
+            rng_state = record.get('rng_state', rng_state)
+
+    if header is None:
+        raise ValueError(f"No checkpoint could be read from {filename}.")
+
+    return static, header, state, rng_state
+
+
 class DMRG:
     """Density Matrix Renormalization Group variational groundstate search.
     Some initialising arguments act as defaults, but can be overidden with
@@ -198,7 +586,9 @@ class DMRG:
     Parameters
     ----------
     ham : MatrixProductOperator
-        The hamiltonian in MPO form.
+        The hamiltonian in MPO form. If its tensors are block sparse, see
+        :meth:`~quimb.tensor.MatrixProductOperator.to_block_sparse`, the
+        local eigenproblems are restricted to the symmetry sector of ``p0``.
     bond_dims : int or sequence of ints.
         The bond-dimension of the MPS to optimize. If ``bsz > 1``, then this
         corresponds to the maximum bond dimension when splitting the effective
@@ -213,6 +603,9 @@ class DMRG:
         Number of sites to optimize for locally i.e. DMRG1 or DMRG2.
     which : {'SA', 'LA'}, optional
         Whether to search for smallest or largest real part eigenvectors.
+    p0 : MatrixProductState, optional
+        The initial state, defaults to a random MPS, but is required, in
+        block sparse form, if ``ham`` is block sparse.
 
     Attributes
     ----------
@@ -222,8 +615,27 @@ class DMRG:
         The current, optimized state.
     energies : list of float
         The list of energies after each sweep.
+    truncation_errors : list of array
+        For each sweep, the weight discarded at each bond by its compression,
+        relative to the total weight of the local state.
+    max_bonds : array or None
+        The current maximum dimension of each bond, if adapting them.
     opts : dict
         Advanced options e.g. relating to the inner eigensolve or compression.
+        Setting ``opts['eff_eig_bkd'] = 'DAVIDSON'`` uses a block Davidson
+        local eigensolver, warm started from the current state, with the
+        tolerance adaptively tightened as the energy converges (see
+        ``'eff_eig_adaptive_tol'`` and ``'eff_eig_tol_min'``) and optionally
+        a diagonal preconditioner (``'eff_eig_precond'``). Setting
+        ``opts['subspace_expansion'] = True`` makes one site DMRG grow its
+        bonds by subspace expansion, with relative mixing factor
+        ``opts['expand_alpha']``, which is halved whenever a sweep with
+        saturated bonds raises the energy. Setting
+        ``opts['adaptive_bond_dims'] = True`` gives each bond its own maximum
+        dimension, starting at ``opts['adaptive_bond_dim_start']``, and
+        multiplied by ``opts['adaptive_bond_dim_growth']`` only after sweeps
+        in which its truncation error exceeded the cutoff, the values of
+        ``bond_dims`` then acting as overall limits.
     """
 
     def __init__(self, ham, bond_dims,
@@ -238,6 +650,10 @@ class DMRG:
         # create internal states and ham
         if p0 is not None:
             self._k = p0.copy()
+        elif isinstance(ham.site[0].data, BlockSparseArray):
+            raise ValueError("An initial state ``p0``, in block sparse form "
+                             "with the desired total charge, is needed for "
+                             "a block sparse hamiltonian.")
         else:
             dtype = ham.site[0].dtype
             self._k = MPS_rand_state(self.n, self._bond_dim0, self.phys_dim,
@@ -254,6 +670,17 @@ class DMRG:
         self.TN_energy = self._b | self.ham | self._k
         self.energies = [self.TN_energy ^ ...]
 
+        # persistent moving environments, reused between sweeps
+        self._envs = {}
+
+        # reduced whenever the subspace expansion makes a sweep worse
+        self._expand_alpha_scale = 1.0
+
+        # the weight discarded at each bond by each sweep, and, if adapting
+        #     them, the current maximum dimension of each bond
+        self.truncation_errors = []
+        self.max_bonds = None
+
         self.opts = {
             'eff_eig_bkd': "AUTO",
             'eff_eig_tol': 1e-3,
@@ -261,6 +688,14 @@ class DMRG:
             'eff_eig_maxiter': None,
             'eff_eig_dense': None,
             'eff_eig_EPSType': 'krylovschur',
+            'eff_eig_adaptive_tol': None,
+            'eff_eig_tol_min': 1e-10,
+            'eff_eig_precond': False,
+            'subspace_expansion': False,
+            'expand_alpha': 0.1,
+            'adaptive_bond_dims': False,
+            'adaptive_bond_dim_start': 8,
+            'adaptive_bond_dim_growth': 2.0,
             'compress_method': 'svd',
             'compress_cutoff_mode': 'sum2',
             'default_sweep_sequence': 'R',
@@ -269,16 +704,30 @@ class DMRG:
     def _set_bond_dim_seq(self, bond_dims):
         bds = (bond_dims,) if isinstance(bond_dims, int) else tuple(bond_dims)
         self._bond_dim0 = bds[0]
-        self._bond_dims = itertools.chain(bds, itertools.repeat(bds[-1]))
+        self._bond_dims = _Schedule(bds)
 
     def _set_cutoff_seq(self, cutoffs):
         bds = (cutoffs,) if isinstance(cutoffs, float) else tuple(cutoffs)
-        self._cutoffs = itertools.chain(bds, itertools.repeat(bds[-1]))
+        self._cutoffs = _Schedule(bds)
 
     @property
     def energy(self):
         return self.energies[-1]
 
+    def _get_env(self, name, tn, start='left'):
+        """Get the persistent ``MovingEnvironment`` called ``name`` of ``tn``,
+        creating it starting from ``start`` if needed. If it already exists,
+        only the boundaries containing sites that have changed since it was
+        last used are invalidated, and thus recomputed.
+        """
+        try:
+            env = self._envs[name]
+            env.invalidate()
+        except KeyError:
+            env = MovingEnvironment(tn, n=self.n, start=start, bsz=self.bsz)
+            self._envs[name] = env
+        return env
+
     @property
     def state(self):
         return self._k.copy()
@@ -293,16 +742,143 @@ class DMRG:
         elif (direction == 'left') and (i > 0):
             self._k.right_compress_site(i, bra=self._b, **compress_opts)
 
+    def _expand_after_1site_update(self, direction, i):
+        """Enlarge the bond between the just updated site ``i`` and the next
+        site in ``direction`` using the 'strictly single site' (3S) subspace
+        expansion of Hubig et al., PRB 91, 155115 (2015). The perturbation,
+        the environment behind the site and the hamiltonian applied to it,
+        with the hamiltonian bond fused into the expanded bond, is appended
+        to site ``i`` along that bond, and zeros are appended to the next
+        site, so that the state itself is unchanged. The compression that
+        follows then picks the best new basis for the bond out of both,
+        which lets single site DMRG grow and adapt its bonds like DMRG2.
+        """
+        j = {'right': i + 1, 'left': i - 1}[direction]
+        if not 0 <= j < self.n:
+            return
+
+        A, B = self._k.site[i], self._k.site[j]
+        k_bond, b_bond = self._k.bond(i, j), self._b.bond(i, j)
+        h_bond = self.ham.bond(i, j)
+
+        # all of the local effective hamiltonian bar the bra site and the
+        #     environment on the side being expanded into
+        P = tensor_contract(*(t for t in self._eff_ham.tensors
+                              if b_bond not in t.inds))
+        P.reindex(dict(zip(self._b.site[i].inds, A.inds)), inplace=True)
+        P.fuse({k_bond: (k_bond, h_bond)}, inplace=True)
+        P.transpose(*A.inds, inplace=True)
+
+        # scale the perturbation relative to the site, so that the mixing
+        #     factor doesn't depend on the energy scale of the hamiltonian
+        alpha = (self.opts['expand_alpha'] * self._expand_alpha_scale *
+                 A.norm() / P.norm())
+        ax, bx = A.inds.index(k_bond), B.inds.index(k_bond)
+
+        if isinstance(A.data, BlockSparseArray):
+            P_data = P.data
+            if P_data.indices[ax].flow != A.data.indices[ax].flow:
+                P_data = P_data.reverse_flow(ax)
+            zeros_ixs = list(B.data.indices)
+            zeros_ixs[bx] = P_data.indices[ax].conj()
+            zeros = BlockSparseArray({}, zeros_ixs, charge=B.data.charge,
+                                     symmetry=B.data.symmetry, dtype=B.dtype)
+            A_data = bs_concatenate((A.data, P_data * alpha), axis=ax)
+            B_data = bs_concatenate((B.data, zeros), axis=bx)
+        else:
+            zeros_shape = list(B.shape)
+            zeros_shape[bx] = P.shape[ax]
+            zeros = np.zeros(zeros_shape, dtype=B.dtype)
+            A_data = np.concatenate((A.data, P.data * alpha), axis=ax)
+            B_data = np.concatenate((B.data, zeros), axis=bx)
+
+        A.modify(data=A_data)
+        B.modify(data=B_data)
+
+    def _eff_eig_tol(self):
+        """The current tolerance for the local eigensolve. If adaptive, this
+        tightens from ``opts['eff_eig_tol']`` down to
+        ``opts['eff_eig_tol_min']`` following the change in energy of the
+        last sweep.
+        """
+        tol = self.opts['eff_eig_tol']
+        adaptive = self.opts['eff_eig_adaptive_tol']
+        if adaptive is None:
+            adaptive = self.opts['eff_eig_bkd'].upper() == 'DAVIDSON'
+
+        if adaptive and len(self.energies) > 1:
+            de = abs(self.energies[-2] - self.energies[-1])
+            tol = min(tol, max(de, self.opts['eff_eig_tol_min']))
+        return tol
+
     def _seigsys(self, A, v0=None):
         """Find single eigenpair, using all the internal settings.
         """
-        return seigsys(
-            A, k=1, which=self.which, v0=v0,
-            backend=self.opts['eff_eig_bkd'],
-            EPSType=self.opts['eff_eig_EPSType'],
-            ncv=self.opts['eff_eig_ncv'],
-            tol=self.opts['eff_eig_tol'],
-            maxiter=self.opts['eff_eig_maxiter'])
+        bkd_opts = {}
+        if self.opts['eff_eig_bkd'].upper() == 'DAVIDSON':
+            if self.opts['eff_eig_precond']:
+                # diagonal (jacobi) preconditioner
+                if hasattr(A, 'diag'):
+                    bkd_opts['precond'] = A.diag()
+                elif isinstance(A, np.ndarray):
+                    bkd_opts['precond'] = np.diag(A)
+        else:
+            bkd_opts['EPSType'] = self.opts['eff_eig_EPSType']
+
+        try:
+            return seigsys(
+                A, k=1, which=self.which, v0=v0,
+                backend=self.opts['eff_eig_bkd'],
+                ncv=self.opts['eff_eig_ncv'],
+                tol=self._eff_eig_tol(),
+                maxiter=self.opts['eff_eig_maxiter'],
+                **bkd_opts)
+        except DavidsonNoConvergence as e:
+            # a loose local solve still lowers the energy, and the sweeps
+            #     carry on refining it
+            return e.eigenvalues, e.eigenvectors
+
+    def _eff_ham_seigsys(self, uix, lix, v0):
+        """Find the groundstate of the current effective hamiltonian, with
+        upper indices ``uix`` and lower indices ``lix``, starting from the
+        array ``v0``, and return it as an array of the same shape, or block
+        structure if block sparse.
+        """
+        block_sparse = isinstance(v0, BlockSparseArray)
+        if block_sparse:
+            # only act on the elements allowed by the symmetry
+            A = BlockSparseTNLinearOperator(self._eff_ham['_HAM'], uix, lix,
+                                            like=v0)
+            size = A.shape[0]
+        else:
+            dims = v0.shape
+            size = prod(dims)
+
+        # choose a rough value at which dense effective ham should not be used
+        dense = self.opts['eff_eig_dense']
+        if dense is None:
+            dense = size < 800
+
+        if block_sparse:
+            if dense:
+                A_op, A = A, A.to_dense()
+            else:
+                A_op = A
+            eff_e, eff_gs = self._seigsys(A, v0=A_op.to_vector(v0))
+            return eff_e[0], A_op.from_vector(eff_gs.A)
+
+        if dense:
+            # contract remaining hamiltonian and get its dense representation
+            eff_ham = (self._eff_ham ^ '_HAM')['_HAM']
+            eff_ham.fuse((('lower', lix), ('upper', uix)), inplace=True)
+            A = eff_ham.data
+        else:
+            A = EffHamLinearOperator(self._eff_ham['_HAM'], udims=dims,
+                                     ldims=dims, upper_inds=uix,
+                                     lower_inds=lix)
+
+        eff_e, eff_gs = self._seigsys(A, v0=v0)
+        return eff_e[0], eff_gs.A.reshape(dims)
 
     def _update_local_state_1site(self, i, direction, **compress_opts):
         """Find the single site effective tensor groundstate of::
@@ -318,30 +894,17 @@ class DMRG:
         """
         uix = self._k.site[i].inds
         lix = self._b.site[i].inds
-        dims = self._k.site[i].shape
 
-        # choose a rough value at which dense effective ham should not be used
-        dense = self.opts['eff_eig_dense']
-        if dense is None:
-            dense = prod(dims) < 800
+        eff_e, eff_gs = self._eff_ham_seigsys(uix, lix, self._k.site[i].data)
 
-        if dense:
-            # contract remaining hamiltonian and get its dense representation
-            eff_ham = (self._eff_ham ^ '_HAM')['_HAM']
-            eff_ham.fuse((('lower', lix), ('upper', uix)), inplace=True)
-            A = eff_ham.data
-        else:
-            A = TNLinearOperator(self._eff_ham['_HAM'], udims=dims, ldims=dims,
-                                 upper_inds=uix, lower_inds=lix)
-
-        eff_e, eff_gs = self._seigsys(A, v0=self._k.site[i].data)
-
-        eff_gs = eff_gs.A
         self._k.site[i].data = eff_gs
         self._b.site[i].data = eff_gs.conj()
 
+        if self.opts['subspace_expansion']:
+            self._expand_after_1site_update(direction, i)
+
         self._compress_after_1site_update(direction, i, **compress_opts)
-        return eff_e[0]
+        return eff_e
 
     def _update_local_state_2site(self, i, direction, **compress_opts):
         """Find the 2-site effective tensor groundstate of::
@@ -359,29 +922,14 @@ class DMRG:
         dims, lix_L, lix_R, lix, uix_L, uix_R, uix, l_bond_ind, u_bond_ind = \
             parse_2site_inds_dims(self._k, self._b, i)
 
-        # choose a rough value at which dense effective ham should not be used
-        dense = self.opts['eff_eig_dense']
-        if dense is None:
-            dense = prod(dims) < 800
-
-        # form the local operator to find ground-state of
-        if dense:
-            # contract remaining hamiltonian and get its dense representation
-            eff_ham = (self._eff_ham ^ '_HAM')['_HAM']
-            eff_ham.fuse((('lower', lix), ('upper', uix)), inplace=True)
-            A = eff_ham.data
-        else:
-            A = TNLinearOperator(self._eff_ham['_HAM'], udims=dims, ldims=dims,
-                                 upper_inds=uix, lower_inds=lix)
-
         # find the 2-site local groundstate using previous as initial guess
         v0 = self._k.site[i].contract(self._k.site[i + 1],
                                       output_inds=uix).data
 
-        eff_e, eff_gs = self._seigsys(A, v0=v0)
+        eff_e, eff_gs = self._eff_ham_seigsys(uix, lix, v0)
 
         # split the two site local groundstate
-        T_AB = Tensor(eff_gs.A.reshape(dims), uix)
+        T_AB = Tensor(eff_gs, uix)
         L, R = T_AB.split(left_inds=uix_L, get='arrays', absorb=direction,
                           **compress_opts)
 
@@ -390,7 +938,7 @@ class DMRG:
         self._k.site[i + 1].modify(data=R, inds=(u_bond_ind, *uix_R))
         self._b.site[i + 1].modify(data=R.conj(), inds=(l_bond_ind, *lix_R))
 
-        return eff_e[0]
+        return eff_e
 
     def _update_local_state(self, i, **update_opts):
         return {
@@ -441,18 +989,21 @@ class DMRG:
             'L': ('left', 'right', reversed(range(0, self.n - self.bsz + 1))),
         }[direction]
 
-        eff_args = {'n': self.n, 'start': eff_start, 'bsz': self.bsz}
-        eff_hams = MovingEnvironment(self.TN_energy, **eff_args)
+        eff_hams = self._get_env('energy', self.TN_energy, eff_start)
 
         if verbose:
             sweep = progbar(sweep, ncols=80, total=self.n - self.bsz + 1)
 
+        errors = np.zeros(self.n - 1)
         for i in sweep:
             eff_hams.move_to(i)
             self._eff_ham = eff_hams()
-            en = self._update_local_state(
-                i, direction=direction, **update_opts)
+            bond, opts = self._bond_update_opts(i, direction, update_opts)
+            en = self._update_local_state(i, direction=direction, **opts)
+            if 'discarded_weight' in opts['info']:
+                errors[bond] = opts['info']['discarded_weight']
 
+        self.truncation_errors.append(errors)
         return en
 
     def sweep_right(self, canonize=True, verbose=False, **update_opts):
@@ -463,6 +1014,37 @@ class DMRG:
         return self.sweep(direction='L', canonize=canonize,
                           verbose=verbose, **update_opts)
 
+    # ------------------------ truncation tracking -------------------------- #
+
+    def _bond_update_opts(self, i, direction, update_opts):
+        """Find the bond compressed when updating site(s) ``i`` in
+        ``direction``, or ``None`` if there is none, i.e. at the end of a
+        single site sweep, and the options to update with, including its
+        maximum dimension and a dict to record the truncation in.
+        """
+        bond = i - 1 if (self.bsz == 1 and direction == 'left') else i
+        if not 0 <= bond < self.n - 1:
+            bond = None
+
+        opts = {**update_opts, 'info': {}}
+        if (bond is not None) and (self.max_bonds is not None):
+            max_bond = opts.get('max_bond', None)
+            max_bond = self.max_bonds[bond] if max_bond is None else \
+                min(max_bond, self.max_bonds[bond])
+            opts['max_bond'] = int(max_bond)
+
+        return bond, opts
+
+    def _adapt_max_bonds(self, max_bond, cutoff):
+        """Grow the maximum dimension of each bond, up to ``max_bond``, whose
+        truncation error in the last sweep exceeded ``cutoff``, i.e. where it
+        was its maximum dimension rather than the cutoff that was limiting.
+        """
+        grow = self.truncation_errors[-1] > cutoff
+        new = np.ceil(self.max_bonds * self.opts['adaptive_bond_dim_growth'])
+        self.max_bonds = np.where(grow, np.minimum(new, max_bond),
+                                  self.max_bonds).astype(int)
+
     # ----------------- overloadable 'plugin' style methods ----------------- #
 
     def _print_pre_sweep(self, i, LR, bd, ctf, verbose=0):
@@ -500,7 +1082,9 @@ class DMRG:
               cutoffs=None,
               sweep_sequence=None,
               max_sweeps=8,
-              verbose=0):
+              verbose=0,
+              checkpoint=None,
+              checkpoint_every=1):
         """Solve the system with a sequence of sweeps, up to a certain
         absolute tolerance in the energy or maximum number of sweeps.
 
@@ -517,6 +1101,20 @@ class DMRG:
             The sequence will be repeated until ``max_sweeps`` is reached.
         max_sweeps : int, optional
             The maximum number of sweeps to perform.
+        checkpoint : str, optional
+            If given, a file to periodically save the state, sweep position
+            and schedules to, such that the solve can be continued with
+            ``DMRG.load_checkpoint(checkpoint).resume()`` if interrupted.
+            Only the first checkpoint writes the whole state, subsequent
+            ones append just the sites changed since.
+        checkpoint_every : int, optional
+            How many sweeps to perform between checkpoints. The state is
+            always checkpointed once converged or ``max_sweeps`` is reached.
+
+        Returns
+        -------
+        converged : bool
+            Whether the energy converged to ``tol``.
         """
         verbose = {False: 0, True: 1}.get(verbose, verbose)
 
@@ -528,22 +1126,65 @@ class DMRG:
         if sweep_sequence is None:
             sweep_sequence = self.opts['default_sweep_sequence']
 
-        RLs = itertools.cycle(sweep_sequence)
-        previous_LR = '0'
+        self._solve_opts = {
+            'tol': tol,
+            'sweep_sequence': sweep_sequence,
+            'max_sweeps': max_sweeps,
+            'verbose': verbose,
+            'checkpoint': checkpoint,
+            'checkpoint_every': checkpoint_every,
+        }
+        self._solve_progress = {
+            'sweep': 0,
+            'previous_LR': '0',
+            'converged': False,
+        }
+        self._checkpointer = (None if checkpoint is None else
+                              _Checkpointer(checkpoint))
 
-        for i in range(max_sweeps):
+        return self._solve()
+
+    def _solve(self):
+        """Perform the sweeps of the current solve, starting from its
+        recorded progress.
+        """
+        opts = self._solve_opts
+        tol, verbose = opts['tol'], opts['verbose']
+        sweep_sequence, max_sweeps = opts['sweep_sequence'], opts['max_sweeps']
+        every = opts['checkpoint_every']
+        progress = self._solve_progress
+        converged = progress['converged']
+        previous_LR = progress['previous_LR']
+
+        for i in range(progress['sweep'], max_sweeps):
             # Get the next direction, bond dimension and cutoff
-            LR, bd, ctf = next(RLs), next(self._bond_dims), next(self._cutoffs)
+            LR = sweep_sequence[i % len(sweep_sequence)]
+            bd, ctf = next(self._bond_dims), next(self._cutoffs)
             if LR == 'X':
-                import random
                 LR = random.choice(('R', 'L'))
             self._print_pre_sweep(i, LR, bd, ctf, verbose=verbose)
 
+            # if adapting, each bond has its own maximum dimension as well
+            adaptive = self.opts.get('adaptive_bond_dims', False)
+            if not adaptive:
+                self.max_bonds = None
+            elif self.max_bonds is None:
+                self.max_bonds = np.full(
+                    self.n - 1, self.opts['adaptive_bond_dim_start'])
+
             # if last sweep was in opposite direction no need to canonize
             canonize = False if LR + previous_LR in {'LR', 'RL'} else True
-            # need to manually expand bond dimension for DMRG1
-            if self.bsz == 1:
-                self._k.expand_bond_dimension(bd, bra=self._b)
+            # need to manually expand bond dimension for DMRG1, unless the
+            #     bonds are grown by subspace expansion. If adapting, expand
+            #     beyond the maximum so the truncation error is informative
+            expand = self.opts.get('subspace_expansion', False)
+            if self.bsz == 1 and not expand:
+                new_bd = bd
+                if adaptive:
+                    growth = self.opts['adaptive_bond_dim_growth']
+                    new_bd = min(bd, int(np.ceil(growth *
+                                                 max(self.max_bonds))))
+                self._k.expand_bond_dimension(new_bd, bra=self._b)
 
             # inject all options and defaults
             sweep_opts = {
@@ -557,26 +1198,155 @@ class DMRG:
 
             # perform sweep, computations and convergence test
             self.energies += [self.sweep(direction=LR, **sweep_opts)]
+
+            # once the bonds are saturated the perturbation can only displace
+            #     kept states, if this costs energy reduce it so as to settle
+            if expand and self._k.max_bond() >= bd:
+                de = self.energies[-1] - self.energies[-2]
+                if (de > 0) if self.which == 'SA' else (de < 0):
+                    self._expand_alpha_scale /= 2
+
+            if adaptive:
+                self._adapt_max_bonds(bd, ctf)
+
             self._compute_post_sweep()
             converged = self._check_convergence(tol)
             self._print_post_sweep(converged, verbose=verbose)
 
+            previous_LR = LR
+            progress.update(sweep=i + 1, previous_LR=LR, converged=converged)
+            if self._checkpointer is not None and (
+                    converged or (i + 1) % every == 0 or i + 1 == max_sweeps):
+                self._write_checkpoint()
+
             if converged:
                 break
-            previous_LR = LR
 
         return converged
 
+    # --------------------------- checkpointing ----------------------------- #
+
+    # attributes, beyond the state, that change while solving
+    _checkpoint_attrs = ('energies', 'opts', '_bond_dims', '_cutoffs',
+                         '_expand_alpha_scale', 'truncation_errors',
+                         'max_bonds')
+
+    def _checkpoint_init_args(self):
+        """Arguments, beyond ``ham`` and ``p0``, to recreate this solver with.
+        """
+        return {'bond_dims': self._bond_dims.values,
+                'cutoffs': self._cutoffs.values,
+                'bsz': self.bsz,
+                'which': self.which}
+
+    def _write_checkpoint(self):
+        def static():
+            return {'cls': self.__class__,
+                    'ham': self.ham,
+                    'init_args': self._checkpoint_init_args()}
+
+        header = {
+            'attrs': {a: getattr(self, a) for a in self._checkpoint_attrs},
+            'solve_opts': self._solve_opts,
+            'progress': self._solve_progress,
+            'bonds': self._bond_names(),
+        }
+        rng_state = pickle.dumps((np.random.get_state(), random.getstate()),
+                                 protocol=pickle.HIGHEST_PROTOCOL)
+        self._checkpointer.write(static, header, self.state, rng_state)
+
+    def _bond_names(self):
+        """The names of the ket and bra bonds. These decide the order that
+        tensors are selected and contracted in, and thus the rounding errors,
+        which DMRGX in particular can amplify, so are restored on resuming.
+        """
+        return tuple((self._k.bond(i, i + 1), self._b.bond(i, i + 1))
+                     for i in range(self.n - 1))
+
+    def _rename_bonds(self, bond_map):
+        self.TN_energy.reindex(bond_map, inplace=True)
+
+    @classmethod
+    def load_checkpoint(cls, filename):
+        """Load a solver from a checkpoint written during :meth:`solve`, e.g.
+        after the process running it was killed. The solve can then be
+        continued with :meth:`resume`.
+
+        Parameters
+        ----------
+        filename : str
+            The checkpoint file, as given to ``solve(checkpoint=...)``.
+
+        Returns
+        -------
+        DMRG
+            The solver, of whichever class wrote the checkpoint, at the point
+            of its last checkpoint.
+        """
+        static, header, state, rng_state = _read_checkpoint(filename)
+
+        if not issubclass(static['cls'], cls):
+            raise TypeError(f"{filename} holds a checkpoint of a "
+                            f"{static['cls'].__name__}, not a {cls.__name__}.")
+
+        params = inspect.signature(static['cls']).parameters
+        init_args = {k: v for k, v in static['init_args'].items()
+                     if k in params}
+        self = static['cls'](static['ham'], p0=state, **init_args)
+
+        for attr, value in header['attrs'].items():
+            setattr(self, attr, value)
+        self._solve_opts = header['solve_opts']
+        self._solve_progress = header['progress']
+        self._rng_state = rng_state
+
+        # rename all the bonds at once, as some bra bonds currently have the
+        #     names that ket bonds need
+        bond_map = {}
+        for i, (k_bond, b_bond) in enumerate(header['bonds']):
+            bond_map[self._k.bond(i, i + 1)] = k_bond
+            bond_map[self._b.bond(i, i + 1)] = b_bond
+        self._rename_bonds(bond_map)
+
+        # the first checkpoint written will compact the existing file
+        self._checkpointer = _Checkpointer(filename)
+        return self
+
+    def resume(self):
+        """Continue the solve loaded with :meth:`load_checkpoint`, with the
+        same options, and continuing to checkpoint to the same file.
+
+        Returns
+        -------
+        converged : bool
+            Whether the energy converged to the tolerance of the solve.
+        """
+        if getattr(self, '_solve_progress', None) is None:
+            raise ValueError("There is no solve to resume.")
+
+        # continue with the same random numbers as the interrupted solve
+        rng_state = getattr(self, '_rng_state', None)
+        if rng_state is not None:
+            np_state, py_state = pickle.loads(rng_state)
+            np.random.set_state(np_state)
+            random.setstate(py_state)
+            self._rng_state = None
+
+        return self._solve()
+
 
 class DMRG1(DMRG):
-    """Simple alias of one site ``DMRG``.
+    """Simple alias of one site ``DMRG``, ``subspace_expansion`` sets
+    ``opts['subspace_expansion']``, to grow the bonds adaptively during each
+    sweep rather than padding them beforehand.
     """
     __doc__ += DMRG.__doc__
 
-    def __init__(self, ham, which='SA',
-                 bond_dims=(8, 16, 32, 64), cutoffs=1e-8):
+    def __init__(self, ham, which='SA', bond_dims=(8, 16, 32, 64),
+                 cutoffs=1e-8, p0=None, subspace_expansion=False):
         super().__init__(ham, bond_dims=bond_dims, cutoffs=cutoffs,
-                         which=which, bsz=1)
+                         which=which, bsz=1, p0=p0)
+        self.opts['subspace_expansion'] = subspace_expansion
 
 
 class DMRG2(DMRG):
@@ -585,9 +1355,405 @@ class DMRG2(DMRG):
     __doc__ += DMRG.__doc__
 
     def __init__(self, ham, which='SA',
-                 bond_dims=(10, 20, 50, 100), cutoffs=1e-8):
+                 bond_dims=(10, 20, 50, 100), cutoffs=1e-8, p0=None):
         super().__init__(ham, bond_dims=bond_dims, cutoffs=cutoffs,
-                         which=which, bsz=2)
+                         which=which, bsz=2, p0=p0)
+
+
+# --------------------------------------------------------------------------- #
+#                            Real-space parallel DMRG                         #
+# --------------------------------------------------------------------------- #
+
+def _inv_svals(s, cutoff):
+    """Invert the singular values ``s``, zeroing any below ``cutoff``.
+    """
+    inv = np.zeros_like(s)
+    big = s > cutoff
+    inv[big] = 1 / s[big]
+    return inv
+
+
+def _scale_bond(t, ind, x, inplace=False):
+    """Multiply the tensor ``t`` by the vector ``x`` along index ``ind``.
+    """
+    t = t if inplace else t.copy()
+    shape = tuple(-1 if ix == ind else 1 for ix in t.inds)
+    t.modify(data=t.data * x.reshape(shape))
+    return t
+
+
+class _DMRGSegment(DMRG):
+    """Two site DMRG of a single segment of a chain, with the rest of the
+    system held fixed in the boundary environment tensors ``left`` and
+    ``right``, which are attached to its first and last sites respectively::
+
+        /o-o-o-o-o\\
+        L | | | | R
+        |-H-H-H-H-|
+        L | | | | R
+        \\o-o-o-o-o/
+
+    Only what is needed to sweep is kept, with the sites relabelled from
+    zero, so that the segment can be cheaply sent to a worker process.
+    """
+
+    def __init__(self, kets, bras, hams, left, right, site_tag_id,
+                 which, opts, energies):
+        # n.b. doesn't call ``DMRG.__init__``, there is no full MPO or MPS
+        self.n = len(kets)
+        self.bsz = 2
+        self.which = which
+        self.opts = opts
+        self.energies = energies
+        self.truncation_errors = []
+        self.max_bonds = None
+        self._envs = {}
+
+        def local_tn(ts, *tags):
+            tn = TensorNetwork1D(
+                [Tensor(t.data, t.inds, tags={site_tag_id.format(j), *tags})
+                 for j, t in ts],
+                structure=site_tag_id, nsites=self.n, check_collisions=False)
+            tn._site_tag_id = site_tag_id
+            return tn
+
+        envs = [(j, t) for j, t in ((0, left), (self.n - 1, right))
+                if t is not None]
+        self._k = local_tn(enumerate(kets))
+        self._b = local_tn(enumerate(bras))
+        ham = local_tn(itertools.chain(enumerate(hams), envs), '_HAM')
+        self.TN_energy = self._b | ham | self._k
+
+    def outer_env(self, direction):
+        """Contract everything apart from the last site, if the last sweep
+        was in ``direction='R'``, or the first site, if ``direction='L'``.
+        """
+        env = self._envs['energy']
+        if direction == 'R':
+            i = self.n - 2
+            return env._contract_site(env._left[i], i, i - 1)
+        return env._contract_site(env._right[0], 1, 2)
+
+
+def _sweep_dmrg_segment(segment, direction, update_opts):
+    """Sweep ``segment`` in ``direction``, returning the final local energy,
+    the environment of its final site, its new ket tensors and the truncation
+    error at each of its bonds.
+    """
+    en = segment.sweep(direction, canonize=True, **update_opts)
+    kets = [segment._k.site[i] for i in range(segment.n)]
+    return (en, segment.outer_env(direction), kets,
+            segment.truncation_errors[-1])
+
+
+def _optimize_dmrg_boundary(segment, update_opts):
+    """Optimize the two site ``segment`` spanning a boundary, and split it as
+    ``U s`` and ``s V``. Return the local energy, these ket tensors, the
+    singular values ``s``, the new left environment of the right site,
+    formed with ``U``, and right environment of the left site, with ``V``,
+    and the truncation error of the split.
+    """
+    en = segment.sweep('R', canonize=False, **update_opts)
+
+    k, b = segment._k, segment._b
+    kbond, bbond = k.bond(0, 1), b.bond(0, 1)
+    sv = k.site[1].copy()
+    ax = sv.inds.index(kbond)
+    s = np.linalg.norm(np.moveaxis(sv.data, ax, 0).reshape(sv.shape[ax], -1),
+                       axis=1)
+
+    left = tensor_contract(*segment.TN_energy.select_tensors(k.site_tag(0)))
+
+    inv = _inv_svals(s, segment.opts['stitch_inv_cutoff'])
+    _scale_bond(k.site[1], kbond, inv, inplace=True)
+    _scale_bond(b.site[1], bbond, inv, inplace=True)
+    right = tensor_contract(*segment.TN_energy.select_tensors(k.site_tag(1)))
+
+    return (en, _scale_bond(k.site[0], kbond, s), sv, s, left, right,
+            segment.truncation_errors[-1][0])
+
+
+class DMRGParallel(DMRG):
+    """Real-space parallel two site DMRG, after Stoudenmire & White [1]. The
+    chain is split into contiguous segments, which are swept concurrently,
+    each with the rest of the system held fixed in its boundary environments.
+    Neighbouring segments are stitched together at the bond where they meet
+    using the inverse of its singular values, ``S``::
+
+        psi = psi_0 S_0^-1 psi_1 S_1^-1 psi_2 ...
+
+           psi_0      S_0^-1    psi_1     S_1^-1   psi_2
+        o-o-o-o-o-o----s----o-o-o-o-o-o----s----o-o-o-o-o
+        | | | | | |         | | | | | |         | | | | |
+
+    where each segment wavefunction ``psi_j`` contains the singular values of
+    both its outer bonds. Each sweep consists of two halves, in the first the
+    even segments sweep right and the odd segments left, after which the
+    bonds where they now meet are optimized, in the second vice versa.
+
+    Parameters
+    ----------
+    ham : MatrixProductOperator
+        The hamiltonian in MPO form, with dense tensors.
+    bond_dims : int or sequence of ints.
+        The maximum bond-dimension(s) when splitting the local groundstates,
+        as for ``DMRG``.
+    cutoffs : dict-like
+        The cutoff threshold(s) to use when compressing, as for ``DMRG``.
+    which : {'SA', 'LA'}, optional
+        Whether to search for smallest or largest real part eigenvectors.
+    p0 : MatrixProductState, optional
+        The initial state, defaults to a random MPS.
+    num_segments : int, optional
+        The number of segments to split the chain into, each needs at least
+        two sites. Defaults to ``num_workers``, or 2.
+    num_workers : int, optional
+        The number of worker processes to sweep the segments with. If 1, run
+        serially in this process instead. Defaults to ``num_segments``.
+    executor : executor, optional
+        Instead of a process pool, use this ``concurrent.futures`` style
+        executor, or any object with a ``map`` method, e.g. a MPI pool.
+
+    Attributes
+    ----------
+    energy : float
+        The current most optimized energy.
+    state : MatrixProductState
+        The current, optimized and stitched, state.
+    energies : list of float
+        The list of energies after each sweep.
+    segments : tuple of range
+        The sites of each segment.
+    opts : dict
+        Advanced options as for ``DMRG``, but with a much tighter default
+        ``opts['eff_eig_tol']``, since the stitching amplifies any error in
+        the local groundstates. Additionally ``opts['stitch_inv_cutoff']`` is
+        the value below which singular values are discarded rather than
+        inverted when stitching.
+
+    References
+    ----------
+    .. [1] E. M. Stoudenmire and S. R. White, "Real-space parallel density
+       matrix renormalization group", Phys. Rev. B 87, 155137 (2013).
+    """
+
+    def __init__(self, ham, bond_dims=(10, 20, 50, 100), cutoffs=1e-8,
+                 which='SA', p0=None, num_segments=None, num_workers=None,
+                 executor=None):
+        if isinstance(ham.site[0].data, BlockSparseArray):
+            raise ValueError("``DMRGParallel`` does not support block sparse "
+                             "hamiltonians.")
+
+        super().__init__(ham, bond_dims=bond_dims, cutoffs=cutoffs,
+                         which=which, bsz=2, p0=p0)
+
+        if num_segments is None:
+            num_segments = 2 if num_workers is None else num_workers
+        if num_workers is None:
+            num_workers = num_segments
+        if not (2 <= num_segments <= self.n // 2):
+            raise ValueError(f"Can't split {self.n} sites into {num_segments}"
+                             " segments of at least two sites each.")
+
+        self.segments = tuple(
+            range(sites[0], sites[-1] + 1)
+            for sites in np.array_split(np.arange(self.n), num_segments))
+
+        if executor is not None:
+            self._executor = executor
+        elif num_workers > 1:
+            self._executor = get_process_pool(num_workers)
+        else:
+            self._executor = None
+        self._num_workers = num_workers
+
+        # the stitching amplifies any error in the local groundstates
+        self.opts['eff_eig_tol'] = 1e-10
+        self.opts['stitch_inv_cutoff'] = 1e-6
+        self._setup_segments()
+
+    def _map(self, fn, *args):
+        if self._executor is None:
+            return list(map(fn, *args))
+        return list(self._executor.map(fn, *args))
+
+    def _set_site(self, i, t):
+        """Set the data of site ``i`` of the ket, and bra, from ``t``.
+        """
+        data = t.transpose(*self._k.site[i].inds).data
+        self._k.site[i].modify(data=data)
+        self._b.site[i].modify(data=data.conj())
+
+    def _checkpoint_init_args(self):
+        return {**super()._checkpoint_init_args(),
+                'num_segments': len(self.segments),
+                'num_workers': self._num_workers}
+
+    def _rename_bonds(self, bond_map):
+        super()._rename_bonds(bond_map)
+        for envs in (self._left_envs, self._right_envs):
+            for j, env in envs.items():
+                if env is not None:
+                    envs[j] = env.reindex(bond_map)
+
+    def _setup_segments(self):
+        """Sweep through the initial state, bringing each segment into
+        mixed canonical form, and computing the singular values of each
+        boundary bond, as well as the boundary environments of each segment.
+        """
+        k, b = self._k, self._b
+        k.right_canonize(bra=b)
+        nfact = k.site[0].norm()
+        self._set_site(0, k.site[0] / nfact)
+
+        # the right environments of the right canonical form
+        renvs = MovingEnvironment(self.TN_energy, self.n, start='left')
+        boundaries = {sites[-1]: j for j, sites in enumerate(self.segments)}
+
+        self._lambdas = {}
+        self._left_envs = {0: None}
+        self._right_envs = {len(self.segments) - 1: None}
+
+        left = None
+        for i in range(self.n - 1):
+            if i not in boundaries:
+                k.left_canonize_site(i, bra=b)
+                left = tensor_contract(
+                    *filter(None, [left]),
+                    *self.TN_energy.select_tensors(k.site_tag(i)))
+                continue
+
+            j = boundaries[i]
+            kbond, bbond = k.bond(i, i + 1), b.bond(i, i + 1)
+            ki = k.site[i]
+            U, SV = ki.split([ix for ix in ki.inds if ix != kbond],
+                             method='svd', cutoff=None, absorb='right',
+                             get='tensors')
+            new_bond, = (ix for ix in SV.inds if ix != kbond)
+            SV.transpose(new_bond, kbond, inplace=True)
+            s = np.linalg.norm(SV.data, axis=1)
+            inv = _inv_svals(s, self.opts['stitch_inv_cutoff'])
+            V = SV.data * inv[:, None]
+
+            # the left segment is left canonical and finishes with 'U s'
+            self._set_site(i, U.reindex({new_bond: kbond}))
+            left = tensor_contract(
+                *filter(None, [left]),
+                *self.TN_energy.select_tensors(k.site_tag(i)))
+            self._set_site(i, _scale_bond(U, new_bond, s)
+                           .reindex({new_bond: kbond}))
+
+            # the right segment starts with 's V'
+            self._set_site(i + 1, (SV @ k.site[i + 1])
+                           .reindex({new_bond: kbond}))
+
+            # rotate the right environment into the schmidt basis with 'V'
+            new_bbond = rand_uuid()
+            right = tensor_contract(renvs._right[i],
+                                    Tensor(V, (new_bond, kbond)),
+                                    Tensor(V.conj(), (new_bbond, bbond)))
+
+            self._lambdas[j] = s
+            self._left_envs[j + 1] = left
+            self._right_envs[j] = right.reindex({new_bond: kbond,
+                                                 new_bbond: bbond})
+
+    def _segment(self, kets, bras, hams, left, right):
+        return _DMRGSegment(kets, bras, hams, left, right,
+                            site_tag_id=self._k.site_tag_id,
+                            which=self.which, opts=dict(self.opts),
+                            energies=self.energies[-2:])
+
+    def _sweep_segments(self, parity, update_opts, errors):
+        """Sweep the even segments right and the odd segments left, if
+        ``parity == 0``, else vice versa, then optimize and stitch the
+        boundaries where they now meet. The largest truncation error at each
+        bond is accumulated into ``errors``.
+        """
+        k, b = self._k, self._b
+        nseg = len(self.segments)
+
+        segments = [
+            self._segment([k.site[i] for i in sites],
+                          [b.site[i] for i in sites],
+                          [self.ham.site[i] for i in sites],
+                          self._left_envs[j], self._right_envs[j])
+            for j, sites in enumerate(self.segments)
+        ]
+        directions = ['R' if j % 2 == parity else 'L' for j in range(nseg)]
+
+        outer_envs = []
+        results = self._map(_sweep_dmrg_segment, segments, directions,
+                            itertools.repeat(update_opts))
+        for sites, (_, outer_env, kets, errs) in zip(self.segments, results):
+            for i, t in zip(sites, kets):
+                self._set_site(i, t)
+            outer_envs.append(outer_env)
+            bonds = slice(sites[0], sites[-1])
+            errors[bonds] = np.maximum(errors[bonds], errs)
+
+        # stitch the two sites either side of each meeting boundary, with the
+        #     inverse singular values absorbed into the left one
+        boundaries = range(parity, nseg - 1, 2)
+        segments = []
+        for j in boundaries:
+            il, ir = self.segments[j][-1], self.segments[j + 1][0]
+            inv = _inv_svals(self._lambdas[j], self.opts['stitch_inv_cutoff'])
+            segments.append(self._segment(
+                [_scale_bond(k.site[il], k.bond(il, ir), inv), k.site[ir]],
+                [_scale_bond(b.site[il], b.bond(il, ir), inv), b.site[ir]],
+                [self.ham.site[il], self.ham.site[ir]],
+                outer_envs[j], outer_envs[j + 1]))
+
+        results = self._map(_optimize_dmrg_boundary, segments,
+                            itertools.repeat(update_opts))
+        for j, (_, kl, kr, s, left, right, err) in zip(boundaries, results):
+            il = self.segments[j][-1]
+            errors[il] = max(errors[il], err)
+            self._set_site(il, kl)
+            self._set_site(self.segments[j + 1][0], kr)
+            self._lambdas[j] = s
+            self._left_envs[j + 1] = left
+            self._right_envs[j] = right
+
+    def _stitch(self):
+        """Get the ket and bra of the full state, by inserting the inverse
+        singular values between each pair of segments.
+        """
+        k, b = self._k.copy(), self._b.copy()
+        for j, s in self._lambdas.items():
+            il, ir = self.segments[j][-1], self.segments[j + 1][0]
+            inv = _inv_svals(s, self.opts['stitch_inv_cutoff'])
+            _scale_bond(k.site[ir], k.bond(il, ir), inv, inplace=True)
+            _scale_bond(b.site[ir], b.bond(il, ir), inv, inplace=True)
+        return k, b
+
+    @property
+    def state(self):
+        k, b = self._stitch()
+        nfact = (b.reindex_sites(k.site_ind_id) | k) ^ ...
+        k.site[0].modify(data=k.site[0].data / nfact**0.5)
+        return k
+
+    def sweep(self, direction=None, canonize=None, verbose=False,
+              **update_opts):
+        """Perform a single parallel sweep, i.e. both halves, and return the
+        energy of the stitched state. The ``direction`` and ``canonize``
+        arguments are ignored, since each segment is canonized and swept in
+        both directions.
+        """
+        if self.opts['adaptive_bond_dims']:
+            raise ValueError("``DMRGParallel`` does not support adaptive "
+                             "bond dimensions.")
+
+        errors = np.zeros(self.n - 1)
+        for parity in (0, 1):
+            self._sweep_segments(parity, update_opts, errors)
+        self.truncation_errors.append(errors)
+
+        k, b = self._stitch()
+        nfact = (b.reindex_sites(k.site_ind_id) | k) ^ ...
+        return ((b | self.ham | k) ^ ...) / nfact
 
 
 # --------------------------------------------------------------------------- #
@@ -647,6 +1813,9 @@ class DMRGX(DMRG):
             'default_sweep_sequence': 'RRLL',
         }
 
+    _checkpoint_attrs = DMRG._checkpoint_attrs + ('variances',
+                                                  '_target_energy')
+
     @property
     def variance(self):
         return self.variances[-1]
@@ -815,14 +1984,16 @@ class DMRGX(DMRG):
             'L': ('left', 'right', reversed(range(0, self.n - self.bsz + 1))),
         }[direction]
 
-        eff_args = {'n': self.n, 'start': eff_start, 'bsz': self.bsz}
-        eff_hams = MovingEnvironment(self.TN_energy, **eff_args)
-        eff_ham2s = MovingEnvironment(self.TN_energy2, **eff_args)
-        eff_ovlps = MovingEnvironment(TN_overlap, **eff_args)
+        eff_hams = self._get_env('energy', self.TN_energy, eff_start)
+        eff_ham2s = self._get_env('energy2', self.TN_energy2, eff_start)
+        # the previous state changes every sweep -> nothing to reuse
+        eff_ovlps = MovingEnvironment(TN_overlap, n=self.n,
+                                      start=eff_start, bsz=self.bsz)
 
         if verbose:
             sweep = progbar(sweep, ncols=80, total=self.n - self.bsz + 1)
 
+        errors = np.zeros(self.n - 1)
         for i in sweep:
             eff_hams.move_to(i)
             eff_ham2s.move_to(i)
@@ -830,13 +2001,19 @@ class DMRGX(DMRG):
             self._eff_ham = eff_hams()
             self._eff_ovlp = eff_ovlps()
             self._eff_ham2 = eff_ham2s()
-            en = self._update_local_state_dmrgx(
-                i, direction=direction, **update_opts)
+            bond, opts = self._bond_update_opts(i, direction, update_opts)
+            en = self._update_local_state_dmrgx(i, direction=direction,
+                                                **opts)
+            if 'discarded_weight' in opts['info']:
+                errors[bond] = opts['info']['discarded_weight']
 
+        self.truncation_errors.append(errors)
         return en
 
     def _compute_post_sweep(self):
-        en_var = (self.TN_energy2 ^ ...) - self.energies[-1]**2
+        # only the boundaries of the last updated sites need contracting
+        en_var = (self._get_env('energy2', self.TN_energy2)() ^ ...)
+        en_var -= self.energies[-1]**2
         self.variances.append(en_var)
 
     def _print_post_sweep(self, converged, verbose=0):
@@ -0,0 +1,986 @@
+"""Block sparse arrays for tensors with an abelian (U(1) or Z2) symmetry.
+
+Each dimension of a :class:`BlockSparseArray` is a :class:`BlockIndex`,
+whose basis elements are labelled with charges (quantum numbers), and which
+has a direction, its 'flow'. Only the blocks of charges ``(q_1, q_2, ...)``
+satisfying the conservation rule::
+
+    flow_1 * q_1 + flow_2 * q_2 + ... == charge
+
+are stored, with ``charge`` the total charge of the array (usually zero).
+Contracted indices must have opposite flows, so that e.g. the conjugate of
+an array, which flips all flows, can be contracted with the original.
+"""
+import functools
+import itertools
+import operator
+
+import numpy as np
+import scipy.sparse.linalg as spla
+
+from ..accel import prod
+
+
+# --------------------------------------------------------------------------- #
+#                              Charges & indices                              #
+# --------------------------------------------------------------------------- #
+
+_SYMMETRIES = ('U1', 'Z2')
+
+
+def _check_symmetry(symmetry):
+    if symmetry not in _SYMMETRIES:
+        raise ValueError("``symmetry`` should be one of {}, got {}."
+                         .format(_SYMMETRIES, symmetry))
+
+
+def _norm_charge(q, symmetry):
+    """Bring charge ``q`` into canonical form for ``symmetry``.
+    """
+    return int(q) % 2 if symmetry == 'Z2' else int(q)
+
+
+def fuse_charges(charges, flows, symmetry='U1'):
+    """The total charge of a set of ``charges`` with directions ``flows``.
+    """
+    return _norm_charge(sum(f * q for f, q in zip(flows, charges)), symmetry)
+
+
+class BlockIndex(object):
+    """A dimension of a block sparse array, whose basis elements are
+    labelled by charges.
+
+    Parameters
+    ----------
+    charges : sequence of int
+        The charge of each basis element, in dense order, e.g. ``(1, -1)``
+        for the magnetization of a spin-1/2.
+    flow : {1, -1}, optional
+        The direction of the index. Contracted indices must have opposite
+        flows.
+    """
+
+    __slots__ = ('charges', 'flow', '_sectors', '_positions')
+
+    def __init__(self, charges, flow=1):
+        if flow not in (1, -1):
+            raise ValueError("``flow`` should be 1 or -1, got {}."
+                             .format(flow))
+
+        self.charges = tuple(int(q) for q in charges)
+        self.flow = flow
+
+        positions = {}
+        for n, q in enumerate(self.charges):
+            positions.setdefault(q, []).append(n)
+        self._positions = {q: np.array(positions[q])
+                           for q in sorted(positions)}
+        self._sectors = {q: len(p) for q, p in self._positions.items()}
+
+    @classmethod
+    def from_sectors(cls, sectors, flow=1):
+        """Create an index from a mapping of ``{charge: dimension}``, with
+        the basis elements grouped by charge.
+        """
+        return cls(itertools.chain.from_iterable(
+            itertools.repeat(q, d) for q, d in sorted(sectors.items())), flow)
+
+    @property
+    def sectors(self):
+        """Ordered mapping of each charge to its dimension.
+        """
+        return self._sectors
+
+    @property
+    def size(self):
+        return len(self.charges)
+
+    def sector_dim(self, q):
+        return self._sectors.get(q, 0)
+
+    def positions(self, q):
+        """The dense positions of the basis elements with charge ``q``.
+        """
+        return self._positions[q]
+
+    def conj(self):
+        """The same index with the opposite flow.
+        """
+        return BlockIndex(self.charges, -self.flow)
+
+    def __eq__(self, other):
+        return (isinstance(other, BlockIndex) and
+                self.flow == other.flow and self.charges == other.charges)
+
+    def __hash__(self):
+        return hash((self.charges, self.flow))
+
+    def __repr__(self):
+        return "BlockIndex(sectors={}, flow={})".format(
+            dict(self.sectors), self.flow)
+
+
+@functools.lru_cache(2**10)
+def block_layout(indices, charge=0, symmetry='U1'):
+    """All the blocks allowed by the symmetry for ``indices`` and total
+    ``charge``, as a tuple of ``(key, shape, offset)``, along with the total
+    number of elements, for e.g. converting to and from flat vectors.
+    """
+    layout = []
+    offset = 0
+
+    if not indices:
+        return (((), (), 0),), 1
+
+    *first, last = indices
+    for key in itertools.product(*(ix.sectors for ix in first)):
+        # the charge of the last index is fixed by the conservation rule
+        q = fuse_charges(key, [ix.flow for ix in first], symmetry)
+        q = _norm_charge(last.flow * (charge - q), symmetry)
+        if q not in last.sectors:
+            continue
+
+        key = (*key, q)
+        shape = tuple(ix.sector_dim(k) for ix, k in zip(indices, key))
+        layout.append((key, shape, offset))
+        offset += prod(shape)
+
+    return tuple(layout), offset
+
+
+# --------------------------------------------------------------------------- #
+#                             Block sparse array                              #
+# --------------------------------------------------------------------------- #
+
+class BlockSparseArray(object):
+    """An array with an abelian symmetry, stored as a dictionary of dense
+    blocks, one for each allowed combination of charges. It can be used as
+    the ``data`` of a :class:`~quimb.tensor.Tensor`, in which case
+    contraction, splitting and fusing all act blockwise.
+
+    Parameters
+    ----------
+    blocks : dict[tuple[int], numpy.ndarray]
+        Mapping of the charges of each dimension to the corresponding dense
+        block, missing blocks are zero.
+    indices : sequence of BlockIndex
+        The charge structure of each dimension.
+    charge : int, optional
+        The total charge of the array.
+    symmetry : {'U1', 'Z2'}, optional
+        The symmetry group, controlling how charges combine.
+    dtype : numpy.dtype, optional
+        The data type, only needed if there are no blocks.
+    """
+
+    __slots__ = ('blocks', 'indices', 'charge', 'symmetry', '_dtype',
+                 '__weakref__')
+
+    def __init__(self, blocks, indices, charge=0, symmetry='U1',
+                 dtype=None):
+        _check_symmetry(symmetry)
+        self.indices = tuple(indices)
+        self.symmetry = symmetry
+        self.charge = _norm_charge(charge, symmetry)
+        self.blocks = {tuple(k): np.asarray(b) for k, b in blocks.items()}
+
+        if dtype is None:
+            dtype = (np.result_type(*self.blocks.values()) if self.blocks
+                     else np.float64)
+        self._dtype = np.dtype(dtype)
+
+        flows = self.flows
+        for key, block in self.blocks.items():
+            if fuse_charges(key, flows, symmetry) != self.charge:
+                raise ValueError("Block {} is not allowed by the symmetry, "
+                                 "the total charge should be {}."
+                                 .format(key, self.charge))
+            shape = tuple(ix.sector_dim(q) for ix, q in zip(self.indices, key))
+            if block.shape != shape:
+                raise ValueError("Block {} has shape {}, but the sectors of "
+                                 "the indices have shape {}."
+                                 .format(key, block.shape, shape))
+
+    # ------------------------------ properties ----------------------------- #
+
+    @property
+    def flows(self):
+        return tuple(ix.flow for ix in self.indices)
+
+    @property
+    def shape(self):
+        """The shape of the equivalent dense array.
+        """
+        return tuple(ix.size for ix in self.indices)
+
+    @property
+    def ndim(self):
+        return len(self.indices)
+
+    @property
+    def size(self):
+        """The size of the equivalent dense array.
+        """
+        return prod(self.shape)
+
+    @property
+    def nnz(self):
+        """The number of elements actually stored.
+        """
+        return sum(b.size for b in self.blocks.values())
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def _new(self, blocks, indices=None, charge=None, dtype=None):
+        if dtype is None:
+            dtype = (np.result_type(*blocks.values()) if blocks
+                     else self.dtype)
+        return _from_blocks(
+            blocks, self.indices if indices is None else indices,
+            self.charge if charge is None else charge, self.symmetry, dtype)
+
+    def copy(self):
+        return self._new({k: b.copy() for k, b in self.blocks.items()},
+                         dtype=self.dtype)
+
+    def astype(self, dtype):
+        return self._new({k: b.astype(dtype) for k, b in self.blocks.items()},
+                         dtype=dtype)
+
+    def __repr__(self):
+        return ("BlockSparseArray(shape={}, charge={}, symmetry='{}', "
+                "num_blocks={}, nnz={})".format(self.shape, self.charge,
+                                                self.symmetry,
+                                                len(self.blocks), self.nnz))
+
+    # ----------------------------- conversions ----------------------------- #
+
+    @classmethod
+    def from_dense(cls, x, indices, charge=0, symmetry='U1', tol=1e-12):
+        """Create a block sparse array from the dense array ``x``, which
+        should be zero, within ``tol``, outside of the allowed blocks.
+        """
+        x = np.asarray(x)
+        indices = tuple(indices)
+        if x.shape != tuple(ix.size for ix in indices):
+            raise ValueError("Shape of array {} doesn't match indices {}."
+                             .format(x.shape, indices))
+
+        layout, _ = block_layout(indices, _norm_charge(charge, symmetry),
+                                 symmetry)
+        blocks = {}
+        allowed = np.zeros(x.shape, dtype=bool)
+        for key, _, _ in layout:
+            sel = np.ix_(*(ix.positions(q) for ix, q in zip(indices, key)))
+            allowed[sel] = True
+            block = x[sel]
+            if np.any(block):
+                blocks[key] = block
+
+        if np.any(np.abs(x[~allowed]) > tol):
+            raise ValueError("The array has non-zero elements not allowed by "
+                             "the symmetry.")
+
+        return cls(blocks, indices, charge=charge, symmetry=symmetry,
+                   dtype=x.dtype)
+
+    def to_dense(self):
+        """Convert to the equivalent dense array.
+        """
+        x = np.zeros(self.shape, dtype=self.dtype)
+        for key, block in self.blocks.items():
+            x[np.ix_(*(ix.positions(q) for ix, q in
+                       zip(self.indices, key)))] = block
+        return x
+
+    def __array__(self, dtype=None):
+        x = self.to_dense()
+        return x if dtype is None else x.astype(dtype)
+
+    def to_vector(self):
+        """Flatten all the allowed blocks, including zero ones, into a
+        single vector, see :func:`block_layout`.
+        """
+        layout, size = block_layout(self.indices, self.charge, self.symmetry)
+        v = np.zeros(size, dtype=self.dtype)
+        for key, shape, offset in layout:
+            if key in self.blocks:
+                v[offset:offset + prod(shape)] = self.blocks[key].reshape(-1)
+        return v
+
+    @classmethod
+    def from_vector(cls, v, indices, charge=0, symmetry='U1'):
+        """Inverse of :meth:`to_vector`.
+        """
+        v = np.asarray(v).reshape(-1)
+        indices = tuple(indices)
+        layout, size = block_layout(indices, _norm_charge(charge, symmetry),
+                                    symmetry)
+        if v.size != size:
+            raise ValueError("Vector of size {} doesn't match the {} allowed "
+                             "elements.".format(v.size, size))
+        blocks = {key: v[offset:offset + prod(shape)].reshape(shape)
+                  for key, shape, offset in layout}
+        return _from_blocks(blocks, indices, charge, symmetry, v.dtype)
+
+    @classmethod
+    def rand(cls, indices, charge=0, symmetry='U1', dtype=float):
+        """A random array with all allowed blocks filled.
+        """
+        indices = tuple(indices)
+        _, size = block_layout(indices, _norm_charge(charge, symmetry),
+                               symmetry)
+        v = np.random.randn(size)
+        if np.issubdtype(dtype, np.complexfloating):
+            v = v + 1j * np.random.randn(size)
+        return cls.from_vector(v.astype(dtype), indices, charge, symmetry)
+
+    # ------------------------------ operations ----------------------------- #
+
+    def conj(self):
+        """Conjugate the data, flip all flows and negate the charge.
+        """
+        return self._new({k: b.conj() for k, b in self.blocks.items()},
+                         indices=[ix.conj() for ix in self.indices],
+                         charge=-self.charge, dtype=self.dtype)
+
+    def transpose(self, *axes):
+        if len(axes) == 1 and not isinstance(axes[0], int):
+            axes, = axes
+        if not axes:
+            axes = tuple(reversed(range(self.ndim)))
+        return self._new({tuple(k[a] for a in axes): b.transpose(axes)
+                          for k, b in self.blocks.items()},
+                         indices=[self.indices[a] for a in axes],
+                         dtype=self.dtype)
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def reshape(self, *shape):
+        """Only trivial reshapes are possible, see :meth:`fuse` instead.
+        """
+        if len(shape) == 1 and not isinstance(shape[0], int):
+            shape, = shape
+        if tuple(shape) != self.shape:
+            raise ValueError("Block sparse arrays can't be reshaped, use "
+                             "``fuse`` to combine dimensions.")
+        return self
+
+    def norm(self):
+        """Frobenius norm.
+        """
+        return sum(np.vdot(b, b).real for b in self.blocks.values())**0.5
+
+    def _binary_op(self, other, op):
+        if isinstance(other, BlockSparseArray):
+            if (other.indices != self.indices) or (other.charge !=
+                                                   self.charge):
+                raise ValueError("Can only combine block sparse arrays with "
+                                 "the same indices and charge.")
+            blocks = {}
+            for key in set(self.blocks) | set(other.blocks):
+                x = self.blocks.get(key)
+                y = other.blocks.get(key)
+                blocks[key] = op(np.zeros_like(y) if x is None else x,
+                                 np.zeros_like(x) if y is None else y)
+            return self._new(blocks)
+
+        if not np.isscalar(other):
+            return NotImplemented
+        return self._new({k: op(b, other) for k, b in self.blocks.items()})
+
+    def __add__(self, other):
+        return self._binary_op(other, operator.add)
+
+    def __sub__(self, other):
+        return self._binary_op(other, operator.sub)
+
+    def __mul__(self, other):
+        return self._binary_op(other, operator.mul)
+
+    def __truediv__(self, other):
+        return self._binary_op(other, operator.truediv)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __neg__(self):
+        return self._new({k: -b for k, b in self.blocks.items()})
+
+    def fuse(self, groups):
+        """Combine each group of axes into a single axis, with these new
+        axes first and any remaining axes following in their current order.
+        This matches ``np.transpose`` followed by ``np.reshape`` for the
+        equivalent dense arrays. The fused axes have flow +1.
+        """
+        groups = [tuple(g) for g in groups]
+        rest = [a for a in range(self.ndim) if not any(a in g for g in groups)]
+
+        # the new index of each group, in dense (row-major) order
+        new_indices = []
+        for g in groups:
+            charges = np.zeros(1, dtype=int)
+            for a in g:
+                ix = self.indices[a]
+                charges = (charges[:, None] +
+                           ix.flow * np.array(ix.charges)[None, :]).ravel()
+            if self.symmetry == 'Z2':
+                charges %= 2
+            new_indices.append(BlockIndex(charges))
+
+        def fused_positions(g, key):
+            """Where each element of the sub block ``key`` of group ``g``
+            ends up in its new fused sector.
+            """
+            ixs = [self.indices[a] for a in g]
+            dims = [ix.size for ix in ixs]
+            strides = [prod(dims[n + 1:]) for n in range(len(dims))]
+            dense = np.zeros(1, dtype=int)
+            for ix, q, stride in zip(ixs, key, strides):
+                dense = (dense[:, None] +
+                         stride * ix.positions(q)[None, :]).ravel()
+            return dense
+
+        blocks = {}
+        for key, block in self.blocks.items():
+            new_key, sels, shape = [], [], []
+            for g, new_ix in zip(groups, new_indices):
+                sub_key = tuple(key[a] for a in g)
+                q = fuse_charges(sub_key, [self.indices[a].flow for a in g],
+                                 self.symmetry)
+                new_key.append(q)
+                sels.append(np.searchsorted(new_ix.positions(q),
+                                            fused_positions(g, sub_key)))
+                shape.append(new_ix.sector_dim(q))
+            new_key.extend(key[a] for a in rest)
+            new_key = tuple(new_key)
+
+            if new_key not in blocks:
+                blocks[new_key] = np.zeros(
+                    (*shape, *(block.shape[a] for a in rest)), self.dtype)
+
+            x = block.transpose(*_concat_groups(groups), *rest).reshape(
+                *(len(s) for s in sels), *(block.shape[a] for a in rest))
+            blocks[new_key][np.ix_(*sels)] = x
+
+        return self._new(blocks, indices=(
+            *new_indices, *(self.indices[a] for a in rest)), dtype=self.dtype)
+
+    def pad(self, axis, extra):
+        """Add ``extra`` zero elements to dimension ``axis``, with charges
+        chosen cyclically from its existing sectors, such that both sides of
+        a bond are padded in the same way.
+        """
+        ix = self.indices[axis]
+        qs = tuple(ix.sectors)
+        new_ix = BlockIndex(ix.charges + tuple(itertools.islice(
+            itertools.cycle(qs), extra)), ix.flow)
+
+        blocks = {}
+        for key, block in self.blocks.items():
+            pads = [(0, 0)] * self.ndim
+            pads[axis] = (0, new_ix.sector_dim(key[axis]) - block.shape[axis])
+            blocks[key] = np.pad(block, pads, mode='constant')
+
+        indices = list(self.indices)
+        indices[axis] = new_ix
+        return self._new(blocks, indices=indices, dtype=self.dtype)
+
+    def reverse_flow(self, axis):
+        """Relabel dimension ``axis`` with the opposite flow and negated
+        charges, which describes exactly the same array, e.g. so that it can
+        be joined to an index pointing the other way.
+        """
+        ix = self.indices[axis]
+        new_ix = BlockIndex((-q for q in ix.charges), -ix.flow)
+
+        blocks = {}
+        for key, block in self.blocks.items():
+            key = list(key)
+            key[axis] = -key[axis]
+            blocks[tuple(key)] = block
+
+        indices = list(self.indices)
+        indices[axis] = new_ix
+        return self._new(blocks, indices=indices, dtype=self.dtype)
+
+
+def concatenate(arrays, axis=0):
+    """Join a sequence of block sparse arrays along an existing dimension,
+    matching ``np.concatenate`` for the equivalent dense arrays. All the
+    other dimensions, the total charges and the flow of ``axis`` should be
+    the same.
+    """
+    x0 = arrays[0]
+    for x in arrays[1:]:
+        if ((x.charge, x.symmetry) != (x0.charge, x0.symmetry) or
+                x.indices[axis].flow != x0.indices[axis].flow or
+                any(a != b for n, (a, b) in enumerate(
+                    zip(x.indices, x0.indices)) if n != axis)):
+            raise ValueError("Can only concatenate block sparse arrays with "
+                             "the same charge and matching indices.")
+
+    new_ix = BlockIndex(itertools.chain.from_iterable(
+        x.indices[axis].charges for x in arrays), x0.indices[axis].flow)
+    dtype = np.result_type(*(x.dtype for x in arrays))
+
+    # the elements of each sector keep their relative order, so the sector
+    # blocks of the new index are just the old ones stacked, or zeros
+    blocks = {}
+    for key in set(itertools.chain.from_iterable(x.blocks for x in arrays)):
+        parts = []
+        for x in arrays:
+            try:
+                parts.append(x.blocks[key])
+            except KeyError:
+                shape = [ix.sector_dim(q) for ix, q in zip(x.indices, key)]
+                if shape[axis]:
+                    parts.append(np.zeros(shape, dtype=dtype))
+        blocks[key] = np.concatenate(parts, axis=axis).astype(dtype,
+                                                              copy=False)
+
+    indices = list(x0.indices)
+    indices[axis] = new_ix
+    return _from_blocks(blocks, indices, x0.charge, x0.symmetry, dtype)
+
+
+def _concat_groups(groups):
+    return tuple(itertools.chain.from_iterable(groups))
+
+
+def _from_blocks(blocks, indices, charge, symmetry, dtype):
+    """Create a block sparse array without checking the blocks, for when
+    they are known to be consistent.
+    """
+    x = object.__new__(BlockSparseArray)
+    x.blocks, x.indices = blocks, tuple(indices)
+    x.charge, x.symmetry = _norm_charge(charge, symmetry), symmetry
+    x._dtype = np.dtype(dtype)
+    return x
+
+
+def _offsets(shapes):
+    """Given ``{key: shape}``, find where each sub-block starts when they
+    are all flattened and placed consecutively, in sorted order.
+
+    Returns
+    -------
+    offsets : dict[tuple, (tuple, int)]
+        The shape and offset of each sub-block.
+    total : int
+    """
+    out, offset = {}, 0
+    for k in sorted(shapes):
+        out[k] = (shapes[k], offset)
+        offset += prod(shapes[k])
+    return out, offset
+
+
+def tensordot(a, b, axes):
+    """Blockwise tensordot of two block sparse arrays, the contracted
+    dimensions of which should have matching sectors and opposite flows.
+    """
+    axes_a, axes_b = (tuple(ax) for ax in axes)
+    if a.symmetry != b.symmetry:
+        raise ValueError("Can't contract arrays with different symmetries.")
+
+    for i, j in zip(axes_a, axes_b):
+        ix_a, ix_b = a.indices[i], b.indices[j]
+        if ix_a.flow != -ix_b.flow:
+            raise ValueError("Contracted dimensions {} and {} should have "
+                             "opposite flows.".format(i, j))
+        if ix_a.sectors != ix_b.sectors:
+            raise ValueError("Contracted dimensions {} and {} have different "
+                             "sectors.".format(i, j))
+
+    free_a = tuple(n for n in range(a.ndim) if n not in axes_a)
+    free_b = tuple(n for n in range(b.ndim) if n not in axes_b)
+    flows = [a.indices[i].flow for i in axes_a]
+
+    # group the blocks of both by the total charge of the contracted
+    #     dimensions, each group then forms a single matrix multiplication
+    groups = {}
+    for side, x, free, cntrd in ((0, a, free_a, axes_a),
+                                 (1, b, free_b, axes_b)):
+        perm = free + cntrd if side == 0 else cntrd + free
+        for key, block in x.blocks.items():
+            kf = tuple(key[n] for n in free)
+            kc = tuple(key[n] for n in cntrd)
+            q = fuse_charges(kc, flows, a.symmetry)
+            groups.setdefault(q, ({}, {}))[side][kf, kc] = (
+                block.transpose(perm))
+
+    blocks = {}
+    for q, (a_blocks, b_blocks) in groups.items():
+        kcs = ({kc for _, kc in a_blocks} & {kc for _, kc in b_blocks})
+        if not kcs:
+            continue
+
+        # the offsets of each sub-block within the matrices
+        mid, nk = _offsets({kc: x.shape[len(free_a):] for (_, kc), x in
+                            a_blocks.items() if kc in kcs})
+        left, nl = _offsets({kf: x.shape[:len(free_a)] for (kf, kc), x in
+                             a_blocks.items() if kc in kcs})
+        right, nr = _offsets({kf: x.shape[len(axes_b):] for (kf, kc), x in
+                              b_blocks.items() if kc in kcs})
+
+        A = np.zeros((nl, nk), dtype=a.dtype)
+        for (kf, kc), x in a_blocks.items():
+            if kc in kcs:
+                (ls, lo), (ms, mo) = left[kf], mid[kc]
+                A[lo:lo + prod(ls), mo:mo + prod(ms)] = x.reshape(prod(ls),
+                                                                  prod(ms))
+        B = np.zeros((nk, nr), dtype=b.dtype)
+        for (kf, kc), x in b_blocks.items():
+            if kc in kcs:
+                (ms, mo), (rs, ro) = mid[kc], right[kf]
+                B[mo:mo + prod(ms), ro:ro + prod(rs)] = x.reshape(prod(ms),
+                                                                  prod(rs))
+        C = A @ B
+
+        for kl, (ls, lo) in left.items():
+            for kr, (rs, ro) in right.items():
+                blocks[kl + kr] = C[lo:lo + prod(ls),
+                                    ro:ro + prod(rs)].reshape((*ls, *rs))
+
+    indices = [a.indices[n] for n in free_a] + [b.indices[n] for n in free_b]
+    return _from_blocks(blocks, indices, a.charge + b.charge, a.symmetry,
+                        np.result_type(a.dtype, b.dtype))
+
+
+# --------------------------------------------------------------------------- #
+#                             Blockwise splitting                             #
+# --------------------------------------------------------------------------- #
+
+def _group_as_matrices(x, nleft):
+    """Group the blocks of ``x`` by the fused charge of its first ``nleft``
+    dimensions, and assemble each group into a dense matrix.
+
+    Returns
+    -------
+    matrices : dict[int, numpy.ndarray]
+    rows, cols : dict[int, list[(key, shape, offset)]]
+    """
+    lflows = x.flows[:nleft]
+    rows, cols, blocks = {}, {}, {}
+
+    for key, block in x.blocks.items():
+        lkey, rkey = key[:nleft], key[nleft:]
+        q = fuse_charges(lkey, lflows, x.symmetry)
+        blocks.setdefault(q, []).append((lkey, rkey, block))
+        rows.setdefault(q, {})[lkey] = block.shape[:nleft]
+        cols.setdefault(q, {})[rkey] = block.shape[nleft:]
+
+    matrices = {}
+    for q in blocks:
+        rows[q], nr = _offsets(rows[q])
+        cols[q], nc = _offsets(cols[q])
+        m = np.zeros((nr, nc), dtype=x.dtype)
+        for lkey, rkey, block in blocks[q]:
+            (rs, ro), (cs, co) = rows[q][lkey], cols[q][rkey]
+            m[ro:ro + prod(rs), co:co + prod(cs)] = block.reshape(prod(rs),
+                                                                  prod(cs))
+        matrices[q] = m
+
+    return matrices, rows, cols
+
+
+def _num_to_keep(s, cutoff, cutoff_mode, max_bond):
+    """Like ``_trim_singular_vals`` but for all sectors' values ``s`` at
+    once, sorted in descending order.
+    """
+    if cutoff_mode == 1:
+        n_chi = np.sum(s > cutoff)
+    elif cutoff_mode == 2:
+        n_chi = np.sum(s > cutoff * s[0])
+    elif cutoff_mode == 3:
+        # discard the smallest values with total square less than cutoff
+        n_chi = s.size - np.sum(np.cumsum(s[::-1]**2) <= cutoff)
+    else:
+        raise ValueError("``cutoff_mode`` not one of {1, 2, 3}.")
+
+    n_chi = max(int(n_chi), 1)
+    if max_bond > 0:
+        n_chi = min(n_chi, max_bond)
+    return n_chi
+
+
+def blocksparse_split(x, nleft, method='svd', cutoff=-1.0, cutoff_mode=3,
+                      max_bond=-1, absorb=0, get_values=False, info=None):
+    """Decompose block sparse ``x``, viewed as a matrix with its first
+    ``nleft`` dimensions as rows, into a left and right factor, sector by
+    sector. Truncation with ``cutoff`` and ``max_bond`` is applied to the
+    singular values of all sectors together. The new bond has flow -1 on the
+    left factor and +1 on the right, with the right factor carrying the
+    total charge.
+
+    Parameters
+    ----------
+    x : BlockSparseArray
+        The array to split.
+    nleft : int
+        The number of leading dimensions that belong to the left factor.
+    method : {'svd', 'eig', 'isvd', 'svds', 'qr', 'lq'}, optional
+        How to split, all but qr and lq use a full SVD of each sector.
+    cutoff, cutoff_mode, max_bond, absorb
+        As for :func:`~quimb.tensor.tensor_core.tensor_split`, in numeric
+        form.
+    get_values : bool, optional
+        Return just the singular values, in descending order.
+    info : dict, optional
+        If given, updated with the relative ``'discarded_weight'`` and the
+        new ``'bond_dim'``.
+
+    Returns
+    -------
+    left, right : BlockSparseArray
+    """
+    matrices, rows, cols = _group_as_matrices(x, nleft)
+    qs = sorted(matrices)
+    discarded = 0.0
+
+    if method in ('qr', 'lq'):
+        factors = {}
+        for q in qs:
+            if method == 'qr':
+                factors[q] = np.linalg.qr(matrices[q])
+            else:
+                Q, L = np.linalg.qr(matrices[q].T)
+                factors[q] = (L.T, Q.T)
+    else:
+        svds = {q: np.linalg.svd(matrices[q], full_matrices=False)
+                for q in qs}
+        s_all = np.concatenate([svds[q][1] for q in qs] or [np.zeros(0)])
+
+        if get_values:
+            return np.sort(s_all)[::-1]
+
+        keep = {q: svds[q][1].size for q in qs}
+        if cutoff > 0.0 and s_all.size:
+            s_sorted = np.sort(s_all)[::-1]
+            n_chi = _num_to_keep(s_sorted, cutoff, cutoff_mode, max_bond)
+            if n_chi < s_all.size:
+                # break ties consistently by keeping strictly larger first
+                thresh = s_sorted[n_chi - 1]
+                n_above = {q: np.sum(svds[q][1] > thresh) for q in qs}
+                n_left = n_chi - sum(n_above.values())
+                for q in qs:
+                    n_eq = np.sum(svds[q][1] == thresh)
+                    take = min(n_eq, n_left)
+                    keep[q] = n_above[q] + take
+                    n_left -= take
+                norm = (np.sum(s_all**2) / np.sum(s_sorted[:n_chi]**2))**0.5
+                discarded = 1 - norm**-2
+            else:
+                norm = 1.0
+        else:
+            norm = 1.0
+
+        factors = {}
+        for q in qs:
+            U, s, V = svds[q]
+            k = keep[q]
+            if k == 0:
+                continue
+            U, s, V = U[:, :k], s[:k] * norm, V[:k, :]
+            if absorb == -1:
+                U = U * s.reshape(1, -1)
+            elif absorb == 1:
+                V = V * s.reshape(-1, 1)
+            else:
+                s = s**0.5
+                U = U * s.reshape(1, -1)
+                V = V * s.reshape(-1, 1)
+            factors[q] = (U, V)
+
+    bond_sectors = {q: factors[q][0].shape[1] for q in factors}
+    if info is not None:
+        info['discarded_weight'] = discarded
+        info['bond_dim'] = sum(bond_sectors.values())
+    bond_l = BlockIndex.from_sectors(bond_sectors, flow=-1)
+    bond_r = bond_l.conj()
+
+    lblocks, rblocks = {}, {}
+    for q, (U, V) in factors.items():
+        for lkey, (shape, offset) in rows[q].items():
+            lblocks[(*lkey, q)] = U[offset:offset + prod(shape)].reshape(
+                *shape, -1)
+        for rkey, (shape, offset) in cols[q].items():
+            rblocks[(q, *rkey)] = V[:, offset:offset + prod(shape)].reshape(
+                -1, *shape)
+
+    left = BlockSparseArray(lblocks, (*x.indices[:nleft], bond_l), charge=0,
+                            symmetry=x.symmetry, dtype=x.dtype)
+    right = BlockSparseArray(rblocks, (bond_r, *x.indices[nleft:]),
+                             charge=x.charge, symmetry=x.symmetry,
+                             dtype=x.dtype)
+    return left, right
+
+
+# --------------------------------------------------------------------------- #
+#                        Conversion of dense networks                         #
+# --------------------------------------------------------------------------- #
+
+def infer_bond_charges(x, known, axis, flow, charge=0, symmetry='U1',
+                       tol=1e-12):
+    """Work out the charges of dimension ``axis`` of dense array ``x``,
+    given the charged indices of all its other dimensions, such that every
+    non-zero element of ``x`` is allowed by the symmetry. Elements of
+    ``axis`` which are always zero are given charge 0.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The dense array.
+    known : dict[int, BlockIndex]
+        The index of every other dimension.
+    axis : int
+        The dimension to find the charges of.
+    flow : {1, -1}
+        The flow of the new index.
+    charge : int, optional
+        The total charge of the array.
+
+    Returns
+    -------
+    BlockIndex
+    """
+    charges = [None] * x.shape[axis]
+    for elem in zip(*np.nonzero(np.abs(x) > tol)):
+        q = fuse_charges([known[a].charges[i] for a, i in enumerate(elem)
+                          if a != axis],
+                         [known[a].flow for a in range(x.ndim) if a != axis],
+                         symmetry)
+        q = _norm_charge(flow * (charge - q), symmetry)
+        i = elem[axis]
+        if charges[i] is None:
+            charges[i] = q
+        elif charges[i] != q:
+            raise ValueError("The array is not symmetric: element {} of "
+                             "dimension {} needs charges {} and {}."
+                             .format(i, axis, charges[i], q))
+
+    return BlockIndex([0 if q is None else q for q in charges], flow)
+
+
+def infer_array_charge(x, indices, symmetry='U1', tol=1e-12):
+    """The total charge of dense array ``x`` with ``indices``, raising an
+    error if its non-zero elements don't share a single charge.
+    """
+    charge = None
+    for elem in zip(*np.nonzero(np.abs(x) > tol)):
+        q = fuse_charges([ix.charges[i] for ix, i in zip(indices, elem)],
+                         [ix.flow for ix in indices], symmetry)
+        if charge is None:
+            charge = q
+        elif charge != q:
+            raise ValueError("The array is not symmetric, it has elements of "
+                             "charges {} and {}.".format(charge, q))
+    return 0 if charge is None else charge
+
+
+# --------------------------------------------------------------------------- #
+#                              Linear operators                               #
+# --------------------------------------------------------------------------- #
+
+class BlockSparseTNLinearOperator(spla.LinearOperator):
+    """Get a linear operator - something that replicates the matrix-vector
+    operation - for an arbitrary *uncontracted* network of block sparse
+    tensors, acting only on the allowed elements of a block sparse 'vector'.
+    Vectors are mapped to and from block sparse arrays using
+    :meth:`BlockSparseArray.to_vector` and
+    :meth:`BlockSparseArray.from_vector`.
+
+    Parameters
+    ----------
+    tns : sequence of Tensors or TensorNetwork
+        The tensors forming the operator.
+    upper_inds : sequence of str
+        The upper inds of the operator network.
+    lower_inds : sequence of str
+        The lower inds of the operator network, ordered the same way as
+        ``upper_inds``.
+    like : BlockSparseArray
+        The structure of the vectors, i.e. their indices and total charge,
+        ordered as ``upper_inds``. For e.g. DMRG this is the current local
+        tensor of the ket. The output has the conjugate structure, but the
+        same allowed elements, and thus the same flat vector layout.
+    """
+
+    def __init__(self, tns, upper_inds, lower_inds, like):
+        from .tensor_core import (
+            Tensor,
+            TensorNetwork,
+            rand_uuid,
+            _find_contract_expression,
+        )
+
+        if isinstance(tns, TensorNetwork):
+            self._tensors = tns.tensors
+        else:
+            self._tensors = tuple(tns)
+
+        self.upper_inds, self.lower_inds = tuple(upper_inds), tuple(lower_inds)
+        self.indices, self.charge = like.indices, like.charge
+        self.symmetry = like.symmetry
+
+        self._layout, size = block_layout(self.indices, self.charge,
+                                          self.symmetry)
+        self._batch_ind = rand_uuid()
+
+        # find the contraction order and path once, upfront
+        self._order, _, self._expression = _find_contract_expression(
+            (*self._tensors, Tensor(like, self.upper_inds)),
+            output_inds=self.lower_inds)
+
+        super().__init__(shape=(size, size), dtype=np.result_type(
+            like.dtype, *(t.dtype for t in self._tensors)))
+
+    def from_vector(self, v):
+        """Convert a flat vector into a block sparse array like the one the
+        operator was created with.
+        """
+        return BlockSparseArray.from_vector(v, self.indices, self.charge,
+                                            self.symmetry)
+
+    def to_vector(self, x):
+        return x.to_vector()
+
+    def _matvec(self, vec):
+        x = BlockSparseArray.from_vector(vec, self.indices, self.charge,
+                                         self.symmetry)
+        arrays = (*(t.data for t in self._tensors), x)
+        y = self._expression(*(arrays[i] for i in self._order))
+        return y.to_vector().reshape(np.shape(vec))
+
+    def _matmat(self, mat):
+        from .tensor_core import Tensor, tensor_contract
+
+        # treat the columns as an extra, chargeless, index carried through
+        mat = np.asarray(mat)
+        m = mat.shape[1]
+        batch = BlockIndex([0] * m)
+        x = BlockSparseArray({
+            (*key, 0): mat[offset:offset + prod(shape)].reshape(*shape, m)
+            for key, shape, offset in self._layout
+        }, (*self.indices, batch), self.charge, self.symmetry)
+
+        y = tensor_contract(*self._tensors,
+                            Tensor(x, (*self.upper_inds, self._batch_ind)),
+                            output_inds=(*self.lower_inds, self._batch_ind))
+
+        out = np.zeros((self.shape[0], m), dtype=y.dtype)
+        for key, shape, offset in self._layout:
+            block = y.data.blocks.get((*key, 0))
+            if block is not None:
+                out[offset:offset + prod(shape)] = block.reshape(-1, m)
+        return out
+
+    def to_dense(self):
+        """The dense matrix of this operator within the allowed elements.
+        """
+        return self.matmat(np.eye(self.shape[1], dtype=self.dtype))
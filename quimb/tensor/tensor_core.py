@@ -1,6 +1,7 @@
 """Core tensor network tools.
 """
 import os
+import sys
 import functools
 import operator
 import copy
@@ -8,6 +9,15 @@ import itertools
 import string
 import uuid
 import re
+import pickle
+import threading
+import weakref
+import collections
+import contextlib
+import heapq
+import math
+import random
+import time
 
 from cytoolz import (
     unique,
@@ -23,6 +33,11 @@ import scipy.linalg.interpolative as sli
 from ..accel import prod, njit, realify_scalar
 from ..linalg.base_linalg import norm_fro_dense
 from ..utils import raise_cant_find_library_function, functions_equal
+from .tensor_block_sparse import (
+    BlockSparseArray,
+    blocksparse_split,
+    tensordot as blocksparse_tensordot,
+)
 
 try:
     import opt_einsum
@@ -71,14 +86,112 @@ def _gen_output_inds(all_inds):
             yield ind
 
 
-def _maybe_map_indices_to_alphabet(a_ix, i_ix, o_ix):
+def _canonical_tensor_order(i_ix, shapes, o_ix):
+    """Find an ordering of the tensors in a contraction that depends only on
+    its structure -- the shapes, how the tensors are connected and where the
+    output indices are placed -- and not on the names of the indices or the
+    order the tensors were supplied in. This is found by iteratively refining
+    a 'color' for each tensor based on those of its neighbours, and then
+    breaking any remaining ties one by one.
+
+    Parameters
+    ----------
+    i_ix : sequence of sequence
+        The input indices per tensor.
+    shapes : sequence of tuple of int
+        The shape of each tensor.
+    o_ix : sequence
+        The output indices.
+
+    Returns
+    -------
+    order : list of int
+        The canonical position of each tensor, such that
+        ``[tensors[i] for i in order]`` is the canonical sequence.
+    """
+    n = len(i_ix)
+    if n == 1:
+        return [0]
+
+    o_pos = {ix: p for p, ix in enumerate(o_ix)}
+
+    # for each index, the (tensor, axis) pairs it appears on
+    locs = collections.defaultdict(list)
+    for t, ix in enumerate(i_ix):
+        for ax, i in enumerate(ix):
+            locs[i].append((t, ax))
+
+    # for each tensor, the (axis, neighbour tensor, neighbour axis) bonds
+    bonds = [[] for _ in range(n)]
+    for i, ((t1, ax1), *others) in locs.items():
+        for t2, ax2 in others:
+            bonds[t1].append((ax1, t2, ax2))
+            bonds[t2].append((ax2, t1, ax1))
+
+    def to_ranks(labels):
+        ranking = {lbl: r for r, lbl in enumerate(sorted(set(labels)))}
+        return [ranking[lbl] for lbl in labels]
+
+    # initial color: shape and position of any output indices
+    colors = to_ranks([
+        tuple((d, o_pos.get(i, -1)) for d, i in zip(shape, ix))
+        for shape, ix in zip(shapes, i_ix)
+    ])
+
+    def refine(colors):
+        num_colors = len(set(colors))
+        while True:
+            colors = to_ranks([
+                (colors[t], tuple(sorted((ax1, colors[t2], ax2)
+                                         for ax1, t2, ax2 in bonds[t])))
+                for t in range(n)
+            ])
+            new_num_colors = len(set(colors))
+            if new_num_colors == num_colors:
+                return colors
+            num_colors = new_num_colors
+
+    colors = refine(colors)
+
+    # individualize the first tensor in the smallest tied color class
+    while len(set(colors)) < n:
+        counts = frequencies(colors)
+        tied = min((c for c in counts if counts[c] > 1),
+                   key=lambda c: (counts[c], c))
+        first = colors.index(tied)
+        colors = [2 * c + (t != first if c == tied else 0)
+                  for t, c in enumerate(colors)]
+        colors = refine(to_ranks(colors))
+
+    return sorted(range(n), key=colors.__getitem__)
+
+
+_EINSUM_SYMBOLS = string.ascii_letters
+_EINSUM_SYMBOLS_SET = frozenset(_EINSUM_SYMBOLS)
+
+
+def _get_symbol(i):
+    """Get the symbol corresponding to the ``i``th index. The first 52 are the
+    usual ``einsum`` characters, beyond that unicode characters are used,
+    which the pairwise contraction executor understands.
+    """
+    if i < 52:
+        return _EINSUM_SYMBOLS[i]
+    return chr(i + 140)
+
+
+def _map_indices_to_alphabet(a_ix, i_ix, o_ix):
     """``einsum`` need characters a-z,A-Z or equivalent numbers.
-    Do this early, and allow *any* index labels.
+    Do this early, and allow *any* index labels. The indices are relabelled in
+    order of first appearance, so that given a canonical order of tensors, the
+    same contraction always produces the same string, no matter the actual
+    names of its indices. If there are more than 52 indices, symbols beyond
+    the normal ``einsum`` range are used.
 
     Parameters
     ----------
-    a_ix : set
-        All of the input indices.
+    a_ix : sequence
+        All of the unique input indices, in order of first appearance.
     i_ix : sequence of sequence
         The input indices per tensor.
     o_ix : list of int
@@ -89,22 +202,241 @@ def _maybe_map_indices_to_alphabet(a_ix, i_ix, o_ix):
     contract_str : str
         The string to feed to einsum/contract.
     """
-    if any(i not in opt_einsum.parser.einsum_symbols_set for i in a_ix):
-        # need to map inds to alphabet
-        if len(a_ix) > len(opt_einsum.parser.einsum_symbols_set):
-            raise ValueError("Too many indices to auto-optimize contraction "
-                             "for at once, try setting a `structure` "
-                             "or do a manual contraction order using tags.")
+    amap = {ix: _get_symbol(i) for i, ix in enumerate(a_ix)}
+    in_str = ("".join(amap[i] for i in ix) for ix in i_ix)
+    out_str = "".join(amap[o] for o in o_ix)
 
-        amap = dict(zip(a_ix, opt_einsum.parser.einsum_symbols))
-        in_str = ("".join(amap[i] for i in ix) for ix in i_ix)
-        out_str = "".join(amap[o] for o in o_ix)
+    return ",".join(in_str) + "->" + out_str
 
-    else:
-        in_str = ("".join(ix) for ix in i_ix)
-        out_str = "".join(o_ix)
 
-    return ",".join(in_str) + "->" + out_str
+def _parse_contract_str(contract_str):
+    """Split a contract string into its input and output terms.
+    """
+    in_str, out_str = contract_str.split('->')
+    return in_str.split(','), out_str
+
+
+def _is_large_contract_str(contract_str):
+    """Check whether ``contract_str`` has too many indices for ``einsum``.
+    """
+    return any(c not in _EINSUM_SYMBOLS_SET
+               for c in contract_str if c not in ',->')
+
+
+def _greedy_pairwise_path(inputs, output, size_dict, temperature=0.0,
+                          rng=None):
+    """Find a pairwise contraction path for an arbitrary number of indices,
+    greedily choosing the pair of connected tensors whose contraction most
+    reduces the total size at each step, then combining any disconnected
+    pieces smallest first.
+
+    Parameters
+    ----------
+    inputs : sequence of str
+        The indices of each tensor, each as a string of single symbols.
+    output : str
+        The output indices.
+    size_dict : dict
+        Mapping of each index to its size.
+    temperature : float, optional
+        If non-zero, randomly perturb the cost of each candidate contraction
+        by this relative amount, so that repeated calls explore different
+        paths.
+    rng : random.Random, optional
+        The random number generator to use if ``temperature`` is non-zero.
+
+    Returns
+    -------
+    path : tuple of tuple of int
+        The path, in the ``opt_einsum`` format, i.e. each step lists the
+        positions of the two tensors to contract, which are then removed, with
+        the result appended to the end.
+    """
+    inputs = {i: frozenset(ix) for i, ix in enumerate(inputs)}
+    output = frozenset(output)
+
+    def size(inds):
+        return prod(size_dict[ix] for ix in inds)
+
+    sizes = {i: size(ix) for i, ix in inputs.items()}
+
+    # which tensors each index currently appears on
+    ind_locs = collections.defaultdict(set)
+    for i, inds in inputs.items():
+        for ix in inds:
+            ind_locs[ix].add(i)
+
+    def result_inds(i, j):
+        a, b = inputs[i], inputs[j]
+        return frozenset(ix for ix in a ^ b) | (a & b & output)
+
+    def push_candidates(i):
+        for ix in inputs[i]:
+            for j in ind_locs[ix]:
+                if j != i:
+                    new_sz = size(result_inds(i, j))
+                    cost = new_sz - sizes[i] - sizes[j]
+                    if temperature:
+                        # gumbel noise, relative to the size of the cost
+                        u = rng.uniform(1e-12, 1 - 1e-12)
+                        gumbel = -math.log(-math.log(u))
+                        cost -= temperature * abs(cost) * gumbel
+                    heap_push(candidates, (cost, min(i, j), max(i, j)))
+
+    heap_push, heap_pop = heapq.heappush, heapq.heappop
+    candidates = []
+    for i in inputs:
+        push_candidates(i)
+
+    ssa_path = []
+    next_id = len(inputs)
+
+    def contract_pair(i, j):
+        nonlocal next_id
+        k = next_id
+        next_id += 1
+        new_inds = result_inds(i, j)
+        for ix in inputs[i] | inputs[j]:
+            ind_locs[ix].discard(i)
+            ind_locs[ix].discard(j)
+        for ix in new_inds:
+            ind_locs[ix].add(k)
+        del inputs[i], inputs[j], sizes[i], sizes[j]
+        inputs[k], sizes[k] = new_inds, size(new_inds)
+        ssa_path.append((i, j))
+        return k
+
+    while candidates:
+        _, i, j = heap_pop(candidates)
+        # skip stale candidates involving already contracted tensors
+        if (i not in inputs) or (j not in inputs):
+            continue
+        push_candidates(contract_pair(i, j))
+
+    # combine any disconnected subnetworks, i.e. outer products
+    while len(inputs) > 1:
+        i, j = sorted(inputs, key=sizes.__getitem__)[:2]
+        contract_pair(i, j)
+
+    # convert from unique ids to the positional format
+    path = []
+    alive = list(range(len(ssa_path) + 1))
+    for new_id, (i, j) in enumerate(ssa_path, len(ssa_path) + 1):
+        pi, pj = alive.index(i), alive.index(j)
+        path.append((pi, pj))
+        for p in sorted((pi, pj), reverse=True):
+            alive.pop(p)
+        alive.append(new_id)
+
+    return tuple(path)
+
+
+def _pairwise_contract_step(x, y, x_ix, y_ix, keep):
+    """Contract two arrays with ``tensordot``, keeping any shared indices
+    in ``keep`` (which requires falling back to ``einsum``).
+
+    Returns
+    -------
+    z, z_ix : numpy.ndarray, str
+    """
+    shared = [ix for ix in x_ix if ix in y_ix]
+    block_sparse = isinstance(x, BlockSparseArray)
+
+    if any(ix in keep for ix in shared):
+        if block_sparse:
+            raise ValueError("Block sparse tensors can't be contracted with "
+                             "hyper or batch indices.")
+        # 'batch' index -> need einsum, with locally mapped indices
+        z_ix = "".join(ix for ix in x_ix if (ix not in y_ix) or (ix in keep))
+        z_ix += "".join(ix for ix in y_ix if ix not in x_ix)
+        local = {ix: _get_symbol(n)
+                 for n, ix in enumerate(unique(x_ix + y_ix))}
+        eq = "{},{}->{}".format(*("".join(local[ix] for ix in term)
+                                  for term in (x_ix, y_ix, z_ix)))
+        return np.einsum(eq, x, y), z_ix
+
+    axes = (tuple(map(x_ix.index, shared)), tuple(map(y_ix.index, shared)))
+    z_ix = ("".join(ix for ix in x_ix if ix not in shared) +
+            "".join(ix for ix in y_ix if ix not in shared))
+    if block_sparse:
+        return blocksparse_tensordot(x, y, axes=axes), z_ix
+    return np.tensordot(x, y, axes=axes), z_ix
+
+
+def _trace_and_sum_single(x, x_ix, keep):
+    """Sum over any indices of ``x`` not in ``keep`` and take the trace of
+    any index that appears twice.
+    """
+    freqs = frequencies(x_ix)
+    if all(ix in keep and freqs[ix] == 1 for ix in x_ix):
+        return x, x_ix
+
+    if isinstance(x, BlockSparseArray):
+        raise ValueError("Block sparse tensors can't have traced or summed "
+                         "indices.")
+
+    z_ix = "".join(unique(ix for ix in x_ix if ix in keep))
+    local = {ix: _get_symbol(n) for n, ix in enumerate(unique(x_ix))}
+    eq = "{}->{}".format("".join(map(local.__getitem__, x_ix)),
+                         "".join(map(local.__getitem__, z_ix)))
+    return np.einsum(eq, x), z_ix
+
+
+class PairwiseContractExpression(object):
+    """A callable, drop-in replacement for an ``opt_einsum`` contraction
+    expression, that performs a contraction with any number of indices as a
+    sequence of pairwise ``tensordot`` calls.
+
+    Parameters
+    ----------
+    contract_str : str
+        The contract string, potentially with more than 52 index symbols.
+    path : sequence of tuple of int
+        The pairwise contraction path, in the ``opt_einsum`` format.
+    """
+
+    def __init__(self, contract_str, path):
+        self.contract_str = contract_str
+        self.path = tuple(path)
+        self.inputs, self.output = _parse_contract_str(contract_str)
+
+    def __call__(self, *arrays):
+        arrays = list(arrays)
+        inputs = list(self.inputs)
+
+        # indices needed later, i.e. by the output or another tensor
+        remaining = frequencies(concat(inputs))
+        for ix in self.output:
+            remaining[ix] = remaining.get(ix, 0) + 1
+
+        for i, (x, x_ix) in enumerate(zip(arrays, inputs)):
+            keep = {ix for ix in x_ix if remaining[ix] > x_ix.count(ix)}
+            arrays[i], inputs[i] = _trace_and_sum_single(x, x_ix, keep)
+
+        for pi, pj in self.path:
+            pi, pj = sorted((pi, pj))
+            y, y_ix = arrays.pop(pj), inputs.pop(pj)
+            x, x_ix = arrays.pop(pi), inputs.pop(pi)
+
+            for ix in x_ix + y_ix:
+                remaining[ix] -= 1
+            keep = {ix for ix in x_ix + y_ix if remaining[ix] > 0}
+
+            z, z_ix = _pairwise_contract_step(x, y, x_ix, y_ix, keep)
+            for ix in z_ix:
+                remaining[ix] += 1
+
+            arrays.append(z)
+            inputs.append(z_ix)
+
+        z, z_ix = _trace_and_sum_single(arrays[0], inputs[0], set(self.output))
+        if z_ix != self.output:
+            z = z.transpose(*map(z_ix.index, self.output))
+        return z
+
+    def __repr__(self):
+        return "<PairwiseContractExpression> with {} inputs".format(
+            len(self.inputs))
 
 
 class HuskArray(np.ndarray):
@@ -116,13 +448,831 @@ class HuskArray(np.ndarray):
         self.shape = shape
 
 
-@functools.lru_cache(4096)
-def cached_einsum_expr(contract_str, *shapes):
-    return einsum_expression(contract_str, *shapes,
-                             memory_limit=2**28, optimize='greedy')
+# --------------------------------------------------------------------------- #
+#                         Contraction path optimizers                         #
+# --------------------------------------------------------------------------- #
+
+def _pairwise_flops(involved, new_inds, size_dict):
+    """The number of scalar operations needed for a single contraction
+    involving indices ``involved``, producing ``new_inds``.
+    """
+    flops = prod(size_dict[ix] for ix in involved)
+    if involved - new_inds:
+        # multiply *and* add
+        flops *= 2
+    return flops
+
+
+def _path_flops(inputs, output, size_dict, path):
+    """The total number of scalar operations needed to contract ``inputs``
+    into ``output`` following ``path``.
+    """
+    return sum(_pairwise_flops(set.union(*contracted), new_inds, size_dict)
+               for _, contracted, new_inds in
+               _path_contractions(inputs, output, path))
+
+
+class RandomGreedyOptimizer(object):
+    """A contraction path optimizer that repeatedly runs a randomized version
+    of the greedy pairwise algorithm, keeping the path with the fewest flops.
+    The search is bounded both in number of repeats and time, and the best
+    path found is memoized in the contraction path cache, so the search cost
+    is only paid once per contraction topology.
+
+    Parameters
+    ----------
+    max_repeats : int, optional
+        The maximum number of randomized paths to try.
+    max_time : float, optional
+        The maximum time in seconds to spend searching.
+    temperature : float, optional
+        How much to randomly perturb the cost of each candidate contraction,
+        relative to its size.
+    seed : int, optional
+        A seed for the random number generator.
+    """
+
+    def __init__(self, max_repeats=32, max_time=1.0, temperature=0.3,
+                 seed=None):
+        self.max_repeats = max_repeats
+        self.max_time = max_time
+        self.temperature = temperature
+        self.seed = seed
+
+    @property
+    def key(self):
+        """A string identifying the paths this optimizer finds, used to key
+        the contraction path cache.
+        """
+        return "random-greedy-{}-{}-{}-{}".format(
+            self.max_repeats, self.max_time, self.temperature, self.seed)
+
+    def __eq__(self, other):
+        return (isinstance(other, RandomGreedyOptimizer) and
+                self.key == other.key)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __call__(self, inputs, output, size_dict, initial_paths=()):
+        """Find the best path for contracting ``inputs`` into ``output``.
+
+        Parameters
+        ----------
+        inputs : sequence of str
+            The indices of each tensor.
+        output : str
+            The output indices.
+        size_dict : dict
+            Mapping of each index to its size.
+        initial_paths : sequence of paths, optional
+            Any paths already known, which the search must improve on.
+
+        Returns
+        -------
+        tuple of tuple of int
+        """
+        rng = random.Random(self.seed)
+        t0 = time.time()
+
+        def trials():
+            yield from initial_paths
+            yield _greedy_pairwise_path(inputs, output, size_dict)
+            for _ in range(self.max_repeats):
+                if time.time() - t0 > self.max_time:
+                    break
+                yield _greedy_pairwise_path(inputs, output, size_dict,
+                                            self.temperature, rng)
+
+        best_flops, best_path = float('inf'), None
+        for path in trials():
+            flops = _path_flops(inputs, output, size_dict, path)
+            if flops < best_flops:
+                best_flops, best_path = flops, path
+
+        return tuple(best_path)
+
+    def __repr__(self):
+        return ("RandomGreedyOptimizer(max_repeats={}, max_time={}, "
+                "temperature={}, seed={})".format(
+                    self.max_repeats, self.max_time,
+                    self.temperature, self.seed))
+
+
+# named optimizers other than those provided by ``opt_einsum``
+_OPTIMIZERS = {
+    'random-greedy': RandomGreedyOptimizer(),
+}
+
+_CONTRACT_STRATEGY = os.environ.get('QUIMB_CONTRACT_STRATEGY', 'greedy')
+
+
+def get_contract_strategy():
+    """Get the default contraction path optimizer used by
+    :func:`tensor_contract` and ``TensorNetwork.contract``.
+    """
+    return _CONTRACT_STRATEGY
+
+
+def set_contract_strategy(strategy):
+    """Set the default contraction path optimizer used by
+    :func:`tensor_contract` and ``TensorNetwork.contract``. The initial
+    default can be set with the environment variable
+    ``QUIMB_CONTRACT_STRATEGY``.
+
+    Parameters
+    ----------
+    strategy : str or RandomGreedyOptimizer
+        The optimizer, e.g. ``'greedy'`` (the default), ``'optimal'`` or
+        ``'random-greedy'``, or an explicitly configured
+        :class:`RandomGreedyOptimizer`.
+    """
+    global _CONTRACT_STRATEGY
+    _optimizer_key(strategy)  # check it is valid
+    _CONTRACT_STRATEGY = strategy
+
+
+@contextlib.contextmanager
+def contract_strategy(strategy):
+    """Context manager to temporarily set the default contraction path
+    optimizer, see :func:`set_contract_strategy`.
+    """
+    old_strategy = get_contract_strategy()
+    set_contract_strategy(strategy)
+    try:
+        yield
+    finally:
+        set_contract_strategy(old_strategy)
+
+
+def _optimizer_key(optimize):
+    """Get the string that identifies ``optimize`` in the path cache.
+    """
+    if isinstance(optimize, str):
+        return optimize
+    if isinstance(optimize, RandomGreedyOptimizer):
+        return optimize.key
+    raise TypeError("Contraction path optimizer should be a string or a "
+                    "``RandomGreedyOptimizer``, got {}.".format(optimize))
+
+
+def _opt_einsum_path_fn(optimize):
+    """Get the ``opt_einsum`` path finding function named ``optimize``.
+    """
+    import opt_einsum.paths
+
+    try:
+        return opt_einsum.paths.get_path_fn(optimize)
+    except AttributeError:
+        # older versions of ``opt_einsum`` without a registry of path finders
+        try:
+            return getattr(opt_einsum.paths, optimize)
+        except AttributeError:
+            raise ValueError("Path optimizer '{}' not found in this version "
+                             "of ``opt_einsum``.".format(optimize))
+
+
+def _compile_path(contract_str, shapes, path):
+    """Compile a contraction expression for ``contract_str`` that follows
+    ``path``.
+    """
+    if _is_large_contract_str(contract_str):
+        return PairwiseContractExpression(contract_str, path)
+    return einsum_expression(contract_str, *shapes, optimize=list(path))
+
+
+# --------------------------------------------------------------------------- #
+#                          Contraction path caching                           #
+# --------------------------------------------------------------------------- #
+
+def _path_cache_entry_nbytes(key, path):
+    """Estimate the memory footprint of a single path cache entry, including
+    the compiled expression, which roughly holds a copy of the contract string
+    and a sub-expression per pairwise contraction.
+    """
+    _, contract_str, *shapes = key
+    nbytes = sys.getsizeof(contract_str) * 2
+    nbytes += sum(sys.getsizeof(s) for s in shapes)
+    nbytes += sum(sys.getsizeof(p) for p in path) * 4
+    return nbytes
+
+
+class ContractionPathCache(object):
+    """A least-recently-used cache of contraction paths, keyed on the path
+    optimizer, the contract string and the shapes of the operands. The cache
+    is bounded both in its number of entries and its (estimated) memory
+    footprint. It can optionally be backed by a file on disk: any existing
+    paths in the file are loaded on creation, and any newly found paths are
+    appended to it, so that other processes, or later runs, can warm up from
+    the same file.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum number of paths to keep.
+    max_bytes : int, optional
+        The maximum estimated memory to use for paths and their compiled
+        expressions.
+    filename : str, optional
+        If given, a file to load paths from and store new paths to.
+
+    Attributes
+    ----------
+    hits : int
+        How many times a path has been found in the cache.
+    misses : int
+        How many times a path has had to be found from scratch.
+    evictions : int
+        How many paths have been dropped to keep the cache within its bounds.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=2**26, filename=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.filename = filename
+
+        # key -> [path, nbytes, expression or None]
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # the keys already in the backing file, which needn't be written again
+        self._persisted = set()
+
+        if (filename is not None) and os.path.exists(filename):
+            self.load(filename)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        """The estimated current memory footprint of this cache.
+        """
+        return self._nbytes
+
+    def _insert(self, key, path, expression=None):
+        """Add a path to the cache, evicting the oldest entries as necessary.
+        """
+        nbytes = _path_cache_entry_nbytes(key, path)
+
+        try:
+            old_nbytes = self._entries.pop(key)[1]
+            self._nbytes -= old_nbytes
+        except KeyError:
+            pass
+
+        self._entries[key] = [path, nbytes, expression]
+        self._nbytes += nbytes
+
+        # always keep at least the newest entry
+        while (len(self._entries) > 1 and
+               ((len(self._entries) > self.max_entries) or
+                (self._nbytes > self.max_bytes))):
+            _, (_, old_nbytes, _) = self._entries.popitem(last=False)
+            self._nbytes -= old_nbytes
+            self.evictions += 1
+
+    def _find_expression(self, contract_str, *shapes, optimize='greedy'):
+        """Find a new contraction expression and its path from scratch.
+        """
+        if optimize == 'greedy':
+            if _is_large_contract_str(contract_str):
+                inputs, output = _parse_contract_str(contract_str)
+                size_dict = dict(zip(concat(inputs), concat(shapes)))
+                path = _greedy_pairwise_path(inputs, output, size_dict)
+                return path, PairwiseContractExpression(contract_str, path)
+
+            expression = einsum_expression(contract_str, *shapes,
+                                           memory_limit=2**28,
+                                           optimize='greedy')
+            path = tuple(tuple(c[0]) for c in expression.contraction_list)
+            return path, expression
+
+        optimize = _OPTIMIZERS.get(optimize, optimize)
+
+        if isinstance(optimize, RandomGreedyOptimizer):
+            # the search should never do worse than the plain greedy path
+            inputs, output = _parse_contract_str(contract_str)
+            size_dict = dict(zip(concat(inputs), concat(shapes)))
+            greedy_path = self.get_path(contract_str, *shapes)
+            path = optimize(inputs, output, size_dict,
+                            initial_paths=(greedy_path,))
+            return path, _compile_path(contract_str, shapes, path)
+
+        # any other path finder provided by ``opt_einsum``, e.g. 'optimal'
+        if _is_large_contract_str(contract_str):
+            # too many indices for ``einsum`` -> call the path finder directly
+            inputs, output = _parse_contract_str(contract_str)
+            size_dict = dict(zip(concat(inputs), concat(shapes)))
+            path = _opt_einsum_path_fn(optimize)(
+                [set(term) for term in inputs], set(output), size_dict, 2**28)
+            path = tuple(map(tuple, path))
+            return path, _compile_path(contract_str, shapes, path)
+
+        expression = einsum_expression(contract_str, *shapes,
+                                       memory_limit=2**28, optimize=optimize)
+        path = tuple(tuple(c[0]) for c in expression.contraction_list)
+        return path, expression
+
+    def get_path(self, contract_str, *shapes, optimize='greedy'):
+        """Get the contraction path for ``contract_str`` and ``shapes``,
+        finding and caching it if necessary.
+
+        Parameters
+        ----------
+        contract_str : str
+            The contract string.
+        shapes : sequence of tuple of int
+            The shape of each operand.
+        optimize : str or RandomGreedyOptimizer, optional
+            The path optimizer to use.
+
+        Returns
+        -------
+        tuple of tuple of int
+            The path, in the ``opt_einsum`` pairwise format.
+        """
+        return self._get_entry(contract_str, *shapes, optimize=optimize)[0]
+
+    def get_expression(self, contract_str, *shapes, optimize='greedy'):
+        """Get the compiled contraction expression for ``contract_str`` and
+        ``shapes``, finding and caching its path if necessary.
+        """
+        entry = self._get_entry(contract_str, *shapes, optimize=optimize)
+
+        if entry[2] is None:
+            # path was loaded from disk -> only need to compile it
+            entry[2] = _compile_path(contract_str, shapes, entry[0])
+        return entry[2]
+
+    def _get_entry(self, contract_str, *shapes, optimize='greedy'):
+        key = (_optimizer_key(optimize), contract_str, *shapes)
+
+        with self._lock:
+            try:
+                entry = self._entries[key]
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            except KeyError:
+                self.misses += 1
+
+        path, expression = self._find_expression(contract_str, *shapes,
+                                                 optimize=optimize)
+
+        with self._lock:
+            self._insert(key, path, expression)
+            entry = self._entries[key]
+
+        if (self.filename is not None) and (key not in self._persisted):
+            self._append_to_file(key, path)
+            self._persisted.add(key)
+            if len(self._persisted) > 2 * self.max_entries:
+                # mostly evicted paths -> compact to those still cached
+                self.save()
+
+        return entry
+
+    def _append_to_file(self, key, path):
+        """Write a single new path to the end of the backing file.
+        """
+        record = pickle.dumps((key, path), protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self.filename, 'ab') as f:
+            f.write(record)
 
+    def load(self, filename=None):
+        """Warm this cache with the paths stored in ``filename``, defaulting
+        to the backing file. An incompletely written final record, e.g. from
+        a killed process, is ignored. If the backing file holds duplicate
+        paths, or more than ``max_entries``, it is compacted.
 
-def tensor_contract(*tensors, output_inds=None, return_expression=False):
+        Returns
+        -------
+        int
+            The number of paths loaded.
+        """
+        if filename is None:
+            filename = self.filename
+
+        records = []
+        with open(filename, 'rb') as f:
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError,
+                        ValueError, TypeError):
+                    break
+
+        with self._lock:
+            for key, path in records:
+                self._insert(key, path)
+
+        if filename == self.filename:
+            keys = {key for key, _ in records}
+            if (len(records) > len(keys)) or (len(records) > self.max_entries):
+                # duplicate or evicted paths -> keep only those now cached
+                self.save()
+            else:
+                self._persisted |= keys
+
+        return len(records)
+
+    def save(self, filename=None):
+        """Write every path currently in this cache to ``filename``,
+        defaulting to the backing file, which is compacted in the process.
+        The file is replaced atomically.
+        """
+        if filename is None:
+            filename = self.filename
+
+        with self._lock:
+            records = [(key, entry[0]) for key, entry in self._entries.items()]
+
+        tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+        with open(tmp_filename, 'wb') as f:
+            for record in records:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, filename)
+
+        if filename == self.filename:
+            self._persisted = {key for key, _ in records}
+
+    def clear(self, reset_stats=True):
+        """Remove every path from this cache (but not its backing file).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            if reset_stats:
+                self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Get the current statistics of this cache.
+
+        Returns
+        -------
+        dict
+            With keys ``'hits'``, ``'misses'``, ``'evictions'``,
+            ``'entries'``, ``'nbytes'`` and ``'hit_rate'``.
+        """
+        num_lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'nbytes': self._nbytes,
+            'hit_rate': self.hits / num_lookups if num_lookups else 0.0,
+        }
+
+    def __repr__(self):
+        return ("ContractionPathCache(entries={}, max_entries={}, nbytes={}, "
+                "max_bytes={}, filename={})".format(
+                    len(self), self.max_entries, self.nbytes,
+                    self.max_bytes, self.filename))
+
+
+_CONTRACT_PATH_CACHE = ContractionPathCache(
+    filename=os.environ.get('QUIMB_CONTRACT_PATH_CACHE', None))
+
+
+def get_contract_path_cache():
+    """Get the global cache of contraction paths used by
+    :func:`tensor_contract`.
+    """
+    return _CONTRACT_PATH_CACHE
+
+
+def set_contract_path_cache(max_entries=4096, max_bytes=2**26,
+                            filename=None):
+    """Replace the global cache of contraction paths used by
+    :func:`tensor_contract`. The default cache can be backed by a file on disk
+    at import time by setting the environment variable
+    ``QUIMB_CONTRACT_PATH_CACHE``.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum number of paths to keep.
+    max_bytes : int, optional
+        The maximum estimated memory to use for paths and their compiled
+        expressions.
+    filename : str, optional
+        If given, warm the cache from this file, and append any newly found
+        paths to it.
+
+    Returns
+    -------
+    ContractionPathCache
+    """
+    global _CONTRACT_PATH_CACHE
+    _CONTRACT_PATH_CACHE = ContractionPathCache(
+        max_entries=max_entries, max_bytes=max_bytes, filename=filename)
+    return _CONTRACT_PATH_CACHE
+
+
+def cached_einsum_expr(contract_str, *shapes, optimize='greedy'):
+    return _CONTRACT_PATH_CACHE.get_expression(contract_str, *shapes,
+                                               optimize=optimize)
+
+
+# --------------------------------------------------------------------------- #
+#                   Sliced contractions with bounded memory                   #
+# --------------------------------------------------------------------------- #
+
+def _path_contractions(inputs, output, path):
+    """Simulate contracting ``inputs`` into ``output`` following ``path``.
+
+    Parameters
+    ----------
+    inputs : sequence of str
+        The indices of each tensor.
+    output : str
+        The output indices.
+    path : sequence of tuple of int
+        The path, in the ``opt_einsum`` positional format.
+
+    Yields
+    ------
+    step : tuple of int
+        The positions of the tensors contracted.
+    contracted : list of set
+        The indices of each tensor contracted.
+    new_inds : set
+        The indices of the resulting intermediate.
+    """
+    inputs = [set(ix) for ix in inputs]
+    remaining = frequencies(concat(inputs))
+    output = set(output)
+
+    for step in path:
+        contracted = [inputs.pop(p) for p in sorted(step, reverse=True)]
+        for inds in contracted:
+            for ix in inds:
+                remaining[ix] -= 1
+
+        new_inds = {ix for ix in set.union(*contracted)
+                    if remaining[ix] > 0 or ix in output}
+        for ix in new_inds:
+            remaining[ix] += 1
+
+        inputs.append(new_inds)
+        yield step, contracted, new_inds
+
+
+def _path_intermediate_sizes(inputs, output, size_dict, path):
+    """Find the size of every intermediate produced by contracting
+    ``inputs`` into ``output`` following ``path``.
+
+    Returns
+    -------
+    list of int
+    """
+    return [prod(size_dict[ix] for ix in new_inds)
+            for _, _, new_inds in _path_contractions(inputs, output, path)]
+
+
+def _path_peak_size(inputs, output, size_dict, path):
+    """The size of the largest intermediate, including the output, produced
+    by contracting ``inputs`` following ``path``.
+    """
+    out_size = prod(size_dict[ix] for ix in output)
+    return max(out_size, *_path_intermediate_sizes(
+        inputs, output, size_dict, path))
+
+
+def _find_sliced_inds(inputs, output, size_dict, path, max_size):
+    """Greedily choose inner indices to slice over until the largest
+    intermediate of ``path`` has at most ``max_size`` elements. At each step
+    the index that most reduces the peak size is chosen, with ties broken
+    by the total size of all intermediates.
+
+    Returns
+    -------
+    sliced : tuple of str
+        The indices to slice over.
+    """
+    size_dict = dict(size_dict)
+    out_size = prod(size_dict[ix] for ix in output)
+    candidates = sorted({ix for ix in concat(inputs) if ix not in output})
+    sliced = []
+
+    def score():
+        sizes = _path_intermediate_sizes(inputs, output, size_dict, path)
+        return max(out_size, *sizes), sum(sizes)
+
+    def score_if_sliced(ix):
+        d = size_dict[ix]
+        size_dict[ix] = 1
+        new_score = score()
+        size_dict[ix] = d
+        return new_score, ix
+
+    current = score()
+
+    while current[0] > max_size:
+        if not candidates:
+            raise ValueError(
+                "Can't perform this contraction with at most {} elements in "
+                "any intermediate - the smallest possible peak is {}."
+                "".format(max_size, current[0]))
+
+        current, ix = min(map(score_if_sliced, candidates))
+        size_dict[ix] = 1
+        candidates.remove(ix)
+        sliced.append(ix)
+
+    return tuple(sliced)
+
+
+class SlicedContractExpression(object):
+    """A callable contraction expression that bounds the peak memory by
+    explicitly summing over some of the inner indices, one 'slice' at a
+    time.
+
+    Parameters
+    ----------
+    contract_str : str
+        The full contract string.
+    path : sequence of tuple of int
+        The pairwise contraction path, in the ``opt_einsum`` format.
+    shapes : sequence of tuple of int
+        The shapes of the arrays to contract.
+    sliced : sequence of str
+        The index symbols to slice over.
+    """
+
+    def __init__(self, contract_str, path, shapes, sliced):
+        self.contract_str = contract_str
+        self.path = tuple(path)
+        self.sliced = tuple(sliced)
+
+        inputs, output = _parse_contract_str(contract_str)
+        size_dict = dict(zip(concat(inputs), concat(shapes)))
+        self.sliced_sizes = tuple(size_dict[ix] for ix in self.sliced)
+        self.nslices = prod(self.sliced_sizes)
+
+        # positions of each sliced index in each input array, of which there
+        #     are several if it is traced over
+        self._locs = [[tuple(n for n, jx in enumerate(ix_term) if jx == ix)
+                       for ix in self.sliced] for ix_term in inputs]
+        self._sliced_inputs = ["".join(ix for ix in term
+                                       if ix not in self.sliced)
+                               for term in inputs]
+        sliced_str = ",".join(self._sliced_inputs) + "->" + output
+        sliced_shapes = [tuple(d for ix, d in zip(term, shape)
+                               if ix not in self.sliced)
+                         for term, shape in zip(inputs, shapes)]
+
+        self._expression = _compile_path(sliced_str, sliced_shapes, path)
+
+    def _slice_arrays(self, arrays, values):
+        """Select the slice ``values`` of each of ``arrays``.
+        """
+        for array, locs in zip(arrays, self._locs):
+            if not any(locs):
+                yield array
+                continue
+
+            selector = [slice(None)] * array.ndim
+            for loc, v in zip(locs, values):
+                for n in loc:
+                    selector[n] = v
+            yield array[tuple(selector)]
+
+    def contract_slice(self, arrays, values):
+        """Contract the single slice given by ``values``, one for each sliced
+        index.
+        """
+        return self._expression(*self._slice_arrays(arrays, values))
+
+    def _contract_slices(self, arrays, start=0, step=1):
+        """Sum the contractions of every ``step``-th slice, beginning with
+        the ``start``-th.
+        """
+        all_values = itertools.islice(
+            itertools.product(*map(range, self.sliced_sizes)),
+            start, None, step)
+        return functools.reduce(operator.add, (
+            self.contract_slice(arrays, v) for v in all_values))
+
+    def __call__(self, *arrays, parallel=False):
+        """Perform the sliced contraction.
+
+        Parameters
+        ----------
+        arrays : sequence of numpy.ndarray
+            The arrays to contract.
+        parallel : bool or int, optional
+            Whether to contract the slices in parallel using a thread pool,
+            and if an int, how many threads to use.
+        """
+        if not self.sliced:
+            return self._expression(*arrays)
+
+        if not parallel:
+            return self._contract_slices(arrays)
+
+        from ..accel import get_thread_pool, _NUM_THREAD_WORKERS
+        nworkers = _NUM_THREAD_WORKERS if parallel is True else parallel
+        nworkers = min(nworkers, self.nslices)
+        pool = get_thread_pool(None if parallel is True else parallel)
+
+        # each worker sums its own share of the slices, so that only one
+        #     partial result per worker is held at once
+        futures = [pool.submit(self._contract_slices, arrays, w, nworkers)
+                   for w in range(nworkers)]
+        return functools.reduce(operator.add, (f.result() for f in futures))
+
+    def __repr__(self):
+        return ("<SlicedContractExpression> with {} inputs, slicing over {} "
+                "indices into {} slices".format(len(self._locs),
+                                                len(self.sliced),
+                                                self.nslices))
+
+
+@functools.lru_cache(128)
+def cached_sliced_expr(contract_str, max_size, *shapes, optimize='greedy'):
+    """Get a sliced contraction expression for ``contract_str`` whose largest
+    intermediate has at most ``max_size`` elements. The path itself comes
+    from the global contraction path cache.
+    """
+    path = _CONTRACT_PATH_CACHE.get_path(contract_str, *shapes,
+                                         optimize=optimize)
+    inputs, output = _parse_contract_str(contract_str)
+    size_dict = dict(zip(concat(inputs), concat(shapes)))
+    sliced = _find_sliced_inds(inputs, output, size_dict, path, max_size)
+    return SlicedContractExpression(contract_str, path, shapes, sliced)
+
+
+def _contraction_steps(i_ix, shapes, output_inds, optimize):
+    """Work out the cost of each pairwise contraction needed to contract
+    tensors with indices ``i_ix`` and shapes ``shapes``.
+
+    Returns
+    -------
+    o_ix : tuple
+        The output indices.
+    o_shape : tuple of int
+        The output shape.
+    steps : list of dict
+        The ``'inds'`` of the tensors contracted, and the ``'output'``
+        indices, ``'flops'`` and ``'size'`` of each contraction, in order.
+    max_live : int
+        The largest total size of intermediates alive at once.
+    """
+    order, o_ix, contract_str = _canonical_contract_str(i_ix, shapes,
+                                                        output_inds)
+    i_ix = [i_ix[i] for i in order]
+    shapes = [shapes[i] for i in order]
+
+    inputs, output = _parse_contract_str(contract_str)
+    size_dict = dict(zip(concat(inputs), concat(shapes)))
+    name_of = dict(zip(concat(inputs), concat(i_ix)))
+    position = {ix: n for n, ix in enumerate(unique(concat(inputs)))}
+
+    def names(inds):
+        return tuple(name_of[ix] for ix in sorted(inds, key=position.get))
+
+    path = _CONTRACT_PATH_CACHE.get_path(contract_str, *shapes,
+                                         optimize=optimize)
+
+    # track which operands are intermediates, and their sizes
+    sizes = [None] * len(inputs)
+    live = max_live = 0
+    steps = []
+
+    for step, contracted, new_inds in _path_contractions(inputs, output,
+                                                          path):
+        freed = sum(sz for sz in (sizes.pop(p) for p in
+                                  sorted(step, reverse=True)) if sz)
+
+        new_size = prod(size_dict[ix] for ix in new_inds)
+        flops = _pairwise_flops(set.union(*contracted), new_inds, size_dict)
+
+        max_live = max(max_live, live + new_size)
+        live += new_size - freed
+        sizes.append(new_size)
+
+        steps.append({'inds': tuple(map(names, reversed(contracted))),
+                      'output': names(new_inds),
+                      'flops': flops,
+                      'size': new_size})
+
+    o_shape = tuple(size_dict[ix] for ix in output)
+    return o_ix, o_shape, steps, max_live
+
+
+def tensor_contract(*tensors, output_inds=None, return_expression=False,
+                    max_memory=None, parallel=False, optimize=None):
     """Efficiently contract multiple tensors, combining their tags.
 
     Parameters
@@ -135,40 +1285,190 @@ def tensor_contract(*tensors, output_inds=None, return_expression=False):
     return_expression : bool, optional
         If ``True``, return the expression that performs the contraction, for
         e.g. inspection of the order chosen.
+    max_memory : int, optional
+        If given, the maximum size in bytes of any intermediate (including
+        the output). Inner indices are then sliced over, with each slice
+        contracted independently and the results summed, until the
+        contraction fits within this budget.
+    parallel : bool or int, optional
+        If slicing, whether to contract the slices in parallel using a thread
+        pool, and if an int, how many threads to use.
+    optimize : str or RandomGreedyOptimizer, optional
+        The contraction path optimizer to use, e.g. ``'greedy'``,
+        ``'optimal'`` or ``'random-greedy'``. Defaults to the global
+        strategy, see :func:`set_contract_strategy`.
 
     Returns
     -------
     scalar or Tensor
     """
-    i_ix = tuple(t.inds for t in tensors)  # input indices per tensor
+    order, o_ix, expression = _find_contract_expression(
+        tensors, output_inds, max_memory, optimize)
+
+    if return_expression:
+        return expression
+
+    tensors = [tensors[i] for i in order]
+    if max_memory is None:
+        o_array = expression(*(t.data for t in tensors))
+    else:
+        o_array = expression(*(t.data for t in tensors), parallel=parallel)
+
+    if not o_ix:
+        if isinstance(o_array, BlockSparseArray):
+            o_array = o_array.to_dense()
+        if isinstance(o_array, np.ndarray):
+            o_array = o_array.item()
+        return realify_scalar(o_array)
+
+    # unison of all tags
+    o_tags = set_join(t.tags for t in tensors)
+
+    return Tensor(data=o_array, inds=o_ix, tags=o_tags)
+
+
+def _canonical_contract_str(i_ix, shapes, output_inds=None):
+    """Find the canonical order of, and contract string for, tensors with
+    indices ``i_ix`` and shapes ``shapes``.
+
+    Returns
+    -------
+    order : list of int
+        The canonical order of the tensors.
+    o_ix : tuple
+        The output indices.
+    contract_str : str
+        The contract string, for the tensors in canonical order.
+    """
     a_ix = tuple(concat(i_ix))  # list of all input indices
 
     if output_inds is None:
         # sort output indices  by input order for efficiency and consistency
         o_ix = tuple(x for x in a_ix if x in [*_gen_output_inds(a_ix)])
     else:
-        o_ix = output_inds
+        o_ix = tuple(output_inds)
 
-    # possibly map indices into the 0-52 range needed by einsum
-    contract_str = _maybe_map_indices_to_alphabet([*unique(a_ix)], i_ix, o_ix)
+    # put the tensors in an order that only depends on their structure
+    order = _canonical_tensor_order(i_ix, shapes, o_ix)
+    i_ix = [i_ix[i] for i in order]
 
-    # perform the contraction
-    expression = cached_einsum_expr(contract_str, *(t.shape for t in tensors))
+    # map indices into the 0-52 range needed by einsum, or beyond
+    contract_str = _map_indices_to_alphabet([*unique(concat(i_ix))], i_ix, o_ix)
 
-    if return_expression:
-        return expression
+    return order, o_ix, contract_str
 
-    o_array = expression(*(t.data for t in tensors))
 
-    if not o_ix:
-        if isinstance(o_array, np.ndarray):
-            o_array = np.asscalar(o_array)
-        return realify_scalar(o_array)
+def _find_contract_expression(tensors, output_inds=None, max_memory=None,
+                              optimize=None):
+    """Find everything needed to contract ``tensors``.
 
-    # unison of all tags
-    o_tags = set_join(t.tags for t in tensors)
+    Returns
+    -------
+    order : list of int
+        The canonical order in which to supply the tensors' arrays.
+    o_ix : tuple
+        The output indices.
+    expression : callable
+        The contraction expression, possibly sliced.
+    """
+    order, o_ix, contract_str = _canonical_contract_str(
+        tuple(t.inds for t in tensors), [t.shape for t in tensors],
+        output_inds)
+
+    if optimize is None:
+        optimize = _CONTRACT_STRATEGY
+
+    shapes = (tensors[i].shape for i in order)
+    if any(isinstance(t.data, BlockSparseArray) for t in tensors):
+        # block sparse arrays are contracted blockwise, pair by pair
+        if max_memory is not None:
+            raise ValueError("``max_memory`` is not supported for block "
+                             "sparse tensors.")
+        path = _CONTRACT_PATH_CACHE.get_path(contract_str, *shapes,
+                                             optimize=optimize)
+        expression = PairwiseContractExpression(contract_str, path)
+    elif max_memory is None:
+        expression = cached_einsum_expr(contract_str, *shapes,
+                                        optimize=optimize)
+    else:
+        itemsize = np.result_type(*(t.dtype for t in tensors)).itemsize
+        expression = cached_sliced_expr(contract_str, max_memory // itemsize,
+                                        *shapes, optimize=optimize)
+
+    return order, o_ix, expression
+
+
+class ContractionPlan(object):
+    """A compiled contraction of a fixed set of tensors, that can be
+    repeatedly called with new arrays of the same shapes. All the index
+    parsing, relabelling and path lookup is done once, upfront.
+
+    Parameters
+    ----------
+    tensors : sequence of Tensor
+        Template tensors defining the contraction. Only their indices,
+        shapes and dtypes are used.
+    output_inds : sequence, optional
+        The desired order of output indices, else defaults to the order they
+        occur in the input indices.
+    max_memory : int, optional
+        If given, slice the contraction so that no intermediate is larger than
+        this many bytes, see :func:`tensor_contract`.
+    parallel : bool or int, optional
+        If slicing, whether to contract the slices in parallel.
+    optimize : str or RandomGreedyOptimizer, optional
+        The contraction path optimizer, defaults to the global strategy.
+
+    Attributes
+    ----------
+    output_inds : tuple
+        The indices of the output array.
+    expression : callable
+        The underlying contraction expression.
+    """
+
+    def __init__(self, tensors, output_inds=None, max_memory=None,
+                 parallel=False, optimize=None):
+        tensors = tuple(tensors)
+        self.inds = tuple(t.inds for t in tensors)
+        self.shapes = tuple(t.shape for t in tensors)
+        self.tags = set_join(t.tags for t in tensors)
+        self.order, self.output_inds, self.expression = \
+            _find_contract_expression(tensors, output_inds, max_memory,
+                                      optimize)
+        self._opts = {} if max_memory is None else {'parallel': parallel}
+
+    def __call__(self, *arrays):
+        """Contract ``arrays``, which should be supplied in the same order as
+        the tensors the plan was compiled from.
+
+        Returns
+        -------
+        numpy.ndarray or scalar
+        """
+        o_array = self.expression(*(arrays[i] for i in self.order),
+                                  **self._opts)
+
+        if not self.output_inds:
+            if isinstance(o_array, np.ndarray):
+                o_array = o_array.item()
+            return realify_scalar(o_array)
+
+        return o_array
+
+    def contract(self, *tensors):
+        """Contract ``tensors``, which should match those the plan was
+        compiled from, returning a ``Tensor`` or scalar.
+        """
+        o_array = self(*(t.data for t in tensors))
+        if not self.output_inds:
+            return o_array
+        return Tensor(data=o_array, inds=self.output_inds,
+                      tags=set_join(t.tags for t in tensors))
 
-    return Tensor(data=o_array, inds=o_ix, tags=o_tags)
+    def __repr__(self):
+        return "<ContractionPlan>(ntensors={}, output_inds={})".format(
+            len(self.inds), self.output_inds)
 
 
 # generate a random base to avoid collisions on difference processes ...
@@ -218,6 +1518,7 @@ def _trim_singular_vals(s, cutoff, cutoff_mode):
 def _renorm_singular_vals(s, n_chi):
     """Find the normalization constant for ``s`` such that the new sum squared
     of the ``n_chi`` largest values equals the sum squared of all the old ones.
+    Its inverse square, subtracted from one, is the discarded weight.
     """
     s_tot_keep = 0.0
     s_tot_lose = 0.0
@@ -233,6 +1534,8 @@ def _renorm_singular_vals(s, n_chi):
 
 @njit  # pragma: no cover
 def _trim_and_renorm_SVD(U, s, V, cutoff, cutoff_mode, max_bond, absorb):
+    discarded = 0.0
+
     if cutoff > 0.0:
         n_chi = _trim_singular_vals(s, cutoff, cutoff_mode)
 
@@ -241,6 +1544,7 @@ def _trim_and_renorm_SVD(U, s, V, cutoff, cutoff_mode, max_bond, absorb):
 
         if n_chi < s.size:
             norm = _renorm_singular_vals(s, n_chi)
+            discarded = 1 - norm**-2
             s = s[:n_chi] * norm
             U = U[..., :n_chi]
             V = V[:n_chi, ...]
@@ -254,12 +1558,13 @@ def _trim_and_renorm_SVD(U, s, V, cutoff, cutoff_mode, max_bond, absorb):
         U *= s.reshape((1, -1))
         V *= s.reshape((-1, 1))
 
-    return U, V
+    return U, V, discarded
 
 
 @njit  # pragma: no cover
 def _array_split_svd(x, cutoff=-1.0, cutoff_mode=3, max_bond=-1, absorb=0):
-    """SVD-decomposition.
+    """SVD-decomposition, also returning the relative weight of the discarded
+    singular values.
     """
     U, s, V = np.linalg.svd(x, full_matrices=False)
     return _trim_and_renorm_SVD(U, s, V, cutoff, cutoff_mode, max_bond, absorb)
@@ -317,6 +1622,7 @@ def _array_split_eig(x, cutoff=-1.0, cutoff_mode=3, max_bond=-1, absorb=0):
             V /= sqrts.reshape((-1, 1))
 
     # eigh produces ascending eigenvalue order -> slice opposite to svd
+    discarded = 0.0
     if cutoff > 0.0:
         s = s2[::-1]**0.5
         n_chi = _trim_singular_vals(s, cutoff, cutoff_mode)
@@ -326,6 +1632,7 @@ def _array_split_eig(x, cutoff=-1.0, cutoff_mode=3, max_bond=-1, absorb=0):
 
         if n_chi < s.size:
             norm = _renorm_singular_vals(s, n_chi)
+            discarded = 1 - norm**-2
             U = U[..., -n_chi:]
             V = V[-n_chi:, ...]
 
@@ -337,7 +1644,7 @@ def _array_split_eig(x, cutoff=-1.0, cutoff_mode=3, max_bond=-1, absorb=0):
             else:
                 V *= norm
 
-    return U, V
+    return U, V, discarded
 
 
 @njit
@@ -391,12 +1698,144 @@ def _array_split_isvd(x, cutoff=0.0, cutoff_mode=3, max_bond=-1, absorb=0):
     return _trim_and_renorm_SVD(U, s, V, cutoff, cutoff_mode, max_bond, absorb)
 
 
+def _rsvd_matmul(x, y, adjoint=False):
+    """Compute ``x @ y``, or ``x.H @ y`` if ``adjoint``, where ``x`` can be
+    an array or linear operator.
+    """
+    if isinstance(x, np.ndarray):
+        return (x.conj().T if adjoint else x) @ y
+    return x.rmatmat(y) if adjoint else x.matmat(y)
+
+
+def _rsvd_gaussian(shape, dtype):
+    g = np.random.randn(*shape)
+    if np.issubdtype(dtype, np.complexfloating):
+        g = g + 1j * np.random.randn(*shape)
+    return g
+
+
+def _rsvd(x, k, oversample, n_iter):
+    """Find the truncated SVD of ``x`` within a randomized range of size
+    ``k + oversample``, refined with ``n_iter`` power iterations. Also
+    return an estimate of the sum squared of the singular values that lie
+    outside of this range.
+    """
+    m, n = x.shape
+    l = min(k + oversample, m, n)
+
+    Q, _ = np.linalg.qr(_rsvd_matmul(x, _rsvd_gaussian((n, l), x.dtype)))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(_rsvd_matmul(x, Q, adjoint=True))
+        Q, _ = np.linalg.qr(_rsvd_matmul(x, Q))
+
+    # B = Q.H @ x
+    BH = _rsvd_matmul(x, Q, adjoint=True)
+    Ub, s, V = np.linalg.svd(BH.conj().T, full_matrices=False)
+    U = Q @ Ub
+
+    if isinstance(x, np.ndarray):
+        residual = np.linalg.norm(x)**2 - np.sum(s**2)
+    else:
+        # unbiased estimate of |(1 - QQ^H) x|^2 using some further vectors
+        p = max(oversample, 1)
+        Y = _rsvd_matmul(x, _rsvd_gaussian((n, p), x.dtype))
+        Y -= Q @ (Q.conj().T @ Y)
+        residual = np.linalg.norm(Y)**2 / p
+        if np.issubdtype(x.dtype, np.complexfloating):
+            residual /= 2
+
+    return U, s, V, max(residual, 0.0)
+
+
+def _array_split_rsvd(x, cutoff=0.0, cutoff_mode=3, max_bond=-1, absorb=0,
+                      oversample=10, n_iter=2):
+    """SVD-decomposition using a randomized range finder [1]. Only the
+    action of ``x``, which can also be a LinearOperator, on blocks of
+    vectors is needed. If ``max_bond`` is not given, the range is doubled
+    until it captures ``x`` to within ``cutoff``. The weight estimated to
+    lie outside the range counts towards the discarded weight, including for
+    the ``'sum2'`` cutoff.
+
+    .. [1] N. Halko, P. G. Martinsson and J. A. Tropp, "Finding structure
+       with randomness: probabilistic algorithms for constructing
+       approximate matrix decompositions", SIAM Rev. 53, 217 (2011).
+    """
+    d = min(x.shape)
+    dense = isinstance(x, np.ndarray)
+
+    if max_bond > 0:
+        k = min(d, max_bond)
+    elif cutoff > 0.0:
+        k = min(d, 16)
+    else:
+        k = d
+
+    while True:
+        # when most of the range is needed, the full SVD is cheaper
+        if dense and 2 * (k + oversample) >= d:
+            return _array_split_svd(x, cutoff, cutoff_mode, max_bond, absorb)
+
+        U, s, V, residual = _rsvd(x, k, oversample, n_iter)
+
+        if (max_bond > 0) or (cutoff <= 0.0) or (k == d):
+            break
+        # check whether the values have decayed enough to stop
+        if cutoff_mode == 1:
+            enough = s[-1] < cutoff
+        elif cutoff_mode == 2:
+            enough = s[-1] < cutoff * s[0]
+        else:
+            enough = residual < cutoff
+        if enough:
+            break
+        k = min(d, 2 * k)
+
+    n_chi = min(k, s.size)
+    if cutoff > 0.0:
+        # the weight outside the range is discarded regardless
+        ctf = cutoff - residual if cutoff_mode == 3 else cutoff
+        if ctf > 0.0:
+            n_chi = min(n_chi, _trim_singular_vals(s, ctf, cutoff_mode))
+
+    s_keep2 = np.sum(s[:n_chi]**2)
+    s_tot2 = np.sum(s**2) + residual
+    discarded = 1 - s_keep2 / s_tot2
+    U, s, V = U[:, :n_chi], s[:n_chi], V[:n_chi, :]
+    if cutoff > 0.0:
+        s = s * (s_tot2 / s_keep2)**0.5
+
+    if absorb == -1:
+        U = U * s.reshape((1, -1))
+    elif absorb == 1:
+        V = V * s.reshape((-1, 1))
+    else:
+        s = s**0.5
+        U = U * s.reshape((1, -1))
+        V = V * s.reshape((-1, 1))
+
+    return U, V, discarded
+
+
+def _array_split_rsvdvals(x, max_bond=-1, oversample=10, n_iter=2):
+    """Randomized SVD-decomposition, but return the largest ``max_bond``
+    singular values only, or all of them if ``max_bond`` is not given.
+    """
+    d = min(x.shape)
+    k = min(d, max_bond) if max_bond > 0 else d
+
+    # when most of the range is needed, the full SVD is cheaper
+    if isinstance(x, np.ndarray) and 2 * (k + oversample) >= d:
+        return _array_split_svdvals(x)[:k]
+
+    return _rsvd(x, k, oversample, n_iter)[1][:k]
+
+
 @njit  # pragma: no cover
 def _array_split_qr(x):
     """QR-decomposition.
     """
     Q, R = np.linalg.qr(x)
-    return Q, R
+    return Q, R, 0.0
 
 
 @njit  # pragma: no cover
@@ -404,25 +1843,31 @@ def _array_split_lq(x):
     """LQ-decomposition.
     """
     Q, L = np.linalg.qr(x.T)
-    return L.T, Q.T
+    return L.T, Q.T, 0.0
 
 
 def tensor_split(T, left_inds, method='svd', max_bond=None, absorb='both',
-                 cutoff=1e-10, cutoff_mode='sum2', get=None):
+                 cutoff=1e-10, cutoff_mode='sum2', get=None, info=None,
+                 oversample=10, n_iter=2):
     """Decompose this tensor into two tensors.
 
     Parameters
     ----------
-    T : Tensor
-        The tensor to split.
+    T : Tensor or TensorNetwork
+        The tensor to split. If a tensor network, it is split without being
+        contracted, as a linear operator from its remaining outer indices to
+        ``left_inds``, which requires ``method`` to be one of
+        ``{'rsvd', 'isvd', 'svds'}``.
     left_inds : sequence of str
         The sequence of inds, which ``tensor`` should already have, to split to
         the 'left'.
-    method : {'svd', 'eig', 'isvd', 'svds', qr', 'lq'}, optional
-        How to split the tensor.
+    method : {'svd', 'eig', 'rsvd', 'isvd', 'svds', qr', 'lq'}, optional
+        How to split the tensor. ``'rsvd'`` is a randomized SVD, which only
+        finds the largest ``max_bond`` singular values, or, if ``max_bond``
+        is not given, enough of them to satisfy ``cutoff``.
     cutoff : float, optional
         The threshold below which to discard singular values, only applies to
-        ``method='svd'`` and ``method='eig'``.
+        ``method='svd'``, ``method='eig'`` and ``method='rsvd'``.
     cutoff_mode : {'sum2', 'rel', 'abs'}
         Method with which to apply the cutoff threshold:
 
@@ -437,7 +1882,19 @@ def tensor_split(T, left_inds, method='svd', max_bond=None, absorb='both',
         Whether to absorb the singular values into both, the left or right
         unitary matrix respectively.
     get : {None, 'arrays', 'tensors', 'values'}
-        If given, what to return instead of a TN describing the split.
+        If given, what to return instead of a TN describing the split. The
+        values are all of the singular values, or for ``method='rsvd'`` only
+        the largest ``max_bond``, if given.
+    info : dict, optional
+        If given, this is updated with the ``'discarded_weight'``, the sum
+        squared of the singular values discarded relative to that of all of
+        them, and the new ``'bond_dim'``.
+    oversample : int, optional
+        For ``method='rsvd'``, how many extra random vectors to find the range
+        with, beyond the number of singular values sought.
+    n_iter : int, optional
+        For ``method='rsvd'``, how many power iterations to refine the range
+        with, more are needed if the singular values decay slowly.
 
     Returns
     -------
@@ -445,16 +1902,34 @@ def tensor_split(T, left_inds, method='svd', max_bond=None, absorb='both',
         Respectively if get={None, 'tensors', 'arrays', 'values'}.
     """
     left_inds = tuple(left_inds)
-    right_inds = tuple(x for x in T.inds if x not in left_inds)
 
-    TT = T.transpose(*left_inds, *right_inds)
+    if isinstance(T, TensorNetwork):
+        if method not in ('rsvd', 'isvd', 'svds'):
+            raise ValueError(f"Can't split a tensor network, rather than a "
+                             f"tensor, with method='{method}'.")
+        right_inds = tuple(x for x in T.outer_inds() if x not in left_inds)
+        array = TNLinearOperator(T, upper_inds=right_inds,
+                                 lower_inds=left_inds)
+        left_dims, right_dims = array.ldims, array.udims
+    else:
+        right_inds = tuple(x for x in T.inds if x not in left_inds)
+        TT = T.transpose(*left_inds, *right_inds)
+
+        if isinstance(TT.data, BlockSparseArray):
+            return _blocksparse_tensor_split(TT, left_inds, right_inds,
+                                             method, max_bond, absorb, cutoff,
+                                             cutoff_mode, get, info)
 
-    left_dims = TT.shape[:len(left_inds)]
-    right_dims = TT.shape[len(left_inds):]
+        left_dims = TT.shape[:len(left_inds)]
+        right_dims = TT.shape[len(left_inds):]
 
-    array = TT.data.reshape(prod(left_dims), prod(right_dims))
+        array = TT.data.reshape(prod(left_dims), prod(right_dims))
 
     if get == 'values':
+        if method == 'rsvd':
+            return _array_split_rsvdvals(
+                array, {None: -1}.get(max_bond, max_bond),
+                oversample=oversample, n_iter=n_iter)
         return {'svd': _array_split_svdvals,
                 'eig': _array_split_svdvals_eig}[method](array)
 
@@ -465,13 +1940,21 @@ def tensor_split(T, left_inds, method='svd', max_bond=None, absorb='both',
         opts['absorb'] = {'left': -1, 'both': 0, 'right': 1}[absorb]
         opts['max_bond'] = {None: -1}.get(max_bond, max_bond)
         opts['cutoff_mode'] = {'abs': 1, 'rel': 2, 'sum2': 3}[cutoff_mode]
-
-    left, right = {'svd': _array_split_svd,
-                   'eig': _array_split_eig,
-                   'isvd': _array_split_isvd,
-                   'svds': _array_split_svds,
-                   'qr': _array_split_qr,
-                   'lq': _array_split_lq}[method](array, **opts)
+    if method == 'rsvd':
+        opts['oversample'] = oversample
+        opts['n_iter'] = n_iter
+
+    left, right, discarded = {'svd': _array_split_svd,
+                              'eig': _array_split_eig,
+                              'rsvd': _array_split_rsvd,
+                              'isvd': _array_split_isvd,
+                              'svds': _array_split_svds,
+                              'qr': _array_split_qr,
+                              'lq': _array_split_lq}[method](array, **opts)
+
+    if info is not None:
+        info['discarded_weight'] = discarded
+        info['bond_dim'] = left.shape[-1]
 
     left = left.reshape(*left_dims, -1)
     right = right.reshape(-1, *right_dims)
@@ -490,6 +1973,40 @@ def tensor_split(T, left_inds, method='svd', max_bond=None, absorb='both',
     return TensorNetwork((Tl, Tr), check_collisions=False)
 
 
+def _blocksparse_tensor_split(TT, left_inds, right_inds, method, max_bond,
+                              absorb, cutoff, cutoff_mode, get, info):
+    """Split the block sparse, already transposed, tensor ``TT`` sector by
+    sector, see :func:`tensor_split`. All methods apart from ``'qr'`` and
+    ``'lq'`` use a dense SVD of each sector.
+    """
+    opts = {'get_values': get == 'values', 'info': info}
+    if method not in ('qr', 'lq'):
+        opts['cutoff'] = {None: -1.0}.get(cutoff, cutoff)
+        opts['absorb'] = {'left': -1, 'both': 0, 'right': 1}[absorb]
+        opts['max_bond'] = {None: -1}.get(max_bond, max_bond)
+        opts['cutoff_mode'] = {'abs': 1, 'rel': 2, 'sum2': 3}[cutoff_mode]
+    elif get == 'values':
+        method = 'svd'
+
+    res = blocksparse_split(TT.data, len(left_inds), method=method, **opts)
+    if get == 'values':
+        return res
+
+    left, right = res
+    if get == 'arrays':
+        return left, right
+
+    bond_ind = rand_uuid()
+
+    Tl = Tensor(data=left, inds=(*left_inds, bond_ind), tags=TT.tags)
+    Tr = Tensor(data=right, inds=(bond_ind, *right_inds), tags=TT.tags)
+
+    if get == 'tensors':
+        return Tl, Tr
+
+    return TensorNetwork((Tl, Tr), check_collisions=False)
+
+
 def tensor_compress_bond(T1, T2, **compress_opts):
     """Inplace compress between the two single tensors. It follows the
     following steps to minimize the size of SVD performed::
@@ -638,6 +2155,14 @@ def tensor_direct_product(T1, T2, sum_inds=(), inplace=False):
     return new_T
 
 
+def _asarray(data):
+    """Convert ``data`` to an array, leaving block sparse arrays as they are.
+    """
+    if isinstance(data, BlockSparseArray):
+        return data
+    return np.asarray(data)
+
+
 def tags2set(tags):
     """Parse a ``tags`` argument into a set - leave if already one.
     """
@@ -668,16 +2193,21 @@ class Tensor(object):
         Tags with which to select and filter from multiple tensors.
     """
 
+    __slots__ = ('_data', '_inds', 'tags', '_owners', '__weakref__')
+
     def __init__(self, data, inds, tags=None):
+        # networks containing this tensor: {id(tn): (weakref(tn), name)}
+        self._owners = {}
+
         # Short circuit for copying Tensors
         if isinstance(data, Tensor):
             self._data = data.data
-            self.inds = data.inds
+            self._inds = data.inds
             self.tags = data.tags.copy()
             return
 
-        self._data = np.asarray(data)
-        self.inds = tuple(inds)
+        self._data = _asarray(data)
+        self._inds = tuple(inds)
 
         if self._data.ndim != len(self.inds):
             raise ValueError(
@@ -708,11 +2238,46 @@ class Tensor(object):
     data = property(get_data, set_data,
                     doc="The numpy.ndarray with this Tensors' numeric data.")
 
+    def get_inds(self):
+        return self._inds
+
+    def set_inds(self, inds):
+        old_inds, self._inds = self._inds, tuple(inds)
+
+        # keep the index maps of any networks viewing this tensor up to date
+        for key, (ref, name) in tuple(self._owners.items()):
+            tn = ref()
+            if tn is None:
+                del self._owners[key]
+            else:
+                tn._modify_tensor_inds(old_inds, self._inds, name)
+
+    inds = property(get_inds, set_inds,
+                    doc="The index labels of each dimension of this Tensor.")
+
+    def _add_owner(self, tn, name):
+        """Register that ``tn`` holds this tensor under ``name``.
+        """
+        self._owners[id(tn)] = (tn._weakref, name)
+
+    def _remove_owner(self, tn):
+        """Deregister ``tn`` as holding this tensor.
+        """
+        self._owners.pop(id(tn), None)
+
+    def __getstate__(self):
+        # the owning networks are not copied or pickled
+        return self._data, self._inds, self.tags
+
+    def __setstate__(self, state):
+        self._data, self._inds, self.tags = state
+        self._owners = {}
+
     def modify(self, data=None, inds=None, tags=None):
         """Overwrite the data of this tensor.
         """
         if data is not None:
-            self._data = np.asarray(data)
+            self._data = _asarray(data)
         if inds is not None:
             self.inds = inds
         if tags is not None:
@@ -906,8 +2471,18 @@ class Tensor(object):
         dims = iter(tn.shape)
         dims = [prod(next(dims) for _ in fs) for fs in fused_inds] + list(dims)
 
+        if isinstance(tn.data, BlockSparseArray):
+            # fuse the charge sectors rather than simply reshaping
+            groups, ax = [], 0
+            for fs in fused_inds:
+                groups.append(range(ax, ax + len(fs)))
+                ax += len(fs)
+            data = tn.data.fuse(groups)
+        else:
+            data = tn.data.reshape(*dims)
+
         # create new tensor with new + remaining indices
-        tn.modify(data=tn.data.reshape(*dims),
+        tn.modify(data=data,
                   inds=(*new_fused_inds, *unfused_inds))
         return tn
 
@@ -924,6 +2499,8 @@ class Tensor(object):
     def norm(self):
         """Frobenius norm of this tensor.
         """
+        if isinstance(self.data, BlockSparseArray):
+            return self.data.norm()
         return norm_fro_dense(self.data.reshape(-1))
 
     def almost_equals(self, other, **kwargs):
@@ -1084,18 +2661,445 @@ class TNLinearOperator(spla.LinearOperator):
         self.udims, self.ud = udims, prod(udims)
         self.ldims, self.ld = ldims, prod(ldims)
 
+        # contraction plans, compiled on first use
+        self._matvec_plan = self._rmatvec_plan = None
+        self._matmat_plans, self._rmatmat_plans = {}, {}
+        self._col_ind = rand_uuid()
+
+        # maps vectors with ``upper_inds`` to vectors with ``lower_inds``
         super().__init__(dtype=self._tensors[0].dtype,
-                         shape=(self.ud, self.ld))
+                         shape=(self.ld, self.ud))
+
+    def _matvec(self, vec):
+        in_data = vec.reshape(*self.udims)
+
+        if self._matvec_plan is None:
+            iT = Tensor(in_data, inds=self.upper_inds)
+            self._matvec_plan = ContractionPlan(
+                (*self._tensors, iT), output_inds=self.lower_inds)
+
+        out_data = self._matvec_plan(*(t.data for t in self._tensors),
+                                     in_data)
+        return out_data.reshape(self.ld, *vec.shape[1:])
+
+    def _rmatvec(self, vec):
+        in_data = vec.conj().reshape(*self.ldims)
+
+        if self._rmatvec_plan is None:
+            iT = Tensor(in_data, inds=self.lower_inds)
+            self._rmatvec_plan = ContractionPlan(
+                (*self._tensors, iT), output_inds=self.upper_inds)
+
+        out_data = self._rmatvec_plan(*(t.data for t in self._tensors),
+                                      in_data)
+        return out_data.conj().reshape(self.ud, *vec.shape[1:])
+
+    def _matmat(self, mat):
+        # contract all the columns at once rather than one by one
+        ncol = mat.shape[1]
+        in_data = mat.reshape(*self.udims, ncol)
+
+        try:
+            plan = self._matmat_plans[ncol]
+        except KeyError:
+            iT = Tensor(in_data, inds=(*self.upper_inds, self._col_ind))
+            plan = self._matmat_plans[ncol] = ContractionPlan(
+                (*self._tensors, iT),
+                output_inds=(*self.lower_inds, self._col_ind))
+
+        out_data = plan(*(t.data for t in self._tensors), in_data)
+        return out_data.reshape(self.ld, ncol)
+
+    def _rmatmat(self, mat):
+        ncol = mat.shape[1]
+        in_data = mat.conj().reshape(*self.ldims, ncol)
+
+        try:
+            plan = self._rmatmat_plans[ncol]
+        except KeyError:
+            iT = Tensor(in_data, inds=(*self.lower_inds, self._col_ind))
+            plan = self._rmatmat_plans[ncol] = ContractionPlan(
+                (*self._tensors, iT),
+                output_inds=(*self.upper_inds, self._col_ind))
+
+        out_data = plan(*(t.data for t in self._tensors), in_data)
+        return out_data.conj().reshape(self.ud, ncol)
+
+
+def _is_contiguous(layout, inds):
+    """Check whether ``inds`` form a single contiguous block of ``layout``.
+    """
+    where = [n for n, ix in enumerate(layout) if ix in inds]
+    return not where or where[-1] - where[0] + 1 == len(where)
+
+
+def _matmul_step_options(x_ix, y_ix, keep, size):
+    """Find the ways of contracting an intermediate, with indices ``x_ix``,
+    with a fixed array with indices ``y_ix``. Each option is an estimate of
+    the memory traffic, and the details of the step, ending with the new
+    indices.
+    """
+    shared = "".join(s for s in x_ix if s in y_ix)
+    x_free = "".join(s for s in x_ix if s not in y_ix)
+    y_free = "".join(s for s in y_ix if s not in x_ix)
+
+    if (any(s in keep for s in shared) or
+            any(s not in keep for s in x_free + y_free)):
+        # not a plain matrix product, e.g. a 'batch' or dangling index
+        z_ix = "".join(unique(s for s in x_ix + y_ix if s in keep))
+        cost = size(x_ix) + size(y_ix) + size(z_ix)
+        return [(cost, ('einsum', z_ix))]
+
+    # either view ``x`` as ``(P, K, Q)`` if possible, or copy it
+    arrangements = [
+        (tuple(map(x_ix.index, x_free + shared)), x_free, ""),
+        (tuple(map(x_ix.index, shared + x_free)), "", x_free),
+    ]
+    if shared and _is_contiguous(x_ix, shared):
+        start = min(map(x_ix.index, shared))
+        arrangements.insert(0, (None, x_ix[:start],
+                                x_ix[start + len(shared):]))
+
+    k, n = size(shared), size(y_free)
+    options = []
+    for perm, P, Q in arrangements:
+        p, q = size(P), size(Q)
+
+        cost = p * q * (k + n)
+        if perm is not None:
+            cost += 2 * size(x_ix)
+        if p > 1 and q > 1 and k * n > 4096:
+            # ``y`` won't stay in cache between each multiplication
+            cost += p * k * n
+
+        # the product is ``(P, N, Q) = y(N, K) @ x(P, K, Q)``, or else
+        # ``(P, Q, N) = x(P, K, Q).T @ y(K, N)``, for any order of ``N``
+        options.extend(
+            (cost, ('matmul', perm, P, shared, Q, mode, N,
+                    P + N + Q if mode == 'NQ' else P + Q + N))
+            for mode in ('NQ', 'QN')
+            for N in map("".join, itertools.permutations(y_free)))
+
+    return options
+
+
+@functools.lru_cache(2**10)
+def _plan_matmul_layouts(in_ix, contractions, output, sizes):
+    """Choose the order of the input and of every intermediate's indices, as
+    well as how to perform each multiplication, for the sequence of
+    ``contractions``, ``(y_ix, keep)``, of a single array with indices
+    ``in_ix`` (the last being the batch index), so as to minimize the memory
+    traffic, e.g. from transposing copies.
+
+    Returns
+    -------
+    in_perm : tuple of int or None
+        How to initially transpose the input, if at all.
+    choices : tuple
+        The details of each step, see ``_matmul_step_options``.
+    """
+    size_dict = dict(sizes)
+
+    def size(ix):
+        return prod(size_dict[s] for s in ix)
+
+    @functools.lru_cache(None)
+    def best(i, x_ix):
+        if i == len(contractions):
+            return (0 if x_ix == output else 2 * size(x_ix)), ()
+
+        y_ix, keep = contractions[i]
+        return min(((cost + best(i + 1, opt[-1])[0],
+                     (opt,) + best(i + 1, opt[-1])[1])
+                    for cost, opt in _matmul_step_options(
+                        x_ix, y_ix, keep, size)), key=lambda c: c[0])
+
+    # also consider transposing the input first, keeping the batch index last
+    starts = (("".join(p) + in_ix[-1]) for p in
+              itertools.permutations(in_ix[:-1]))
+    cost, start_ix, choices = min(
+        ((best(0, ix)[0] + (0 if ix == in_ix else 2 * size(ix)), ix,
+          best(0, ix)[1]) for ix in starts), key=lambda c: c[0])
+
+    in_perm = None if start_ix == in_ix else tuple(map(in_ix.index, start_ix))
+    return in_perm, choices
+
+
+class EffHamLinearOperator(spla.LinearOperator):
+    """A linear operator specialized for repeatedly applying a small, fixed
+    network of tensors, such as the effective hamiltonian of DMRG::
+
+         / | | \   -> upper_inds
+        L--H-H--R
+         \ | | /   -> lower_inds
+
+    Unlike :class:`TNLinearOperator`, the contraction is compiled once, on
+    creation, into a sequence of (stacked) matrix multiplications:
+
+        - an optimal path is found, and any contractions that don't involve
+          the vector, e.g. ``H-H`` if cheaper, are performed upfront;
+        - the indices of each intermediate are ordered such that the ones
+          contracted next are contiguous, so that each step is a BLAS call
+          on a view, with no transposing copies needed for the usual
+          ``L-H-H-R`` structure;
+        - the remaining tensors are pre-transposed into contiguous matrices.
+
+    Each application then only calls BLAS, writing into preallocated
+    buffers. Blocks of vectors are handled in a single pass by ``matmat``.
+
+    The data of the tensors is captured on creation, so the operator should
+    be discarded if they are modified.
+
+    Parameters
+    ----------
+    tns : sequence of Tensors or TensorNetwork
+        A representation of the hamiltonian
+    upper_inds : sequence of str
+        The upper inds of the effective hamiltonian network.
+    lower_inds : sequence of str
+        The lower inds of the effective hamiltonian network. These should be
+        ordered the same way as ``upper_inds``.
+    udims : tuple of int, or None
+        The dimensions corresponding to upper_inds. Will figure out if None.
+    ldims : tuple of int, or None
+        The dimensions corresponding to lower_inds. Will figure out if None.
+    optimize : str or RandomGreedyOptimizer, optional
+        The path optimizer to use, defaults to ``'optimal'`` for up to five
+        tensors, else the global strategy, see :func:`set_contract_strategy`.
+    """
+
+    def __init__(self, tns, upper_inds, lower_inds, udims=None, ldims=None,
+                 optimize=None):
+        if isinstance(tns, TensorNetwork):
+            self._tensors = tns.tensors
+        else:
+            self._tensors = tuple(tns)
+
+        if udims is None or ldims is None:
+            ix_sz = dict(zip(concat(t.inds for t in self._tensors),
+                             concat(t.shape for t in self._tensors)))
+            udims = tuple(ix_sz[i] for i in upper_inds)
+            ldims = tuple(ix_sz[i] for i in lower_inds)
+
+        self.upper_inds, self.lower_inds = upper_inds, lower_inds
+        self.udims, self.ud = tuple(udims), prod(udims)
+        self.ldims, self.ld = tuple(ldims), prod(ldims)
+
+        if optimize is None:
+            optimize = ('optimal' if len(self._tensors) <= 5 else
+                        _CONTRACT_STRATEGY)
+        self.optimize = optimize
+
+        self._matvec_plan = self._compile(upper_inds, self.udims, lower_inds)
+        self._rmatvec_plan = None  # compiled on first use
+
+        # the work buffers for each plan, number of vectors and dtype
+        self._buffers = {}
+
+        super().__init__(shape=(self.ld, self.ud), dtype=np.result_type(
+            *(t.dtype for t in self._tensors)))
+
+    def _compile(self, in_inds, in_dims, out_inds):
+        """Compile the sequence of steps that maps an array with indices
+        ``(*in_inds, batch)`` to one with indices ``(*out_inds, batch)``.
+        """
+        batch = rand_uuid('_batch')
+        nt = len(self._tensors)
+
+        i_ix = (*(t.inds for t in self._tensors), (*in_inds, batch))
+        shapes = (*(t.shape for t in self._tensors), (*in_dims, 1))
+        order, _, contract_str = _canonical_contract_str(
+            i_ix, shapes, (*out_inds, batch))
+        shapes = [shapes[i] for i in order]
+
+        inputs, output = _parse_contract_str(contract_str)
+        size_dict = dict(zip(concat(inputs), concat(shapes)))
+        path = _CONTRACT_PATH_CACHE.get_path(contract_str, *shapes,
+                                             optimize=self.optimize)
+
+        # first pass: contract everything not involving the vector, which
+        # is represented by ``None``, and find what it is contracted with
+        operands = [(self._tensors[i].data if i < nt else None, inputs[n])
+                    for n, i in enumerate(order)]
+        in_ix = inputs[order.index(nt)]
+
+        contractions = []
+        remaining = frequencies(concat(inputs))
+        for step in path:
+            popped = [operands.pop(p) for p in sorted(step, reverse=True)]
+            for _, ix in popped:
+                for s in ix:
+                    remaining[s] -= 1
+            keep = {s for _, ix in popped for s in ix
+                    if remaining[s] > 0 or s in output}
+
+            if all(x is not None for x, _ in popped):
+                (x, x_ix), *others = popped
+                for y, y_ix in others:
+                    x, x_ix = _pairwise_contract_step(x, y, x_ix, y_ix, keep)
+                new = _trace_and_sum_single(x, x_ix, keep)
+            elif len(popped) == 2:
+                (y, y_ix), = ((y, ix) for y, ix in popped if y is not None)
+                contractions.append((y, y_ix, keep))
+                new = (None, "".join(unique(s for s in concat(
+                    ix for _, ix in popped) if s in keep)))
+            else:
+                raise ValueError("Expected a pairwise contraction path, got "
+                                 "the step {}.".format(step))
+
+            for s in new[1]:
+                remaining[s] += 1
+            operands.append(new)
+
+        # second pass: choose the order of every intermediate's indices
+        in_perm, choices = _plan_matmul_layouts(
+            in_ix, tuple((y_ix, frozenset(keep))
+                         for _, y_ix, keep in contractions),
+            output, tuple(sorted(size_dict.items())))
+
+        def size(ix):
+            return prod(size_dict[s] for s in ix)
+
+        steps = []
+        x_ix = in_ix
+        if in_perm is not None:
+            steps.append(('transpose', x_ix, in_perm))
+            x_ix = "".join(x_ix[i] for i in in_perm)
+
+        for (y, y_ix, _), (kind, *args, z_ix) in zip(contractions, choices):
+            if kind == 'einsum':
+                local = {s: _get_symbol(n)
+                         for n, s in enumerate(unique(x_ix + y_ix))}
+                eq = "{},{}->{}".format(*("".join(map(local.__getitem__, t))
+                                          for t in (x_ix, y_ix, z_ix)))
+                steps.append(('einsum', x_ix, eq, y))
+            else:
+                perm, P, K, Q, mode, N = args
+                k, n = size(K), size(N)
+                if mode == 'NQ':
+                    y = y.transpose(tuple(map(y_ix.index, N + K)))
+                    y = y.reshape(n, k)
+                else:
+                    y = y.transpose(tuple(map(y_ix.index, K + N)))
+                    y = y.reshape(k, n)
+                steps.append(('matmul', x_ix, perm, P, Q,
+                              np.ascontiguousarray(y), mode, k, n))
+            x_ix = z_ix
+
+        final_perm = tuple(map(x_ix.index, output))
+        if final_perm == tuple(range(len(output))):
+            final_perm = None
+
+        return in_ix, size_dict, steps, x_ix, final_perm
+
+    def _get_buffers(self, plan, nb, dtype):
+        """Get the output buffers of each step in ``plan`` for ``nb`` vectors
+        of type ``dtype``, allocating them if needed.
+        """
+        key = (id(plan), nb, dtype)
+        try:
+            return self._buffers[key]
+        except KeyError:
+            pass
+
+        in_ix, size_dict, steps, _, _ = plan
+        size_dict = {**size_dict, in_ix[-1]: nb}
+
+        buffers = []
+        for kind, *args in steps:
+            if kind != 'matmul':
+                buffers.append(None)
+                continue
+
+            _, _, P, Q, y, _, _, n = args
+            p, q = (prod(size_dict[s] for s in ix) for ix in (P, Q))
+            dtype = np.result_type(dtype, y.dtype)
+            buffers.append(np.empty(p * n * q, dtype=dtype))
+
+        self._buffers[key] = buffers
+        return buffers
+
+    def _apply(self, plan, x):
+        """Apply the compiled ``plan`` to the block of vectors ``x``, with
+        shape ``(d, nb)``.
+        """
+        in_ix, size_dict, steps, final_ix, final_perm = plan
+        nb = x.shape[1]
+        size_dict = {**size_dict, in_ix[-1]: nb}
+        buffers = self._get_buffers(plan, nb, x.dtype)
+
+        for (kind, x_ix, *args), out in zip(steps, buffers):
+            x = x.reshape(tuple(size_dict[s] for s in x_ix))
+
+            if kind == 'transpose':
+                x = x.transpose(*args)
+                continue
+            if kind == 'einsum':
+                eq, y = args
+                x = np.einsum(eq, x, y)
+                continue
+
+            perm, P, Q, y, mode, k, n = args
+            if perm is not None:
+                x = x.transpose(perm)
+            p, q = (prod(size_dict[s] for s in ix) for ix in (P, Q))
+
+            if q == 1:
+                # single matrix multiplication
+                x = x.reshape(p, k)
+                np.dot(x, y.T if mode == 'NQ' else y, out=out.reshape(p, n))
+            elif mode == 'NQ':
+                np.matmul(y, x.reshape(p, k, q), out=out.reshape(p, n, q))
+            else:
+                np.matmul(x.reshape(p, k, q).transpose(0, 2, 1), y,
+                          out=out.reshape(p, q, n))
+            x = out
+
+        if final_perm is not None:
+            x = x.reshape(tuple(size_dict[s] for s in final_ix))
+            x = x.transpose(final_perm)
+        x = x.reshape(-1, nb)
+
+        # don't hand out the work buffers themselves
+        if any(x.base is b for b in buffers if b is not None):
+            x = x.copy()
+        return x
 
     def _matvec(self, vec):
-        iT = Tensor(vec.reshape(*self.udims), inds=self.upper_inds)
-        oT = tensor_contract(*self._tensors, iT, output_inds=self.lower_inds)
-        return oT.data.reshape(*vec.shape)
+        x = np.asarray(vec).reshape(-1, 1)
+        out = self._apply(self._matvec_plan, x)
+        return out.reshape(-1) if vec.ndim == 1 else out
+
+    def _matmat(self, mat):
+        return self._apply(self._matvec_plan, np.asarray(mat))
 
     def _rmatvec(self, vec):
-        iT = Tensor(vec.conj().reshape(*self.ldims), inds=self.lower_inds)
-        oT = tensor_contract(*self._tensors, iT, output_inds=self.upper_inds)
-        return oT.data.conj().reshape(*vec.shape)
+        if self._rmatvec_plan is None:
+            self._rmatvec_plan = self._compile(self.lower_inds, self.ldims,
+                                               self.upper_inds)
+
+        x = np.asarray(vec).conj().reshape(-1, 1)
+        out = self._apply(self._rmatvec_plan, x).conj()
+        return out.reshape(-1) if vec.ndim == 1 else out
+
+    def diag(self):
+        """The diagonal of the operator as a flat array, computed directly
+        from the tensors by identifying each lower index with its upper one,
+        e.g. for use as a preconditioner.
+        """
+        upper = dict(zip(self.lower_inds, self.upper_inds))
+        symbols = {}
+        for ix in concat(t.inds for t in self._tensors):
+            ix = upper.get(ix, ix)
+            if ix not in symbols:
+                symbols[ix] = _get_symbol(len(symbols))
+
+        eq = "{}->{}".format(
+            ",".join("".join(symbols[upper.get(ix, ix)] for ix in t.inds)
+                     for t in self._tensors),
+            "".join(symbols[ix] for ix in self.upper_inds))
+        return np.einsum(eq, *(t.data for t in self._tensors),
+                         optimize=True).reshape(-1)
 
 
 # --------------------------------------------------------------------------- #
@@ -1148,8 +3152,8 @@ class TensorNetwork(object):
             | | | | | | |   ->   1  | | | |   ->   2  |   ->  etc.
             O-O-O-O-O-O-O-        \-O-O-O-O-        \-O-
 
-        Should not require tensor contractions with more than 52 unique
-        indices.
+        Contractions with more than 52 unique indices fall back to a slower
+        pairwise ``tensordot`` based executor.
     nsites : int, optional
         The total number of sites, if explicitly known. This will be calculated
         using `structure` if needed but not specified. When the network is not
@@ -1186,6 +3190,11 @@ class TensorNetwork(object):
         Mapping of tags to a set of tensor ids which have those tags. I.e.
         ``{tag: {tensor_id_1, tensor_id_2, ...}}``. Thus to select those
         tensors could do: ``map(tensor_index.__getitem__, tag_index[tag])``.
+    ind_index : dict
+        Mapping of indices to the set of tensor ids which have that index,
+        i.e. ``{ind: {tensor_id_1, tensor_id_2}}``. This is built on first
+        use, then kept up to date, even when the indices of a tensor are
+        changed directly, along with the number of times each index appears.
     """
 
     def __init__(self, tensors, *,
@@ -1198,6 +3207,11 @@ class TensorNetwork(object):
 
         self.site = SiteIndexer(self)
 
+        # the index map is only built if and when needed
+        self._weakref = weakref.ref(self)
+        self._ind_index = None
+        self._ind_counts = None
+
         # short-circuit for copying TensorNetworks
         if isinstance(tensors, TensorNetwork):
             self.structure = tensors.structure
@@ -1300,7 +3314,9 @@ class TensorNetwork(object):
                 pass
 
         # add tensor to the main index
-        self.tensor_index[name] = tensor if virtual else tensor.copy()
+        if not virtual:
+            tensor = tensor.copy()
+        self.tensor_index[name] = tensor
 
         # add its name to the relevant tags, or create a new tag
         for tag in tensor.tags:
@@ -1309,6 +3325,110 @@ class TensorNetwork(object):
             except (KeyError, TypeError):
                 self.tag_index[tag] = {name}
 
+        self._link_tensor(tensor, name)
+
+    @property
+    def ind_index(self):
+        if self._ind_index is None:
+            self._ind_index = {}
+            self._ind_counts = {}
+            for name, tensor in self.tensor_index.items():
+                self._link_tensor(tensor, name)
+            self._ind_counts_ordered = True
+        return self._ind_index
+
+    def _link_tensor(self, tensor, name):
+        """Add ``tensor``'s indices to the index map, and register this network
+        with ``tensor`` so that it is notified of any changes to them.
+        """
+        if self._ind_index is None:
+            return
+
+        for ix in tensor.inds:
+            try:
+                self._ind_index[ix].add(name)
+            except KeyError:
+                self._ind_index[ix] = {name}
+            self._ind_counts[ix] = self._ind_counts.get(ix, 0) + 1
+
+        # new indices of the last tensor go last, as in ``all_inds``
+        if name != next(reversed(self.tensor_index), None):
+            self._ind_counts_ordered = False
+
+        tensor._add_owner(self, name)
+
+    def _unlink_tensor(self, tensor, name):
+        """Remove ``tensor``'s indices from the index map, and deregister this
+        network with ``tensor``.
+        """
+        if self._ind_index is None:
+            return
+
+        for ix in tensor.inds:
+            named = self._ind_index.get(ix, None)
+            if named is not None:
+                named.discard(name)
+                if not named:
+                    del self._ind_index[ix]
+                    del self._ind_counts[ix]
+                else:
+                    self._ind_counts[ix] -= 1
+        self._ind_counts_ordered = False
+
+        tensor._remove_owner(self)
+
+    def _modify_tensor_inds(self, old_inds, new_inds, name):
+        """Update the index map after the tensor ``name`` has had its indices
+        changed from ``old_inds`` to ``new_inds``.
+        """
+        if old_inds == new_inds:
+            return
+
+        for ix in old_inds:
+            self._ind_counts[ix] -= 1
+        for ix in new_inds:
+            self._ind_counts[ix] = self._ind_counts.get(ix, 0) + 1
+        self._ind_counts_ordered = False
+
+        old_inds, new_inds = set(old_inds), set(new_inds)
+
+        for ix in old_inds - new_inds:
+            named = self._ind_index[ix]
+            named.discard(name)
+            if not named:
+                del self._ind_index[ix]
+                del self._ind_counts[ix]
+
+        for ix in new_inds - old_inds:
+            try:
+                self._ind_index[ix].add(name)
+            except KeyError:
+                self._ind_index[ix] = {name}
+
+    def _get_ind_counts(self):
+        """Get the number of times each index appears, in the order they
+        first appear in :meth:`all_inds`.
+        """
+        if not self._ind_counts_ordered:
+            # restore the order after indices have been removed or renamed
+            counts = self._ind_counts
+            self._ind_counts = {ix: counts[ix]
+                                for ix in unique(self.all_inds())}
+            self._ind_counts_ordered = True
+        return self._ind_counts
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_weakref']
+        # the index map is rebuilt on demand, e.g. after a deepcopy
+        state['_ind_index'] = None
+        state['_ind_counts'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._weakref = weakref.ref(self)
+
     def add_tensor_network(self, tn, virtual=False, check_collisions=True,
                            inner_inds=None):
         """
@@ -1341,7 +3461,10 @@ class TensorNetwork(object):
 
         else:  # directly add tensor/tag indexes
             for nm, tsr in tn.tensor_index.items():
-                self.tensor_index[nm] = tsr if virtual else tsr.copy()
+                if not virtual:
+                    tsr = tsr.copy()
+                self.tensor_index[nm] = tsr
+                self._link_tensor(tsr, nm)
 
             self.tag_index = merge_with(
                 set_join, self.tag_index, tn.tag_index)
@@ -1420,21 +3543,15 @@ class TensorNetwork(object):
             if not tagged_names:
                 del self.tag_index[tag]
 
-        # pop the tensor itself
-        return self.tensor_index.pop(name)
+        # pop the tensor itself, and remove it from the index map
+        tensor = self.tensor_index.pop(name)
+        self._unlink_tensor(tensor, name)
+        return tensor
 
     def _del_tensor(self, name):
         """Delete a tensor from this network.
         """
-        # remove the tensor from the tag index
-        for tag in self.tensor_index[name].tags:
-            tagged_names = self.tag_index[tag]
-            tagged_names.discard(name)
-            if not tagged_names:
-                del self.tag_index[tag]
-
-        # delete the tensor itself
-        del self.tensor_index[name]
+        self._pop_tensor(name)
 
     def delete(self, tags, mode='all'):
         """Delete any tensors which match all or any of ``tags``.
@@ -1520,8 +3637,14 @@ class TensorNetwork(object):
         """
         new_tn = self if inplace else self.copy()
 
-        for t in new_tn.tensor_index.values():
-            t.reindex(index_map, inplace=True)
+        # only need to visit the tensors which actually have the indices
+        names = set()
+        for ix in index_map:
+            names |= new_tn.ind_index.get(ix, set())
+
+        for name in names:
+            new_tn.tensor_index[name].reindex(index_map, inplace=True)
+
         return new_tn
 
     def conj(self, inplace=False):
@@ -1697,7 +3820,9 @@ class TensorNetwork(object):
             self._del_tensor(name)
             self.add_tensor(tensor, name, virtual=True)
         else:
+            self._unlink_tensor(self.tensor_index[name], name)
             self.tensor_index[name] = tensor
+            self._link_tensor(tensor, name)
 
     def __delitem__(self, tags):
         """Delete any tensors which have all of ``tags``.
@@ -1899,7 +4024,7 @@ class TensorNetwork(object):
         A = svd_section.aslinearoperator(upper_inds=rght_inds, udims=rght_shp,
                                          lower_inds=left_inds, ldims=left_shp)
 
-        U, V = _array_split_isvd(A, cutoff=eps)
+        U, V, _ = _array_split_isvd(A, cutoff=eps)
         U = U.reshape(*left_shp, -1)
         V = V.reshape(-1, *rght_shp)
 
@@ -2082,15 +4207,21 @@ class TensorNetwork(object):
         --------
         contract, contract_tags, contract_cumulative
         """
-        # check for all sites
-        if tag_slice is ...:
+        # check for a custom structured full contract sequence
+        if (tag_slice is ...) and hasattr(self, "contract_structured_all"):
+            return self.contract_structured_all(
+                self, inplace=inplace, **opts)
 
-            # check for a custom structured full contract sequence
-            if hasattr(self, "contract_structured_all"):
-                return self.contract_structured_all(
-                    self, inplace=inplace, **opts)
+        # contract each block of sites cumulatively
+        tags_seq = self._structured_tags_seq(tag_slice)
+        return self.contract_cumulative(tags_seq, inplace=inplace, **opts)
 
-            # else slice over all sites
+    def _structured_tags_seq(self, tag_slice):
+        """Translate ``tag_slice`` into the sequence of tag groups that
+        ``contract_structured`` cumulatively contracts.
+        """
+        # check for all sites
+        if tag_slice is ...:
             tag_slice = slice(0, self.nsites)
 
         # filter sites by the slice, but also which sites are present at all
@@ -2102,8 +4233,7 @@ class TensorNetwork(object):
         if self.structure_bsz > 1:
             tags_seq = partition_all(self.structure_bsz, tags_seq)
 
-        # contract each block of sites cumulatively
-        return self.contract_cumulative(tags_seq, inplace=inplace, **opts)
+        return tags_seq
 
     def contract(self, tags=..., inplace=False, **opts):
         """Contract some, or all, of the tensors in this network. This method
@@ -2140,6 +4270,145 @@ class TensorNetwork(object):
         # Else just contract those tensors specified by tags.
         return self.contract_tags(tags, inplace=inplace, **opts)
 
+    def contraction_cost(self, tags=..., output_inds=None, mode='any',
+                         optimize=None):
+        """Estimate the cost of contracting some, or all, of the tensors in
+        this network, without performing any contractions. This follows the
+        same strategy as ``contract``, i.e. if the network has a structure
+        and ``tags`` is ``...`` or a slice, the cost of the cumulative,
+        structured contraction is estimated.
+
+        Parameters
+        ----------
+        tags : sequence of str, slice or ..., optional
+            Which tensors to contract, by default all.
+        output_inds : sequence, optional
+            The desired output indices, if contracting in one go.
+        mode : {'any', 'all'}, optional
+            Whether to require matching all or any of the tags.
+        optimize : str or RandomGreedyOptimizer, optional
+            Which contraction path optimizer to use, e.g. ``'greedy'``,
+            ``'optimal'`` or ``'random-greedy'``, defaulting to the global
+            strategy used by ``contract``. Call this with several to compare
+            them. Any paths found are cached and reused by ``contract``.
+
+        Returns
+        -------
+        dict
+            With keys:
+
+            - ``'flops'``: the total number of scalar operations.
+            - ``'max_size'``: the number of elements of the largest
+              intermediate (or output) tensor.
+            - ``'peak_memory'``: an estimate of the peak memory in bytes,
+              including the network's tensors themselves.
+            - ``'steps'``: a list of dicts describing each pairwise
+              contraction: the ``'inds'`` of the tensors contracted and the
+              ``'output'`` indices, ``'flops'`` and ``'size'`` of each.
+            - ``'optimize'``: the optimizer used.
+        """
+        if optimize is None:
+            optimize = get_contract_strategy()
+
+        tensors = self.tensors
+        itemsize = np.result_type(*(t.dtype for t in tensors)).itemsize
+
+        # lightweight [inds, shape, tags, is_intermediate] for each tensor
+        records = [[t.inds, t.shape, t.tags, False] for t in tensors]
+        base_size = sum(t.size for t in tensors)
+
+        if self.structure is not None and (
+                (tags is ... and not hasattr(self, "contract_structured_all"))
+                or isinstance(tags, slice)):
+            # accumulate the tag groups just as ``contract_cumulative`` does
+            groups, ctags = [], set()
+            for group in self._structured_tags_seq(tags):
+                ctags |= {group} if isinstance(group, str) else set(group)
+                groups.append((set(ctags), 'any'))
+            output_inds = None
+        elif tags is ...:
+            groups = [(..., mode)]
+        else:
+            groups = [({tags} if isinstance(tags, str) else set(tags), mode)]
+
+        def matches(record, group_tags, group_mode):
+            if group_tags is ...:
+                return True
+            if group_mode == 'all':
+                return group_tags <= record[2]
+            return bool(group_tags & record[2])
+
+        steps, max_size, max_extra = [], 0, 0
+
+        for group_tags, group_mode in groups:
+            group = [r for r in records if matches(r, group_tags, group_mode)]
+            if not group:
+                raise ValueError("No tags were found - nothing to contract.")
+            records = [r for r in records
+                       if not matches(r, group_tags, group_mode)]
+
+            o_ix, o_shape, group_steps, max_live = _contraction_steps(
+                [r[0] for r in group], [r[1] for r in group],
+                output_inds, optimize)
+
+            # intermediates from previous groups still alive
+            prev_size = sum(prod(r[1]) for r in records + group if r[3])
+            max_extra = max(max_extra, prev_size + max_live)
+            max_size = max(max_size, prod(o_shape),
+                           *(step['size'] for step in group_steps))
+            steps += group_steps
+
+            records.append([o_ix, o_shape, set_join(r[2] for r in group),
+                            True])
+            if len(records) == 1:
+                break
+
+        return {
+            'flops': sum(step['flops'] for step in steps),
+            'max_size': max_size,
+            'peak_memory': itemsize * (base_size + max_extra),
+            'steps': steps,
+            'optimize': optimize,
+        }
+
+    def compile(self, tags=..., output_inds=None, mode='any', **plan_opts):
+        """Compile the contraction of some, or all, of the tensors in this
+        network into a reusable :class:`ContractionPlan`. This is useful when
+        the same topology will be contracted many times with new data, since
+        calling the plan skips all the index parsing and path lookup.
+
+        Parameters
+        ----------
+        tags : sequence of str, optional
+            Compile the contraction of tensors with any of these tags, by
+            default all tensors.
+        output_inds : sequence, optional
+            The desired order of output indices.
+        mode : {'any', 'all'}, optional
+            Whether to require matching all or any of the tags.
+        plan_opts
+            Passed to :class:`ContractionPlan`, e.g. ``max_memory``.
+
+        Returns
+        -------
+        ContractionPlan
+            The plan, which should be called with arrays in the same order as
+            ``self.tensors``, or ``self.select_tensors(tags, mode=mode)`` if
+            ``tags`` is given.
+
+        Examples
+        --------
+        >>> tn = MPS_rand_state(10, 7) & MPS_rand_state(10, 7)
+        >>> plan = tn.compile()
+        >>> plan(*(t.data for t in tn.tensors))
+        0.01263...
+        """
+        if tags is ...:
+            tensors = self.tensors
+        else:
+            tensors = self.select_tensors(tags, mode=mode)
+        return ContractionPlan(tensors, output_inds=output_inds, **plan_opts)
+
     def __rshift__(self, tags_seq):
         """Overload of '>>' for TensorNetwork.contract_cumulative.
         """
@@ -2181,6 +4450,17 @@ class TensorNetwork(object):
         ix_szs = (zip(t.inds, t.shape) for t in self.tensor_index.values())
         return dict(concat(ix_szs))
 
+    def ind_size(self, ind):
+        """Get the size of ``ind``.
+        """
+        name = next(iter(self.ind_index[ind]))
+        return self.tensor_index[name].ind_size(ind)
+
+    def select_tensors_from_ind(self, ind):
+        """Get the tensor(s) which have index ``ind``.
+        """
+        return tuple(map(self.tensor_index.__getitem__, self.ind_index[ind]))
+
     def all_inds_dims(self):
         """Return a list of all indices, and the corresponding list of
         dimensions from the tensor network.
@@ -2196,17 +4476,31 @@ class TensorNetwork(object):
     def inner_inds(self):
         """Return tuple of all inner indices, i.e. those that appear twice.
         """
-        all_inds = self.all_inds()
-        ind_freqs = frequencies(all_inds)
-        return tuple(i for i in all_inds if ind_freqs[i] == 2)
+        if self._ind_index is None:
+            # cheaper to just scan once than build the index map
+            all_inds = self.all_inds()
+            ind_freqs = frequencies(all_inds)
+            return tuple(unique(i for i in all_inds if ind_freqs[i] == 2))
+
+        return tuple(ix for ix, c in self._get_ind_counts().items() if c == 2)
 
     def outer_dims_inds(self):
         """Get the 'outer' pairs of dimension and indices, i.e. as if this
         tensor network was fully contracted.
         """
-        inds, dims = self.all_inds_dims()
-        ind_freqs = frequencies(inds)
-        return tuple((d, i) for d, i in zip(dims, inds) if ind_freqs[i] == 1)
+        if self._ind_index is None:
+            # cheaper to just scan once than build the index map
+            inds, dims = self.all_inds_dims()
+            ind_freqs = frequencies(inds)
+            return tuple((d, i) for d, i in zip(dims, inds)
+                         if ind_freqs[i] == 1)
+
+        dims_inds = []
+        for ix, c in self._get_ind_counts().items():
+            if c == 1:
+                name, = self._ind_index[ix]
+                dims_inds.append((self.tensor_index[name].ind_size(ix), ix))
+        return tuple(dims_inds)
 
     def outer_inds(self):
         """Actual, i.e. exterior, indices of this TensorNetwork.
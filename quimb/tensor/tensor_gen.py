@@ -8,6 +8,7 @@ from ..linalg.base_linalg import norm_fro_dense
 from ..gen.operators import spin_operator, eye
 from .tensor_core import Tensor
 from .tensor_1d import MatrixProductState, MatrixProductOperator
+from .tensor_tebd import NNI
 
 
 def randn(shape, dtype=float):
@@ -327,6 +328,14 @@ def spin_ham_mpo_tensor(one_site_terms, two_site_terms, S=1 / 2, which=None):
     return H
 
 
+def _realify(x):
+    """Drop the imaginary part of an operator if it is zero.
+    """
+    if x is not None and np.allclose(np.imag(x), 0.0):
+        return np.real(x)
+    return x
+
+
 class MPOSpinHam:
     """Class for easily building translationally invariant spin hamiltonians in
     MPO form. Currently limited to nearest neighbour interactions (and single
@@ -387,30 +396,37 @@ class MPOSpinHam:
                                      lower_ind_id=lower_ind_id,
                                      site_tag_id=site_tag_id, tags=tags)
 
+    def build_nni(self, n):
+        """Build an instance of this hamiltonian of size ``n`` in nearest
+        neighbour interaction form, e.g. for time evolution with
+        :class:`~quimb.tensor.tensor_tebd.TEBD`. See also
+        :class:`~quimb.tensor.tensor_tebd.NNI`.
+        """
+        def get_op(s):
+            return spin_operator(s, S=self.S) if isinstance(s, str) else s
 
-def MPO_ham_ising(n, j=1.0, bx=0.0,
-                  upper_ind_id='k{}',
-                  lower_ind_id='b{}',
-                  site_tag_id='I{}',
-                  tags=None,
-                  bond_name=""):
-    """Ising Hamiltonian in matrix product operator form.
-    """
+        D = int(2 * self.S + 1)
+
+        H2 = sum(factor * np.kron(get_op(s1), get_op(s2))
+                 for factor, s1, s2 in self.two_site_terms)
+        if not self.two_site_terms:
+            H2 = np.zeros((D**2, D**2))
+
+        H1 = None
+        if self.one_site_terms:
+            H1 = sum(factor * get_op(s) for factor, s in self.one_site_terms)
+
+        return NNI(_realify(H2), n, H1=_realify(H1))
+
+
+def _spin_ham_ising(j, bx):
     H = MPOSpinHam(S=1 / 2)
     H.add_term(j, 'Z', 'Z')
     H.add_term(-bx, 'X')
-    return H.build(n, site_tag_id=site_tag_id, tags=tags, bond_name=bond_name,
-                   upper_ind_id=upper_ind_id, lower_ind_id=lower_ind_id)
+    return H
 
 
-def MPO_ham_XY(n, j=1.0, bz=0.0,
-               upper_ind_id='k{}',
-               lower_ind_id='b{}',
-               site_tag_id='I{}',
-               tags=None,
-               bond_name=""):
-    """XY-Hamiltonian in matrix product operator form.
-    """
+def _spin_ham_XY(j, bz):
     try:
         jx, jy = j
     except (TypeError, ValueError):
@@ -425,18 +441,10 @@ def MPO_ham_XY(n, j=1.0, bz=0.0,
         H.add_term(jx, 'X', 'X')
         H.add_term(jy, 'Y', 'Y')
     H.add_term(-bz, 'Z')
-    return H.build(n, site_tag_id=site_tag_id, tags=tags, bond_name=bond_name,
-                   upper_ind_id=upper_ind_id, lower_ind_id=lower_ind_id)
+    return H
 
 
-def MPO_ham_heis(n, j=1.0, bz=0.0,
-                 upper_ind_id='k{}',
-                 lower_ind_id='b{}',
-                 site_tag_id='I{}',
-                 tags=None,
-                 bond_name=""):
-    """Heisenberg Hamiltonian in matrix product operator form.
-    """
+def _spin_ham_heis(j, bz):
     try:
         jx, jy, jz = j
     except (TypeError, ValueError):
@@ -452,10 +460,66 @@ def MPO_ham_heis(n, j=1.0, bz=0.0,
         H.add_term(jy, 'Y', 'Y')
     H.add_term(jz, 'Z', 'Z')
     H.add_term(-bz, 'Z')
+    return H
+
+
+def MPO_ham_ising(n, j=1.0, bx=0.0,
+                  upper_ind_id='k{}',
+                  lower_ind_id='b{}',
+                  site_tag_id='I{}',
+                  tags=None,
+                  bond_name=""):
+    """Ising Hamiltonian in matrix product operator form.
+    """
+    H = _spin_ham_ising(j, bx)
+    return H.build(n, site_tag_id=site_tag_id, tags=tags, bond_name=bond_name,
+                   upper_ind_id=upper_ind_id, lower_ind_id=lower_ind_id)
+
+
+def MPO_ham_XY(n, j=1.0, bz=0.0,
+               upper_ind_id='k{}',
+               lower_ind_id='b{}',
+               site_tag_id='I{}',
+               tags=None,
+               bond_name=""):
+    """XY-Hamiltonian in matrix product operator form.
+    """
+    H = _spin_ham_XY(j, bz)
     return H.build(n, site_tag_id=site_tag_id, tags=tags, bond_name=bond_name,
                    upper_ind_id=upper_ind_id, lower_ind_id=lower_ind_id)
 
 
+def MPO_ham_heis(n, j=1.0, bz=0.0,
+                 upper_ind_id='k{}',
+                 lower_ind_id='b{}',
+                 site_tag_id='I{}',
+                 tags=None,
+                 bond_name=""):
+    """Heisenberg Hamiltonian in matrix product operator form.
+    """
+    H = _spin_ham_heis(j, bz)
+    return H.build(n, site_tag_id=site_tag_id, tags=tags, bond_name=bond_name,
+                   upper_ind_id=upper_ind_id, lower_ind_id=lower_ind_id)
+
+
+def NNI_ham_ising(n, j=1.0, bx=0.0):
+    """Ising Hamiltonian in nearest neighbour interaction form.
+    """
+    return _spin_ham_ising(j, bx).build_nni(n)
+
+
+def NNI_ham_XY(n, j=1.0, bz=0.0):
+    """XY-Hamiltonian in nearest neighbour interaction form.
+    """
+    return _spin_ham_XY(j, bz).build_nni(n)
+
+
+def NNI_ham_heis(n, j=1.0, bz=0.0):
+    """Heisenberg Hamiltonian in nearest neighbour interaction form.
+    """
+    return _spin_ham_heis(j, bz).build_nni(n)
+
+
 def MPO_ham_mbl(n, dh, j=1.0, run=None, S=1 / 2, dh_dist='s',
                 dh_dim=1, beta=None, **mpo_opts):
     """The many-body-localized spin hamiltonian.
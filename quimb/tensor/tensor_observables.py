@@ -0,0 +1,330 @@
+"""Expectation values and correlation functions of matrix product states,
+sharing cached transfer environments.
+"""
+import weakref
+
+import numpy as np
+
+
+def _transfer_right(E, A, op=None):
+    """Absorb the site ``A``, with shape ``(left, phys, right)``, and
+    optionally the operator ``op`` acting on it, into the left environment
+    ``E``, with shape ``(bra, ket)``.
+    """
+    x = np.tensordot(E, A, axes=(1, 0))
+    if op is not None:
+        x = np.einsum('pq,aqd->apd', op, x)
+    return np.tensordot(A.conj(), x, axes=((0, 1), (0, 1)))
+
+
+def _transfer_left(E, A, op=None):
+    """Absorb the site ``A``, with shape ``(left, phys, right)``, and
+    optionally the operator ``op`` acting on it, into the right environment
+    ``E``, with shape ``(bra, ket)``.
+    """
+    x = np.tensordot(A, E, axes=(2, 1))
+    if op is not None:
+        x = np.einsum('pq,bqc->bpc', op, x)
+    return np.tensordot(A.conj(), x, axes=((1, 2), (1, 2)))
+
+
+def _close(L, A, op, R):
+    """Contract the left environment ``L``, site ``A`` with operator ``op``
+    and the right environment ``R`` into a scalar.
+    """
+    return np.sum(_transfer_right(L, A, op) * R)
+
+
+class MPSObservables:
+    """Compute expectation values and (string) correlation functions of a
+    :class:`~quimb.tensor.tensor_1d.MatrixProductState`, such as::
+
+        <psi| A_i |psi>    or    <psi| A_i S_i+1 ... S_j-1 B_j |psi>
+
+    normalized by ``<psi|psi>``. The left and right transfer environments of
+    ``<psi|psi>``, one per site, are contracted once and cached, so that
+    e.g. all local expectations cost ``O(N chi^3)`` and a full correlation
+    matrix ``O(N^2 chi^3)``, with no need for the state to be in any
+    canonical form.
+
+    The state is referenced, not copied, and may be changed in between
+    measurements, e.g. by a :class:`~quimb.tensor.tensor_tebd.TEBD` or
+    :class:`~quimb.tensor.tensor_algo_static.DMRG` sweep. Before each
+    measurement the sites are checked for new data or indices, and only
+    the environments containing changed sites are rebuilt, see
+    :meth:`invalidate`.
+
+    Parameters
+    ----------
+    psi : MatrixProductState
+        The state to measure.
+
+    Example
+    -------
+    >>> Z = qu.spin_operator('Z').real
+    >>> obs = MPSObservables(psi)
+    >>> mz = obs.local_expecs(Z)
+    >>> zz = obs.correlation_matrix(Z, connected=True)
+    """
+
+    def __init__(self, psi):
+        self.psi = psi
+        self.n = psi.nsites
+
+        # ``_left[i]`` is the contraction of all sites ``< i`` and
+        # ``_right[i]`` that of all sites ``> i``, as ``(bra, ket)`` matrices
+        self._left = {0: np.ones((1, 1))}
+        self._right = {self.n - 1: np.ones((1, 1))}
+
+        # each site as a ``(left, phys, right)`` array, along with the
+        # data and indices it was formed from
+        self._arrays = {}
+
+    # ---------------------------- environments ----------------------------- #
+
+    def _site_changed(self, i):
+        t = self.psi.site[i]
+        data_ref, inds, _ = self._arrays[i]
+        return (data_ref() is not t.data) or (inds != t.inds)
+
+    def invalidate(self, sites=None):
+        """Drop the cached environments containing changed sites. This is
+        called automatically before each measurement.
+
+        Parameters
+        ----------
+        sites : sequence of int, optional
+            The sites which have changed. If not given, check every site for
+            new data or indices, which will catch any change not made in-place
+            to the arrays themselves.
+
+        Returns
+        -------
+        dirty : tuple of int
+            The sites that were found to have changed.
+        """
+        if sites is None:
+            sites = [i for i in self._arrays if self._site_changed(i)]
+        dirty = tuple(sorted(sites))
+
+        if dirty:
+            for i in dirty:
+                self._arrays.pop(i, None)
+
+            # the empty environments at either end are always kept
+            for j in [j for j in self._left if j > dirty[0]]:
+                del self._left[j]
+            for j in [j for j in self._right if j < dirty[-1]]:
+                del self._right[j]
+
+        return dirty
+
+    def _site_array(self, i):
+        """Get site ``i`` as a ``(left, phys, right)`` array.
+        """
+        try:
+            return self._arrays[i][2]
+        except KeyError:
+            pass
+
+        psi, t = self.psi, self.psi.site[i]
+        inds = [psi.site_ind(i)]
+        if i > 0:
+            inds.insert(0, psi.bond(i - 1, i))
+        if i < self.n - 1:
+            inds.append(psi.bond(i, i + 1))
+
+        # add dummy bonds to the end sites
+        A = np.asarray(t.transpose(*inds).data)
+        A = A.reshape(1 if i == 0 else A.shape[0], t.ind_size(inds[i > 0]),
+                      1 if i == self.n - 1 else A.shape[-1])
+        self._arrays[i] = (weakref.ref(t.data), t.inds, A)
+        return A
+
+    def _ensure_left(self, i):
+        j = i
+        while j not in self._left:
+            j -= 1
+        while j < i:
+            self._left[j + 1] = _transfer_right(self._left[j],
+                                                self._site_array(j))
+            j += 1
+        return self._left[i]
+
+    def _ensure_right(self, i):
+        j = i
+        while j not in self._right:
+            j += 1
+        while j > i:
+            self._right[j - 1] = _transfer_left(self._right[j],
+                                                self._site_array(j))
+            j -= 1
+        return self._right[i]
+
+    def _check_sites(self, sites):
+        if sites is None:
+            return range(self.n)
+        sites = sorted(sites)
+        if sites and not (0 <= sites[0] and sites[-1] < self.n):
+            raise ValueError("The sites should all be in range(0, {})."
+                             "".format(self.n))
+        return sites
+
+    # ---------------------------- measurements ----------------------------- #
+
+    def norm(self):
+        """The squared norm, ``<psi|psi>``, of the state.
+        """
+        self.invalidate()
+        return self._norm()
+
+    def _norm(self):
+        return _close(self._ensure_left(0), self._site_array(0), None,
+                      self._ensure_right(0)).real
+
+    def expec(self, op, i):
+        """The normalized expectation value of ``op`` acting on site ``i``.
+
+        Parameters
+        ----------
+        op : array_like
+            The single site operator.
+        i : int
+            The site to act on.
+
+        Returns
+        -------
+        scalar
+        """
+        self.invalidate()
+        op = np.asarray(op)
+        return _close(self._ensure_left(i), self._site_array(i), op,
+                      self._ensure_right(i)) / self._norm()
+
+    def local_expecs(self, op, sites=None):
+        """The normalized expectation value of ``op`` acting on each site.
+
+        Parameters
+        ----------
+        op : array_like
+            The single site operator.
+        sites : sequence of int, optional
+            The sites to compute it for, defaults to all.
+
+        Returns
+        -------
+        1d-array
+        """
+        self.invalidate()
+        op = np.asarray(op)
+        sites = self._check_sites(sites)
+        return np.array([_close(self._ensure_left(i), self._site_array(i), op,
+                                self._ensure_right(i))
+                         for i in sites]) / self._norm()
+
+    def _sweep_correlations(self, A, B, i, js, string):
+        """Yield the (unnormalized) correlations between ``A`` on site ``i``
+        and ``B`` on each of the sites ``js``, all greater than ``i``.
+        """
+        T = _transfer_right(self._ensure_left(i), self._site_array(i), A)
+        k = i + 1
+        for j in js:
+            while k < j:
+                T = _transfer_right(T, self._site_array(k), string)
+                k += 1
+            yield _close(T, self._site_array(j), B, self._ensure_right(j))
+
+    def correlation(self, A, i, j, B=None, string=None):
+        """The normalized correlation ``<A_i S ... S B_j>``.
+
+        Parameters
+        ----------
+        A : array_like
+            The operator acting on site ``i``.
+        i : int
+            The first site.
+        j : int
+            The second site, if the same as ``i``, the expectation of
+            ``A @ B`` is returned.
+        B : array_like, optional
+            The operator acting on site ``j``, defaults to ``A``.
+        string : array_like, optional
+            An operator, e.g. a Jordan-Wigner sign, acting on every site
+            strictly between ``i`` and ``j``.
+
+        Returns
+        -------
+        scalar
+        """
+        A = np.asarray(A)
+        B = A if B is None else np.asarray(B)
+        string = None if string is None else np.asarray(string)
+
+        if i == j:
+            return self.expec(A @ B, i)
+        if i > j:
+            # operators on different sites commute
+            A, B, i, j = B, A, j, i
+
+        self.invalidate()
+        c, = self._sweep_correlations(A, B, i, (j,), string)
+        return c / self._norm()
+
+    def correlation_matrix(self, A, B=None, sites=None, string=None,
+                           connected=False):
+        """The normalized correlations ``C[a, b] = <A_i S ... S B_j>``, with
+        ``i = sites[a]`` and ``j = sites[b]``, for all pairs of sites at
+        once. Each row is computed by a single sweep, reusing the cached
+        environments, so that the total cost is ``O(N^2 chi^3)``.
+
+        Parameters
+        ----------
+        A : array_like
+            The first operator.
+        B : array_like, optional
+            The second operator, defaults to ``A``, in which case only the
+            upper triangle is computed, ``C`` being symmetric.
+        sites : sequence of int, optional
+            The sites to compute it for, defaults to all, will be sorted.
+        string : array_like, optional
+            An operator, e.g. a Jordan-Wigner sign, acting on every site
+            strictly between each pair.
+        connected : bool, optional
+            Whether to subtract ``<A_i><B_j>``.
+
+        Returns
+        -------
+        C : 2d-array
+        """
+        self.invalidate()
+        sites = self._check_sites(sites)
+        m = len(sites)
+
+        A = np.asarray(A)
+        symmetric = B is None
+        B = A if symmetric else np.asarray(B)
+        string = None if string is None else np.asarray(string)
+
+        dtype = np.result_type(A, B, self._site_array(0),
+                               *(() if string is None else (string,)))
+        C = np.empty((m, m), dtype=dtype)
+
+        for a, i in enumerate(sites):
+            C[a, a] = _close(self._ensure_left(i), self._site_array(i), A @ B,
+                             self._ensure_right(i))
+            js = sites[a + 1:]
+            C[a, a + 1:] = tuple(self._sweep_correlations(A, B, i, js,
+                                                          string))
+            if symmetric:
+                C[a + 1:, a] = C[a, a + 1:]
+            else:
+                C[a + 1:, a] = tuple(self._sweep_correlations(B, A, i, js,
+                                                              string))
+
+        C /= self._norm()
+
+        if connected:
+            C -= np.outer(self.local_expecs(A, sites),
+                          self.local_expecs(B, sites))
+
+        return C
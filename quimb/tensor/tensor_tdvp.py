@@ -0,0 +1,474 @@
+"""Time dependent variational principle (TDVP) evolution of matrix product
+states, with arbitrary matrix product operator hamiltonians.
+"""
+import inspect
+
+import numpy as np
+
+from ..utils import continuous_progbar, progbar
+from ..accel import prod
+from ..linalg.base_linalg import expm_multiply
+from .tensor_core import (
+    Tensor,
+    tensor_contract,
+    rand_uuid,
+    EffHamLinearOperator,
+)
+from .tensor_algo_static import (
+    MovingEnvironment,
+    parse_2site_inds_dims,
+    _Checkpointer,
+    _read_checkpoint,
+)
+from .tensor_tebd import _setup_compute
+
+
+class TDVP:
+    """Time evolve a :class:`~quimb.tensor.tensor_1d.MatrixProductState` with
+    a :class:`~quimb.tensor.tensor_1d.MatrixProductOperator` hamiltonian,
+    which can have any range, using the time dependent variational principle
+    of Haegeman et al., PRB 94, 165116 (2016).
+
+    Each time step is a sweep right then left, each by half the step. At
+    each position the local tensor (``bsz=1``) or pair of tensors
+    (``bsz=2``) is evolved forward in time with the effective hamiltonian::
+
+         /|\              /| |\
+        L-H-R     or     L-H-H-R
+         \|/              \| |/
+
+        bsz=1            bsz=2
+
+    then split, and the part carried on to the next position evolved
+    backward in time. The left and right boundaries are kept in a
+    :class:`~quimb.tensor.tensor_algo_static.MovingEnvironment`, just as
+    for :class:`~quimb.tensor.tensor_algo_static.DMRG`, and the local
+    exponentials computed with the Krylov backend of
+    :func:`~quimb.linalg.base_linalg.expm_multiply`, so that the cost is
+    linear in the number of sites.
+
+    The single site version keeps the bond dimensions of the initial state
+    fixed, and conserves the energy exactly, the two site version can grow
+    them, according to ``split_opts``.
+
+    Parameters
+    ----------
+    p0 : MatrixProductState
+        The initial state, not modified.
+    ham : MatrixProductOperator
+        The hamiltonian.
+    dt : float, optional
+        The default time step, if not given here then it must be supplied to
+        :meth:`step`, :meth:`update_to` or :meth:`at_times`.
+    t0 : float, optional
+        The initial time.
+    bsz : {1, 2}, optional
+        The number of sites to evolve at once.
+    imag : bool, optional
+        If True, perform imaginary time evolution, ``exp(-t H)``, keeping the
+        state normalized.
+    split_opts : dict, optional
+        Supplied to :func:`~quimb.tensor.tensor_core.tensor_split` when
+        splitting the two site tensors, e.g.
+        ``{'max_bond': 64, 'cutoff': 1e-10}``.
+    compute : callable, or dict of callable, optional
+        Function(s) to compute on the state each time it is updated to a
+        requested time, called with args ``(t, pt)``, c.f.
+        :class:`~quimb.evo.QuEvo`. The results are collected in
+        :attr:`results`.
+    progbar : bool, optional
+        Whether to show a progress bar during :meth:`update_to` and
+        :meth:`at_times`.
+    checkpoint : str, optional
+        If given, write the state, time and results to this file each time
+        the state is updated to a requested time, so that the evolution can
+        be picked back up with :meth:`load_checkpoint`.
+
+    Attributes
+    ----------
+    err : float
+        The total weight discarded by the two site truncations so far.
+    opts : dict
+        Advanced options, ``'expm_tol'`` and ``'expm_max_krylov'`` for the
+        local exponentials, and ``'eff_ham_dense'``, whether to contract
+        the effective hamiltonian to a dense matrix, by default only if
+        it is small.
+    """
+
+    def __init__(self, p0, ham, dt=None, t0=0.0, bsz=2, imag=False,
+                 split_opts=None, compute=None, progbar=False,
+                 checkpoint=None):
+        if p0.nsites != ham.nsites:
+            raise ValueError("The state has {} sites but the hamiltonian {}."
+                             "".format(p0.nsites, ham.nsites))
+        if bsz not in (1, 2):
+            raise ValueError("``bsz`` should be 1 or 2, got {}.".format(bsz))
+
+        self.n = ham.nsites
+        self.bsz = bsz
+        self.dt = dt
+        self._t = t0
+        self.imag = imag
+        self.split_opts = {} if split_opts is None else dict(split_opts)
+        self.err = 0.0
+        self._progbar = progbar
+
+        # create internal states and ham, with the center on the first site
+        self._k = p0.copy()
+        if not (imag or np.iscomplexobj(self._k.site[0].data)):
+            for t in self._k.tensors:
+                t.modify(data=t.data.astype(complex))
+        self._k.right_canonize(normalize=imag)
+        self._b = self._k.H
+        self.ham = ham.copy()
+        self.ham.add_tag("_HAM")
+
+        self._k.align(self.ham, self._b, inplace=True)
+        self.TN_energy = self._b | self.ham | self._k
+
+        # the environment persists, being swept back and forth
+        self._env = MovingEnvironment(self.TN_energy, n=self.n, start='left',
+                                      bsz=self.bsz)
+
+        self.opts = {
+            'expm_tol': 1e-10,
+            'expm_max_krylov': 50,
+            'eff_ham_dense': None,
+        }
+
+        self._results, self._step_callback = _setup_compute(compute)
+        self._checkpointer = (None if checkpoint is None else
+                              _Checkpointer(checkpoint))
+
+    # ------------------------ local time evolution ------------------------- #
+
+    def _expm_eff_ham(self, tensors, uix, lix, v, x):
+        """Compute ``expm(x * H_eff) @ v``, where ``H_eff`` is the effective
+        hamiltonian formed by ``tensors``, with upper (ket) indices ``uix``
+        and lower (bra) indices ``lix``.
+        """
+        tensors = [t for t in tensors if t is not None]
+        dims = v.shape
+
+        dense = self.opts['eff_ham_dense']
+        if dense is None:
+            dense = prod(dims) < 256
+
+        if dense:
+            A = tensor_contract(*tensors, output_inds=(*lix, *uix))
+            A = A.data.reshape(prod(dims), prod(dims))
+        else:
+            A = EffHamLinearOperator(tensors, upper_inds=uix, lower_inds=lix,
+                                     udims=dims, ldims=dims)
+
+        v = expm_multiply(x * A, v.reshape(-1), backend='KRYLOV',
+                          tol=self.opts['expm_tol'],
+                          max_krylov=self.opts['expm_max_krylov'])
+        if self.imag:
+            v /= np.linalg.norm(v)
+        return v.reshape(dims)
+
+    def _set_site(self, i, data):
+        """Set the data of site ``i`` in both the ket and bra.
+        """
+        self._k.site[i].modify(data=data)
+        self._b.site[i].modify(data=data.conj())
+
+    def _evolve_site(self, i, L, R, x):
+        """Evolve site ``i`` by ``expm(x * H_eff)``, with boundaries ``L``
+        and ``R``.
+        """
+        k_i = self._k.site[i]
+        new = self._expm_eff_ham((L, self.ham.site[i], R), k_i.inds,
+                                 self._b.site[i].inds, k_i.data, x)
+        self._set_site(i, new)
+
+    def _evolve_bond(self, i, j, L, R, C, x):
+        """Evolve the bond matrix ``C``, between sites ``i`` and ``j``, by
+        ``expm(x * H_eff)``, where the effective hamiltonian is formed by the
+        boundaries ``L`` and ``R`` alone, then absorb it into site ``j``.
+        """
+        k_bond, b_bond = self._k.bond(i, j), self._b.bond(i, j)
+        uix = (rand_uuid(), rand_uuid())
+        lix = (rand_uuid(), rand_uuid())
+
+        L = L.reindex({k_bond: uix[0], b_bond: lix[0]})
+        R = R.reindex({k_bond: uix[1], b_bond: lix[1]})
+        C = self._expm_eff_ham((L, R), uix, lix, C, x)
+
+        # ``C`` is always ordered (left, right)
+        k_j = self._k.site[j]
+        tmp = rand_uuid()
+        C_inds = (k_bond, tmp) if i < j else (tmp, k_bond)
+        new = tensor_contract(Tensor(C, C_inds),
+                              k_j.reindex({k_bond: tmp}),
+                              output_inds=k_j.inds)
+        self._set_site(j, new.data)
+
+    def _split_site(self, i, j):
+        """Split site ``i`` into an isometry, which is kept, and the bond
+        matrix towards site ``j``, which is returned.
+        """
+        k_i = self._k.site[i]
+        k_bond = self._k.bond(i, j)
+        left_inds = [ix for ix in k_i.inds if ix != k_bond]
+
+        if i < j:
+            Q, C = k_i.split(left_inds, method='qr', get='tensors')
+            new_bond, = Q.shared_inds(C)
+            C = C.transpose(new_bond, k_bond)
+        else:
+            C, Q = k_i.split((k_bond,), method='lq', get='tensors')
+            new_bond, = Q.shared_inds(C)
+            C = C.transpose(k_bond, new_bond)
+
+        Q.reindex({new_bond: k_bond}, inplace=True)
+        self._set_site(i, Q.transpose(*k_i.inds).data)
+        return C.data
+
+    def _sweep_1site(self, direction, x):
+        env = self._env
+        if direction == 'right':
+            sites, move, dj = range(self.n), env.move_right, 1
+        else:
+            sites, move, dj = range(self.n - 1, -1, -1), env.move_left, -1
+
+        for i in sites:
+            env.move_to(i)
+            L, R = env.boundaries()
+            self._evolve_site(i, L, R, x)
+
+            j = i + dj
+            if not 0 <= j < self.n:
+                break
+
+            C = self._split_site(i, j)
+            move()
+
+            # the boundary on the other side now includes the new site i
+            if direction == 'right':
+                L = env.boundaries()[0]
+            else:
+                R = env.boundaries()[1]
+            self._evolve_bond(i, j, L, R, C, -x)
+
+    def _sweep_2site(self, direction, x):
+        env = self._env
+        if direction == 'right':
+            blocks, move = range(self.n - 1), env.move_right
+        else:
+            blocks, move = range(self.n - 2, -1, -1), env.move_left
+
+        for i in blocks:
+            env.move_to(i)
+            L, R = env.boundaries()
+
+            dims, lix_L, lix_R, lix, uix_L, uix_R, uix, l_bond_ind, \
+                u_bond_ind = parse_2site_inds_dims(self._k, self._b, i)
+            k_L, k_R = self._k.site[i], self._k.site[i + 1]
+            theta = k_L.contract(k_R, output_inds=uix).data
+            theta = self._expm_eff_ham(
+                (L, self.ham.site[i], self.ham.site[i + 1], R),
+                uix, lix, theta, x)
+
+            info = {}
+            T_L, T_R = Tensor(theta, uix).split(
+                left_inds=uix_L, get='tensors', absorb=direction, info=info,
+                **self.split_opts)
+            self.err += info.get('discarded_weight', 0.0)
+
+            new_bond, = T_L.shared_inds(T_R)
+            T_L.reindex({new_bond: u_bond_ind}, inplace=True)
+            T_R.reindex({new_bond: u_bond_ind}, inplace=True)
+            self._set_site(i, T_L.transpose(*k_L.inds).data)
+            self._set_site(i + 1, T_R.transpose(*k_R.inds).data)
+
+            if direction == 'right' and i < self.n - 2:
+                move()
+                self._evolve_site(i + 1, env.boundaries()[0], R, -x)
+            elif direction == 'left' and i > 0:
+                move()
+                self._evolve_site(i, L, env.boundaries()[1], -x)
+
+    def sweep(self, direction, dt):
+        """Evolve the state by ``dt`` with a single sweep of local updates,
+        which is only first order in ``dt``, see :meth:`step`.
+
+        Parameters
+        ----------
+        direction : {'right', 'left'}
+            The direction to sweep in, the orthogonality center, and the
+            environment, should be at the starting end.
+        dt : float
+            The time step.
+        """
+        x = -dt if self.imag else -1j * dt
+        {1: self._sweep_1site, 2: self._sweep_2site}[self.bsz](direction, x)
+
+    # ----------------------------- Stepping -------------------------------- #
+
+    def step(self, dt=None):
+        """Perform a single, second order, time step, as a right then left
+        sweep, each of half the step.
+
+        Parameters
+        ----------
+        dt : float, optional
+            The time step, defaults to ``self.dt``.
+        """
+        if dt is None:
+            dt = self.dt
+        if dt is None:
+            raise ValueError("No time step ``dt`` given.")
+
+        self.sweep('right', dt / 2)
+        self.sweep('left', dt / 2)
+        self._t += dt
+
+    def update_to(self, T, dt=None, progbar=None):
+        """Evolve the state up to time ``T``, using equal steps no larger
+        than ``dt``, then compute any callbacks and write any checkpoint.
+
+        Parameters
+        ----------
+        T : float
+            The time to evolve to.
+        dt : float, optional
+            The maximum time step, defaults to ``self.dt``.
+        progbar : bool, optional
+            Whether to show a progress bar, defaults to the class setting.
+        """
+        if dt is None:
+            dt = self.dt
+        if dt is None:
+            raise ValueError("No time step ``dt`` given.")
+        if progbar is None:
+            progbar = self._progbar
+
+        nsteps = int(np.ceil(abs(T - self._t) / dt - 1e-10))
+        if nsteps > 0:
+            step_dt = (T - self._t) / nsteps
+
+            if progbar:
+                with continuous_progbar(self._t, T) as pbar:
+                    for _ in range(nsteps):
+                        self.step(dt=step_dt)
+                        pbar.cupdate(self._t)
+            else:
+                for _ in range(nsteps):
+                    self.step(dt=step_dt)
+
+        self._t = T
+
+        if self._step_callback is not None:
+            self._step_callback(self._t, self.pt)
+
+        if self._checkpointer is not None:
+            self._write_checkpoint()
+
+    def at_times(self, ts, dt=None):
+        """Generator expression to yield the state at a sequence of times.
+
+        Parameters
+        ----------
+        ts : sequence of float
+            The times at which to evolve to, then yield the state.
+        dt : float, optional
+            The maximum time step, defaults to ``self.dt``.
+
+        Yields
+        ------
+        pt : MatrixProductState
+            The state at the next time in ``ts``, this is a view of the
+            evolving state, so should be copied if it is to be kept.
+        """
+        if self._progbar:
+            ts = progbar(ts)
+
+        for t in ts:
+            self.update_to(t, dt=dt, progbar=False)
+            yield self.pt
+
+    # --------------------------- checkpointing ----------------------------- #
+
+    def _write_checkpoint(self):
+        def static():
+            return {'cls': self.__class__,
+                    'ham': self.ham,
+                    'init_args': {'dt': self.dt,
+                                  'bsz': self.bsz,
+                                  'imag': self.imag,
+                                  'split_opts': self.split_opts}}
+
+        header = {'t': self._t,
+                  'err': self.err,
+                  'opts': self.opts,
+                  'results': self._results}
+        self._checkpointer.write(static, header, self._k.copy())
+
+    @classmethod
+    def load_checkpoint(cls, filename, compute=None, progbar=False):
+        """Load an evolution from a checkpoint, e.g. after the process running
+        it was killed. It can then be continued with :meth:`update_to` or
+        :meth:`at_times`, and will keep checkpointing to the same file.
+
+        Parameters
+        ----------
+        filename : str
+            The checkpoint file, as given to ``TDVP(..., checkpoint=...)``.
+        compute : callable, or dict of callable, optional
+            The function(s) to compute, the results computed so far are
+            restored if these match the original ones.
+        progbar : bool, optional
+            Whether to show a progress bar.
+
+        Returns
+        -------
+        TDVP
+            The evolution, at the time of its last checkpoint.
+        """
+        static, header, state, _ = _read_checkpoint(filename)
+
+        if not issubclass(static['cls'], cls):
+            raise TypeError(f"{filename} holds a checkpoint of a "
+                            f"{static['cls'].__name__}, not a {cls.__name__}.")
+
+        params = inspect.signature(static['cls']).parameters
+        init_args = {k: v for k, v in static['init_args'].items()
+                     if k in params}
+        self = static['cls'](state, static['ham'], t0=header['t'],
+                             compute=compute, progbar=progbar,
+                             checkpoint=filename, **init_args)
+        self.err = header['err']
+        self.opts = header['opts']
+
+        results = header['results']
+        if isinstance(self._results, dict) and isinstance(results, dict):
+            for k, v in results.items():
+                if k in self._results:
+                    self._results[k].extend(v)
+        elif isinstance(self._results, list) and isinstance(results, list):
+            self._results.extend(results)
+
+        return self
+
+    # ----------------------------- Properties ------------------------------ #
+
+    @property
+    def t(self):
+        """float : The current time.
+        """
+        return self._t
+
+    @property
+    def pt(self):
+        """MatrixProductState : The state at the current time.
+        """
+        return self._k
+
+    @property
+    def results(self):
+        """list, or dict of lists : The results of the compute callback(s)
+        at each requested time.
+        """
+        return self._results
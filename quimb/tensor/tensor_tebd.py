@@ -0,0 +1,393 @@
+"""Time evolving block decimation (TEBD) of matrix product states.
+"""
+import functools
+
+import numpy as np
+
+from ..utils import continuous_progbar, progbar
+from .tensor_core import Tensor, tensor_contract, rand_uuid
+
+
+def _setup_compute(fn):
+    """Setup the callback(s) ``fn`` to compute on the state, c.f.
+    :class:`~quimb.evo.QuEvo`, returning the (list or dict of lists of)
+    results, and a function to call with ``(t, pt)`` that appends to them.
+    """
+    if fn is None:
+        return None, None
+
+    # dict of funcs input -> dict of funcs output
+    if isinstance(fn, dict):
+        results = {k: [] for k in fn}
+
+        @functools.wraps(fn)
+        def step_callback(t, pt):
+            for k, v in fn.items():
+                results[k].append(v(t, pt))
+
+    # else results -> single list of outputs of fn
+    else:
+        results = []
+
+        @functools.wraps(fn)
+        def step_callback(t, pt):
+            results.append(fn(t, pt))
+
+    return results, step_callback
+
+
+class NNI:
+    """A nearest neighbour interaction hamiltonian for an open chain of ``n``
+    sites, stored as a dense two-site term for each bond::
+
+        H = sum_i H2[i, i + 1] + sum_i H1[i]
+
+    The single site terms are shared out between the bonds touching each
+    site, so that ``H`` is simply the sum of the ``n - 1`` bond terms, see
+    :meth:`bond_term`. Usually built using :meth:`MPOSpinHam.build_nni`.
+
+    Parameters
+    ----------
+    H2 : array_like or dict[int, array_like]
+        The two site term(s), as a ``(d**2, d**2)`` matrix. If a dict, the
+        term for bond ``(i, i + 1)`` is ``H2[i]``, with any missing bonds
+        given by ``H2[None]``.
+    n : int
+        The number of sites.
+    H1 : array_like or dict[int, array_like], optional
+        The single site term(s), similarly specified.
+
+    Example
+    -------
+    >>> builder = MPOSpinHam(S=1 / 2)
+    >>> builder.add_term(1.0, 'Z', 'Z')
+    >>> builder.add_term(-0.5, 'X')
+    >>> H = builder.build_nni(100)
+    """
+
+    def __init__(self, H2, n, H1=None):
+        self.n = n
+
+        if not isinstance(H2, dict):
+            H2 = {None: H2}
+        if H1 is None:
+            H1 = {}
+        elif not isinstance(H1, dict):
+            H1 = {None: H1}
+
+        self._H2, self._H1 = H2, H1
+        self.phys_dim = int(round(len(self._get(H2, 0))**0.5))
+        self._gates = {}
+
+    @staticmethod
+    def _get(terms, i):
+        try:
+            return terms[i]
+        except KeyError:
+            return terms.get(None, None)
+
+    def bond_term(self, i):
+        """The dense term for the bond ``(i, i + 1)``, including its share of
+        the single site terms of site ``i`` and ``i + 1``.
+        """
+        H = np.asarray(self._get(self._H2, i))
+
+        eye = np.eye(self.phys_dim)
+        for site, place in ((i, lambda h: np.kron(h, eye)),
+                            (i + 1, lambda h: np.kron(eye, h))):
+            h = self._get(self._H1, site)
+            if h is not None:
+                # the end sites only touch a single bond
+                w = 1.0 if site in (0, self.n - 1) else 0.5
+                H = H + w * place(np.asarray(h))
+
+        return H
+
+    def get_gate_expm(self, i, x):
+        """Get the gate ``expm(x * bond_term(i))``, reshaped as
+        ``(d, d, d, d)`` with the output indices first. These are cached,
+        since TEBD usually only needs a few different ``x``.
+        """
+        key = (i, x)
+        if key not in self._gates:
+            H = self.bond_term(i)
+            el, ev = np.linalg.eigh(H)
+            G = (ev * np.exp(x * el)) @ ev.conj().T
+            if np.isrealobj(H) and np.isreal(x):
+                G = G.real
+            self._gates[key] = G.reshape((self.phys_dim,) * 4)
+        return self._gates[key]
+
+
+class TEBD:
+    """Time evolve a :class:`~quimb.tensor.tensor_1d.MatrixProductState` with
+    a nearest neighbour hamiltonian using time evolving block decimation.
+    Each time step is split (Trotterized) into layers of two site gates
+    acting on either the even or the odd bonds. A layer is applied by
+    sweeping across the chain, keeping the orthogonality center on the bond
+    being updated so that each truncation is optimal, hence the cost is
+    linear in the number of sites.
+
+    Parameters
+    ----------
+    p0 : MatrixProductState
+        The initial state, not modified.
+    H : NNI
+        The hamiltonian.
+    dt : float, optional
+        The default time step, if not given here then it must be supplied to
+        :meth:`step`, :meth:`update_to` or :meth:`at_times`.
+    t0 : float, optional
+        The initial time.
+    imag : bool, optional
+        If True, perform imaginary time evolution, ``exp(-t H)``, keeping the
+        state normalized.
+    split_opts : dict, optional
+        Supplied to :func:`~quimb.tensor.tensor_core.tensor_split` after
+        each gate, e.g. ``{'max_bond': 64, 'cutoff': 1e-10}``.
+    compute : callable, or dict of callable, optional
+        Function(s) to compute on the state each time it is updated to a
+        requested time, called with args ``(t, pt)``, c.f.
+        :class:`~quimb.evo.QuEvo`. The results are collected in
+        :attr:`results`.
+    progbar : bool, optional
+        Whether to show a progress bar during :meth:`update_to` and
+        :meth:`at_times`.
+
+    Attributes
+    ----------
+    err : float
+        The total weight discarded by the truncations so far.
+    """
+
+    def __init__(self, p0, H, dt=None, t0=0.0, imag=False, split_opts=None,
+                 compute=None, progbar=False):
+        if p0.nsites != H.n:
+            raise ValueError("The state has {} sites but the hamiltonian {}."
+                             "".format(p0.nsites, H.n))
+
+        self._pt = p0.copy()
+        self._pt.left_canonize(normalize=imag)
+        self._center = self._pt.nsites - 1
+
+        self.H = H
+        self.dt = dt
+        self._t = t0
+        self.imag = imag
+        self.split_opts = {} if split_opts is None else dict(split_opts)
+        self.err = 0.0
+        self._progbar = progbar
+
+        # a layer of gates is only applied once the next, different, layer
+        #     is requested, so that consecutive layers can be merged
+        self._queued = None
+
+        self._results, self._step_callback = _setup_compute(compute)
+
+    # ------------------------------ Gates ---------------------------------- #
+
+    def _apply_gate(self, i, G, absorb):
+        """Apply the gate ``G`` to sites ``i, i + 1``, then split them back
+        up, truncating according to ``split_opts``.
+        """
+        k = self._pt
+        T1, T2 = k.site[i], k.site[i + 1]
+        ix1, ix2 = k.site_ind(i), k.site_ind(i + 1)
+        tmp1, tmp2 = rand_uuid(), rand_uuid()
+
+        bond, = T1.shared_inds(T2)
+        left_inds = [ix for ix in T1.inds if ix != bond]
+
+        theta = tensor_contract(T1.reindex({ix1: tmp1}),
+                                T2.reindex({ix2: tmp2}),
+                                Tensor(G, inds=(ix1, ix2, tmp1, tmp2)))
+
+        info = {}
+        L, R = theta.split(left_inds, absorb=absorb, get='tensors', info=info,
+                           **self.split_opts)
+        self.err += info.get('discarded_weight', 0.0)
+
+        new_bond, = L.shared_inds(R)
+        L.reindex({new_bond: bond}, inplace=True)
+        R.reindex({new_bond: bond}, inplace=True)
+        T1.modify(data=L.transpose(*T1.inds).data)
+        T2.modify(data=R.transpose(*T2.inds).data)
+
+    def _move_center(self, i):
+        if i > self._center:
+            for j in range(self._center, i):
+                self._pt.left_canonize_site(j)
+        else:
+            for j in range(self._center, i, -1):
+                self._pt.right_canonize_site(j)
+        self._center = i
+
+    def sweep(self, parity, dt):
+        """Apply a layer of gates ``expm(-i dt H_b)`` (or ``expm(-dt H_b)``
+        if ``imag``) on every bond ``b = (i, i + 1)`` with ``i % 2 == parity``,
+        sweeping towards whichever end is further from the current
+        orthogonality center.
+
+        Parameters
+        ----------
+        parity : {0, 1}
+            Whether to act on the even or odd bonds.
+        dt : float
+            The time step.
+        """
+        x = -dt if self.imag else -1j * dt
+        bonds = range(parity, self._pt.nsites - 1, 2)
+
+        if self._center < self._pt.nsites // 2:
+            for i in bonds:
+                self._move_center(i)
+                self._apply_gate(i, self.H.get_gate_expm(i, x), 'right')
+                self._center = i + 1
+        else:
+            for i in reversed(bonds):
+                self._move_center(i + 1)
+                self._apply_gate(i, self.H.get_gate_expm(i, x), 'left')
+                self._center = i
+
+        if self.imag:
+            Tc = self._pt.site[self._center]
+            Tc.modify(data=Tc.data / np.linalg.norm(Tc.data))
+
+    def _queue_sweep(self, parity, dt):
+        if self._queued is not None:
+            queued_parity, queued_dt = self._queued
+            if queued_parity == parity:
+                self._queued = (parity, queued_dt + dt)
+                return
+            self.sweep(*self._queued)
+        self._queued = (parity, dt)
+
+    def _flush(self):
+        if self._queued is not None:
+            self.sweep(*self._queued)
+            self._queued = None
+
+    # ----------------------------- Stepping -------------------------------- #
+
+    def _step_order2(self, dt):
+        self._queue_sweep(0, dt / 2)
+        self._queue_sweep(1, dt)
+        self._queue_sweep(0, dt / 2)
+
+    def _step_order4(self, dt):
+        # Forest-Ruth / Yoshida composition of three second order steps
+        w1 = 1 / (2 - 2**(1 / 3))
+        w0 = 1 - 2 * w1
+        for w in (w1, w0, w1):
+            self._step_order2(w * dt)
+
+    def step(self, order=2, dt=None):
+        """Perform a single time step.
+
+        Parameters
+        ----------
+        order : {2, 4}, optional
+            The order of the Trotter-Suzuki splitting.
+        dt : float, optional
+            The time step, defaults to ``self.dt``.
+        """
+        if dt is None:
+            dt = self.dt
+        if dt is None:
+            raise ValueError("No time step ``dt`` given.")
+
+        try:
+            stepper = {2: self._step_order2, 4: self._step_order4}[order]
+        except KeyError:
+            raise ValueError("``order`` should be 2 or 4, got {}."
+                             "".format(order))
+
+        stepper(dt)
+        self._t += dt
+
+    def update_to(self, T, dt=None, order=4, progbar=None):
+        """Evolve the state up to time ``T``, using equal steps no larger
+        than ``dt``, then compute any callbacks.
+
+        Parameters
+        ----------
+        T : float
+            The time to evolve to.
+        dt : float, optional
+            The maximum time step, defaults to ``self.dt``.
+        order : {2, 4}, optional
+            The order of the Trotter-Suzuki splitting.
+        progbar : bool, optional
+            Whether to show a progress bar, defaults to the class setting.
+        """
+        if dt is None:
+            dt = self.dt
+        if dt is None:
+            raise ValueError("No time step ``dt`` given.")
+        if progbar is None:
+            progbar = self._progbar
+
+        nsteps = int(np.ceil(abs(T - self._t) / dt - 1e-10))
+        if nsteps > 0:
+            step_dt = (T - self._t) / nsteps
+
+            if progbar:
+                with continuous_progbar(self._t, T) as pbar:
+                    for _ in range(nsteps):
+                        self.step(order=order, dt=step_dt)
+                        pbar.cupdate(self._t)
+            else:
+                for _ in range(nsteps):
+                    self.step(order=order, dt=step_dt)
+
+        self._t = T
+
+        if self._step_callback is not None:
+            self._step_callback(self._t, self.pt)
+
+    def at_times(self, ts, dt=None, order=4):
+        """Generator expression to yield the state at a sequence of times.
+
+        Parameters
+        ----------
+        ts : sequence of float
+            The times at which to evolve to, then yield the state.
+        dt : float, optional
+            The maximum time step, defaults to ``self.dt``.
+        order : {2, 4}, optional
+            The order of the Trotter-Suzuki splitting.
+
+        Yields
+        ------
+        pt : MatrixProductState
+            The state at the next time in ``ts``, this is a view of the
+            evolving state, so should be copied if it is to be kept.
+        """
+        if self._progbar:
+            ts = progbar(ts)
+
+        for t in ts:
+            self.update_to(t, dt=dt, order=order, progbar=False)
+            yield self.pt
+
+    # ----------------------------- Properties ------------------------------ #
+
+    @property
+    def t(self):
+        """float : The current time.
+        """
+        return self._t
+
+    @property
+    def pt(self):
+        """MatrixProductState : The state at the current time.
+        """
+        self._flush()
+        return self._pt
+
+    @property
+    def results(self):
+        """list, or dict of lists : The results of the compute callback(s)
+        at each requested time.
+        """
+        return self._results
@@ -1,6 +1,8 @@
 from pytest import fixture, mark, raises
 import numpy as np
 import scipy.sparse as sp
+import scipy.linalg as sla
+import scipy.sparse.linalg as spla
 from numpy.testing import assert_allclose
 
 from quimb import (
@@ -25,6 +27,7 @@ from quimb import (
     svds,
     norm,
     expm,
+    expm_multiply,
     sqrtm,
 )
 from quimb.linalg import SLEPC4PY_FOUND
@@ -332,6 +335,38 @@ class TestExpm:
             assert isinstance(p, sp.csr_matrix)
 
 
+class TestExpmMultiply:
+    def test_krylov_dense(self, mat_herm_dense):
+        _, a = mat_herm_dense
+        v = np.random.randn(4) + 1j * np.random.randn(4)
+        x = expm_multiply(-0.3j * a, v, backend='KRYLOV')
+        assert_allclose(x, sla.expm(-0.3j * np.asarray(a)) @ v)
+
+    def test_krylov_linear_operator(self):
+        np.random.seed(2)
+        a = np.random.randn(100, 100)
+        a = (a + a.T) / 20
+        v = np.random.randn(100)
+        op = spla.aslinearoperator(a)
+        x = expm_multiply(-0.5 * op, v, backend='KRYLOV', tol=1e-12)
+        assert_allclose(x, sla.expm(-0.5 * a) @ v, rtol=1e-8)
+
+    def test_krylov_substeps(self):
+        # too few krylov vectors to reach ``tol`` in a single step
+        np.random.seed(3)
+        a = np.random.randn(100, 100)
+        a = (a + a.T) / 2
+        v = np.random.randn(100)
+        x = expm_multiply(-0.5j * a, v, backend='KRYLOV', tol=1e-10,
+                          max_krylov=10)
+        assert_allclose(x, sla.expm(-0.5j * a) @ v, rtol=1e-8)
+
+    def test_krylov_zero_vector(self, mat_herm_dense):
+        _, a = mat_herm_dense
+        x = expm_multiply(a, np.zeros(4), backend='KRYLOV')
+        assert_allclose(x, np.zeros(4))
+
+
 class TestSqrtm:
     @mark.parametrize("sparse", [True, False])
     @mark.parametrize("herm", [True, False])
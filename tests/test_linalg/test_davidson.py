@@ -0,0 +1,92 @@
+from pytest import fixture, mark, raises
+import numpy as np
+import scipy.sparse.linalg as spla
+from numpy.testing import assert_allclose
+
+from quimb import (
+    qu,
+    ldmul,
+    rand_uni,
+    ham_heis,
+    eigsys,
+    seigsys,
+)
+from quimb.linalg.davidson import seigsys_davidson, DavidsonNoConvergence
+
+
+@fixture
+def ham1():
+    np.random.seed(1)
+    u = rand_uni(30)
+    el = np.linspace(-5, 5, 30)
+    return u, el, u @ ldmul(el, u.H)
+
+
+class TestSeigsysDavidson:
+    @mark.parametrize("which", ['SA', 'LA'])
+    @mark.parametrize("k", [1, 3])
+    def test_dense(self, ham1, k, which):
+        u, el, a = ham1
+        lk, vk = seigsys_davidson(a, k=k, which=which)
+        exact = el[:k] if which == 'SA' else el[-k:]
+        assert_allclose(lk, exact)
+        assert_allclose(vk.H @ a @ vk, np.diag(exact), atol=1e-8)
+
+    @mark.parametrize("precond", [False, True])
+    def test_sparse_and_linear_operator(self, precond):
+        h = ham_heis(8, sparse=True)
+        el = eigsys(h.toarray(), sort=True)[0]
+        opts = {'precond': h.diagonal()} if precond else {}
+        lk = seigsys_davidson(spla.aslinearoperator(h), k=2,
+                              return_vecs=False, **opts)
+        assert_allclose(lk, el[:2])
+
+    def test_warm_start(self, ham1):
+        u, _, a = ham1
+        v0 = u[:, 0] + 1e-8 * np.random.randn(30, 1)
+        n = [0]
+
+        def matmat(x):
+            n[0] += x.shape[1]
+            return a @ x
+
+        A = spla.LinearOperator(a.shape, matvec=matmat, matmat=matmat,
+                                dtype=a.dtype)
+        lk, vk = seigsys_davidson(A, k=1, v0=v0, tol=1e-6)
+        assert_allclose(abs(u[:, 0].H @ vk), 1.0)
+        assert n[0] <= 2
+
+    def test_small_restarts(self, ham1):
+        _, el, a = ham1
+        lk = seigsys_davidson(a, k=2, ncv=6, return_vecs=False)
+        assert_allclose(lk, el[:2])
+
+    def test_complex(self):
+        np.random.seed(2)
+        a = qu(np.random.randn(20, 20) + 1j * np.random.randn(20, 20))
+        a = a + a.H
+        lk, vk = seigsys_davidson(a, k=2)
+        assert_allclose(lk, eigsys(a)[0][:2])
+        assert_allclose(a @ vk, vk @ np.diag(lk), atol=1e-8)
+
+    def test_via_seigsys(self, ham1):
+        _, el, a = ham1
+        lk = seigsys(a, k=2, backend='davidson', return_vecs=False)
+        assert_allclose(lk, el[:2])
+
+    def test_no_convergence(self):
+        np.random.seed(3)
+        a = np.random.randn(300, 300)
+        a = a + a.T
+        with raises(DavidsonNoConvergence) as e:
+            seigsys_davidson(a, k=1, maxiter=3)
+        assert e.value.eigenvalues[0] > np.linalg.eigvalsh(a)[0] + 1
+        assert e.value.residuals[0] > 1e-10
+        assert e.value.eigenvectors.shape == (300, 1)
+
+    def test_bad_opts(self, ham1):
+        _, _, a = ham1
+        with raises(ValueError):
+            seigsys_davidson(a, sigma=1.0)
+        with raises(ValueError):
+            seigsys_davidson(a, which='LM')
@@ -1,4 +1,5 @@
 import pytest
+import pickle
 
 import numpy as np
 from numpy.testing import assert_allclose
@@ -10,13 +11,19 @@ from quimb import (
     ispos,
     ham_heis,
     neel_state,
+    ptr,
 )
 
 from quimb.tensor import (
     MatrixProductState,
     MatrixProductOperator,
     align_TN_1D,
+    BlockSparseArray,
+    left_canonize_batch,
+    right_canonize_batch,
+    canonize_batch,
     MPS_rand_state,
+    MPS_computational_state,
     MPO_identity,
     MPO_identity_like,
     MPO_zeros,
@@ -304,6 +311,57 @@ class TestMatrixProductState:
         assert_allclose(ex_svns, svns)
         assert_allclose(ex_sgs, sgs)
 
+    @pytest.mark.parametrize("method", ['svd', 'eig'])
+    @pytest.mark.parametrize("centre", [None, 0, 5])
+    def test_entanglement_profile(self, method, centre):
+        n = 10
+        p = MPS_rand_state(n, 8, dtype=complex)
+        pd = p.to_dense()
+        if centre is not None:
+            p.canonize(centre)
+
+        prof = p.entanglement_profile(renyi=(1, 2, np.inf),
+                                      current_orthog_centre=centre,
+                                      method=method)
+        ex_svns = [entropy_subsys(pd, [2] * n, range(i)) for i in range(1, n)]
+        ex_sgs = [schmidt_gap(pd, [2] * n, range(i)) for i in range(1, n)]
+        assert_allclose(prof['entropy'], ex_svns)
+        assert_allclose(prof['schmidt_gap'], ex_sgs)
+        assert prof['renyi'].shape == (3, n - 1)
+        assert_allclose(prof['renyi'][0], ex_svns)
+
+        ex_r2, ex_rinf = [], []
+        for i in range(1, n):
+            el = np.linalg.eigvalsh(ptr(pd, [2] * n, range(i)))
+            ex_r2.append(-np.log2(np.sum(el**2)))
+            ex_rinf.append(-np.log2(np.max(el)))
+        assert_allclose(prof['renyi'][1], ex_r2)
+        assert_allclose(prof['renyi'][2], ex_rinf)
+
+        # the state is left canonized by the sweep
+        assert_allclose(p.H @ p, 1.0)
+        assert p.count_canonized()[0] == n - 1
+
+    def test_entanglement_profile_stream(self):
+        n = 10
+        p = MPS_rand_state(n, 8)
+        prof = p.copy().entanglement_profile(renyi=(2,))
+        gen = p.entanglement_profile(renyi=(2,), stream=True)
+        first = next(gen)
+        assert_allclose(first['entropy'], prof['entropy'][0])
+        assert first['renyi'].shape == (1,)
+        rest = list(gen)
+        assert len(rest) == n - 2
+        assert_allclose([r['schmidt_gap'] for r in rest],
+                        prof['schmidt_gap'][1:])
+
+    def test_gen_schmidt_values(self):
+        p = MPS_rand_state(8, 4)
+        S = list(p.copy().gen_schmidt_values())
+        assert len(S) == 7
+        assert_allclose([s.sum() for s in S], 1.0)
+        assert_allclose(S[3], np.sort(p.schmidt_values(4))[::-1])
+
     @pytest.mark.parametrize("rescale", [False, True])
     def test_partial_trace(self, rescale):
         n = 10
@@ -323,6 +381,90 @@ class TestMatrixProductState:
         rdd = pd.ptr([2] * n, keep=[2, 3, 4, 6, 8])
         assert_allclose(rd, rdd)
 
+    def test_partial_trace_skips_canonical(self):
+        n = 10
+        p = MPS_rand_state(n, 7)
+        p.canonize(4)
+        counts = dict(p.canonize_counts)
+        pd = np.asarray(p.to_dense()).ravel()
+        for keep in ([3, 4, 5], [4], [2, 6]):
+            r = np.asarray(p.ptr(keep=keep).to_dense())
+            assert_allclose(r, ptr(pd, [2] * n, keep=keep), atol=1e-12)
+        # the sites outside of each range were already canonical
+        assert p.canonize_counts['decomposed'] == counts['decomposed']
+        assert p.canonical_range == (4, 4)
+
+        # the state itself is not changed
+        p = MPS_rand_state(n, 7)
+        p.ptr(keep=[4, 5])
+        assert p.canonize_counts == {'decomposed': 8, 'skipped': 0}
+        assert p.canonical_range == (0, 9)
+
+    @pytest.mark.parametrize("keep", [[2, 3], [0, 5], [7]])
+    def test_partial_trace_cyclic(self, keep):
+        p = MPS_rand_state(8, 5, cyclic=True)
+        pd = np.asarray(p.to_dense()).ravel()
+        r = np.asarray(p.ptr(keep=keep).to_dense())
+        assert_allclose(r, ptr(pd, [2] * 8, keep=keep), atol=1e-12)
+
+    def test_canonical_range_tracking(self):
+        n = 10
+        k = MPS_rand_state(n, 7)
+        assert k.canonical_range == (0, 9)
+
+        k.left_canonize()
+        assert k.canonical_range == (9, 9)
+        assert k.canonize_counts == {'decomposed': 9, 'skipped': 0}
+
+        # already left canonical -> nothing to do
+        k.left_canonize()
+        assert k.canonize_counts == {'decomposed': 9, 'skipped': 9}
+
+        # only need to move the center from 9 to 4
+        k.canonize(4)
+        assert k.canonical_range == (4, 4)
+        assert k.canonize_counts['decomposed'] == 14
+        assert k.count_canonized() == (4, 5)
+
+        k.shift_orthogonality_center(4, 6)
+        assert k.canonical_range == (6, 6)
+        assert k.canonize_counts['decomposed'] == 16
+
+        # copies share the form, pickled states forget it
+        assert k.copy().canonical_range == (6, 6)
+        assert pickle.loads(pickle.dumps(k)).canonical_range == (0, 9)
+
+        # changing the data of a site makes it unknown again
+        k.site[2].modify(data=2 * k.site[2].data)
+        assert k.canonical_range == (2, 6)
+        k.site[8].data = k.site[8].data.copy()
+        assert k.canonical_range == (2, 8)
+
+        k.canonize(5)
+        assert k.count_canonized() == (5, 4)
+        assert_allclose(k.H @ k, 4)
+
+    def test_canonical_range_compress(self):
+        k = MPS_rand_state(10, 7)
+        k.compress(max_bond=4)
+        assert k.canonical_range == (0, 0)
+        k.compress(form=5, max_bond=4)
+        assert k.canonical_range == (5, 5)
+        assert k.count_canonized() == (5, 4)
+
+        # absorbing the singular values into both sites
+        k.compress(form='flat', max_bond=4)
+        assert k.canonical_range == (0, 9)
+
+    def test_canonical_range_with_bra(self):
+        k = MPS_rand_state(10, 7)
+        b = k.H
+        k.left_canonize(stop=5, bra=b)
+        assert k.canonical_range == b.canonical_range == (5, 9)
+        k.left_canonize(bra=b)
+        assert k.canonize_counts == {'decomposed': 9, 'skipped': 5}
+        assert_allclose(b @ k, 1)
+
     @pytest.mark.parametrize("cyclic", [False, True])
     def test_specify_sites(self, cyclic):
         sites = [12, 13, 15, 16, 17]
@@ -330,6 +472,71 @@ class TestMatrixProductState:
         assert set(k.tags) == {'I{}'.format(i) for i in sites}
 
 
+class TestCanonizeBatch:
+
+    @pytest.mark.parametrize("method", ['qr', 'svd'])
+    @pytest.mark.parametrize("dtype", [float, complex])
+    def test_left_right_matches_single(self, method, dtype):
+        ks = [MPS_rand_state(8, 5, normalize=False, dtype=dtype)
+              for _ in range(4)]
+        # one with a different bond dimension gets its own batch
+        ks.append(MPS_rand_state(8, 3, normalize=False, dtype=dtype))
+        ds = [k.to_dense() for k in ks]
+
+        left_canonize_batch(ks, normalize=True, method=method)
+        for k, d in zip(ks, ds):
+            assert k.count_canonized() == (7, 0)
+            assert_allclose(k.H @ k, 1)
+            kd = k.to_dense()
+            assert_allclose(abs(kd.conj().T @ d), np.linalg.norm(d))
+
+        right_canonize_batch(ks, method=method)
+        for k in ks:
+            assert k.count_canonized() == (0, 7)
+            assert_allclose(k.H @ k, 1)
+
+    def test_mixed(self):
+        ks = [MPS_rand_state(10, 7) for _ in range(3)]
+        ds = [k.to_dense() for k in ks]
+        canonize_batch(ks, orthogonality_center=4)
+        for k, d in zip(ks, ds):
+            assert k.count_canonized() == (4, 5)
+            assert_allclose(k.to_dense(), d)
+
+    def test_canonical_range_tracking(self):
+        ks = [MPS_rand_state(10, 7) for _ in range(3)]
+        ks[0].left_canonize(stop=5)
+        left_canonize_batch(ks)
+        for k in ks:
+            assert k.canonical_range == (9, 9)
+        assert ks[0].canonize_counts == {'decomposed': 9, 'skipped': 5}
+        assert ks[1].canonize_counts == {'decomposed': 9, 'skipped': 0}
+
+        # already left canonical -> nothing to do
+        left_canonize_batch(ks)
+        assert ks[1].canonize_counts == {'decomposed': 9, 'skipped': 9}
+
+        right_canonize_batch(ks, stop=4)
+        for k in ks:
+            assert k.canonical_range == (4, 4)
+            assert k.count_canonized() == (4, 5)
+
+    def test_block_sparse_fallback(self):
+        k = MPS_computational_state('0101')
+        kb = k.to_block_sparse([1, -1])
+        kr = MPS_rand_state(4, 3)
+        d = kr.to_dense()
+        left_canonize_batch([kb, kr], normalize=True)
+        assert isinstance(kb.site[0].data, BlockSparseArray)
+        assert_allclose(kb.H @ kb, 1)
+        assert_allclose(abs(kr.to_dense().conj().T @ d), 1)
+
+    def test_bad_method(self):
+        ks = [MPS_rand_state(4, 3) for _ in range(2)]
+        with pytest.raises(ValueError):
+            left_canonize_batch(ks, method='lu')
+
+
 class TestMatrixProductOperator:
     def test_matrix_product_operator(self):
         tensors = ([np.random.rand(5, 2, 2)] +
@@ -446,6 +653,38 @@ class TestMatrixProductOperator:
         Ad, Bd, Cd = A.to_dense(), B.to_dense(), C.to_dense()
         assert_allclose(Ad @ Bd, Cd)
 
+    @pytest.mark.parametrize("algorithm", ['direct', 'zipup', 'fit'])
+    def test_apply_mps(self, algorithm):
+        A = MPO_rand_herm(8, 3, dtype=complex)
+        k = MPS_rand_state(8, 4, site_ind_id='q{}')
+        kA = A.apply(k, algorithm=algorithm, max_bond=12, cutoff=1e-14)
+        assert isinstance(kA, MatrixProductState)
+        assert kA.site_ind_id == 'q{}'
+        assert kA.max_bond() <= 12
+        assert_allclose(kA.to_dense(), A.to_dense() @ k.to_dense())
+
+    def test_apply_mps_compressed(self):
+        A = MPO_rand_herm(10, 4)
+        k = MPS_rand_state(10, 6)
+        exact = A.apply(k)
+        kd = A.apply(k, compress=True, max_bond=8, cutoff=1e-14)
+        kf = A.apply(k, algorithm='fit', max_bond=8, cutoff=1e-14)
+        kz = A.apply(k, algorithm='zipup', max_bond=8, cutoff=1e-14)
+        assert kf.max_bond() == kz.max_bond() == 8
+        fid_d = abs(kd.H @ exact)**2 / (kd.H @ kd)
+        fid_f = abs(kf.H @ exact)**2 / (kf.H @ kf)
+        fid_z = abs(kz.H @ exact)**2 / (kz.H @ kz)
+        # fitting is optimal, so at least as good as truncating directly
+        assert fid_f >= fid_d * (1 - 1e-6)
+        assert fid_z <= fid_f * (1 + 1e-6)
+
+    def test_apply_bad_algorithm(self):
+        A = MPO_rand_herm(4, 3)
+        with pytest.raises(ValueError):
+            A.apply(MPS_rand_state(4, 2), algorithm='zip')
+        with pytest.raises(ValueError):
+            A.apply(MPO_rand(4, 2), algorithm='fit')
+
     def test_sites_mpo_mps_product(self):
         k = MPS_rand_state(13, 7)
         X = MPO_rand_herm(3, 5, sites=[3, 6, 7], nsites=13)
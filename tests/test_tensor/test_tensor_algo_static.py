@@ -23,8 +23,12 @@ from quimb.tensor import (
     MPO_ham_heis,
     MPO_ham_mbl,
     MovingEnvironment,
+    MPO_apply_fit,
+    MPO_rand_herm,
+    DMRG,
     DMRG1,
     DMRG2,
+    DMRGParallel,
     DMRGX,
 )
 
@@ -91,6 +95,97 @@ class TestMovingEnvironment:
         assert env.pos == 0
         assert len(env().tensors) == 3
 
+    @pytest.mark.parametrize("start", ['left', 'right'])
+    @pytest.mark.parametrize("bsz", [1, 2])
+    def test_env_contracts_to_full(self, start, bsz):
+        n = 7
+        k = MPS_rand_state(n, bond_dim=5)
+        h = MPO_ham_heis(n)
+        b = k.H
+        align_TN_1D(k, h, b, inplace=True)
+        tn = b | h | k
+        en = tn ^ ...
+
+        env = MovingEnvironment(tn, n=n, start=start, bsz=bsz)
+        sweep = range(n - bsz + 1)
+        for i in (sweep if start == 'left' else reversed(sweep)):
+            env.move_to(i)
+            assert_allclose(env() ^ ..., en)
+            # the boundaries only carry the tag of their closest site
+            for t in env().tensors:
+                assert len(t.tags & {f"I{j}" for j in range(n)}) == 1
+
+        # moving back should reuse the left over environments
+        env.move_to(n // 2)
+        assert_allclose(env() ^ ..., en)
+
+    def test_invalidate(self):
+        n = 7
+        k = MPS_rand_state(n, bond_dim=5)
+        h = MPO_ham_heis(n)
+        b = k.H
+        align_TN_1D(k, h, b, inplace=True)
+        tn = b | h | k
+
+        env = MovingEnvironment(tn, n=n, start='left', bsz=1)
+        env.move_to(n - 1)
+        assert env.invalidate() == ()
+        assert len(env._left) == n
+
+        # change a site without telling the environment
+        x = np.random.randn(*k.site[2].shape)
+        k.site[2].modify(data=x)
+        b.site[2].modify(data=x.conj())
+        assert env.invalidate() == (2,)
+        assert sorted(env._left) == [0, 1, 2]
+        assert_allclose(env() ^ ..., tn ^ ...)
+
+        # sites can also be marked explicitly
+        env.move_to(3)
+        assert env.invalidate([5]) == (5,)
+        assert_allclose(env() ^ ..., tn ^ ...)
+
+
+class TestMPOApplyFit:
+
+    @pytest.mark.parametrize("bsz", [1, 2])
+    def test_converges(self, bsz):
+        A = MPO_ham_heis(10)
+        k = MPS_rand_state(10, 4)
+        exact = A.apply(k)
+        info = {}
+        kf = MPO_apply_fit(A, k, max_bond=6, bsz=bsz, tol=1e-6,
+                           max_sweeps=50, info=info)
+        assert kf.max_bond() <= 6
+        assert len(info['norms']) == info['sweeps']
+        if bsz == 2:
+            assert info['sweeps'] < 50
+        assert_allclose(info['norms'][-1]**2, kf.H @ kf)
+        # the fitted state is the projection of the exact one
+        assert_allclose(kf.H @ exact, kf.H @ kf)
+
+    def test_p0(self):
+        A = MPO_rand_herm(8, 3)
+        k = MPS_rand_state(8, 3)
+        p0 = MPS_rand_state(8, 9)
+        kf = MPO_apply_fit(A, k, bsz=1, p0=p0)
+        assert kf.max_bond() == 9
+        assert_allclose(kf.to_dense(), A.to_dense() @ k.to_dense())
+
+    def test_bad_bsz(self):
+        with pytest.raises(ValueError):
+            MPO_apply_fit(MPO_ham_heis(4), MPS_rand_state(4, 2), bsz=3)
+
+    def test_split_opts(self):
+        A = MPO_ham_heis(8)
+        k = MPS_rand_state(8, 4)
+        kf = A.apply(k, algorithm='fit', max_bond=8, method='eig',
+                     cutoff_mode='rel')
+        assert_allclose(kf.H @ A.apply(k), kf.H @ kf)
+        for opts in ({'absorb': 'both'}, {'get': 'arrays'}):
+            with pytest.raises(ValueError):
+                A.apply(k, algorithm='fit', max_bond=8, **opts)
+
 
 class TestDMRG1:
 
@@ -135,6 +230,18 @@ class TestDMRG1:
         assert e3.real < e2.real
         assert e4.real < e3.real
 
+    def test_envs_reused_between_sweeps(self):
+        dmrg = DMRG1(MPO_ham_heis(6), bond_dims=4)
+        dmrg.sweep_right()
+        env = dmrg._envs['energy']
+        assert env.pos == 5
+
+        # no canonization -> left environments from last sweep still valid
+        dmrg.sweep_left(canonize=False)
+        assert dmrg._envs['energy'] is env
+        assert env.pos == 0
+        assert_allclose(env() ^ ..., dmrg.TN_energy ^ ...)
+
     @pytest.mark.parametrize("dense", [False, True])
     @pytest.mark.parametrize("MPO_ham", [MPO_ham_XY, MPO_ham_heis])
     def test_ground_state_matches(self, dense, MPO_ham):
@@ -181,6 +288,26 @@ class TestDMRG1:
         exp_gs = MPS_product_state([plus()] * 6)
         assert_allclose(abs(exp_gs.H @ mps_gs), 1.0, rtol=1e-3)
 
+    @pytest.mark.parametrize("block_sparse", [False, True])
+    def test_subspace_expansion(self, block_sparse):
+        n = 10
+        h = MPO_ham_heis(n)
+        p0 = MPS_computational_state('01' * (n // 2))
+        if block_sparse:
+            h = h.to_block_sparse([1, -1])
+            p0 = p0.to_block_sparse([1, -1])
+
+        # without expansion the bonds of a product state can't grow
+        dmrg = DMRG1(h, bond_dims=16, p0=p0, subspace_expansion=True)
+        dmrg.opts['eff_eig_tol'] = 1e-10
+        assert dmrg.solve(tol=1e-9, max_sweeps=12, sweep_sequence='RL')
+        assert 4 < dmrg._k.max_bond() <= 16
+
+        actual_e = seigsys(ham_heis(n, cyclic=False, sparse=True), k=1)[0]
+        assert_allclose(dmrg.energy, actual_e, rtol=1e-8)
+        mps_gs = dmrg.state.to_dense()
+        assert_allclose(mps_gs.H @ mps_gs, 1.0)
+
 
 class TestDMRG2:
     @pytest.mark.parametrize("dense", [False, True])
@@ -218,6 +345,146 @@ class TestDMRG2:
         assert_allclose(abs(expec(mps_gs_dense, gs)), 1.0)
 
 
+@pytest.mark.parametrize("DMRG", [DMRG1, DMRG2])
+@pytest.mark.parametrize("precond", [False, True])
+def test_davidson_local_eigensolver(DMRG, precond):
+    h = MPO_ham_heis(10)
+    dmrg = DMRG(h, bond_dims=[4, 8, 16])
+    dmrg.opts['eff_eig_bkd'] = 'davidson'
+    dmrg.opts['eff_eig_dense'] = False
+    dmrg.opts['eff_eig_precond'] = precond
+    assert dmrg.solve(tol=1e-9, max_sweeps=12)
+
+    # the local tolerance should have been tightened
+    assert dmrg._eff_eig_tol() < dmrg.opts['eff_eig_tol']
+
+    actual_e = seigsys(ham_heis(10, cyclic=False, sparse=True), k=1)[0]
+    assert_allclose(dmrg.energy, actual_e, rtol=1e-7)
+
+
+def test_davidson_loose_local_solves():
+    # unconverged local solves are accepted, the sweeps refine them
+    h = MPO_ham_heis(10)
+    dmrg = DMRG2(h, bond_dims=[4, 8, 16])
+    dmrg.opts['eff_eig_bkd'] = 'davidson'
+    dmrg.opts['eff_eig_dense'] = False
+    dmrg.opts['eff_eig_maxiter'] = 2
+    dmrg.solve(tol=1e-9, max_sweeps=20)
+    actual_e = seigsys(ham_heis(10, cyclic=False, sparse=True), k=1)[0]
+    assert_allclose(dmrg.energy, actual_e, rtol=1e-5)
+
+
+@pytest.mark.parametrize("bkd", ['auto', 'davidson'])
+def test_block_sparse_dmrg(bkd):
+    n = 10
+    h = MPO_ham_heis(n).to_block_sparse([1, -1])
+    p0 = MPS_computational_state('01' * (n // 2)).to_block_sparse([1, -1])
+
+    # the initial state fixes the sector, so is required
+    with pytest.raises(ValueError):
+        DMRG2(h)
+
+    dmrg = DMRG2(h, bond_dims=[4, 8, 16, 32], p0=p0)
+    dmrg.opts['eff_eig_bkd'] = bkd
+    assert dmrg.solve(tol=1e-9, max_sweeps=12)
+    actual_e = seigsys(ham_heis(n, cyclic=False, sparse=True), k=1)[0]
+    assert_allclose(dmrg.energy, actual_e, rtol=1e-7)
+
+    # then refine with single site sweeps, using the sparse local operator
+    dmrg1 = DMRG1(h, bond_dims=32, p0=dmrg.state)
+    dmrg1.opts['eff_eig_bkd'] = bkd
+    dmrg1.opts['eff_eig_dense'] = False
+    assert dmrg1.solve(tol=1e-9, max_sweeps=4)
+    assert_allclose(dmrg1.energy, actual_e, rtol=1e-7)
+    ov = dmrg1.state.to_dense().H @ dmrg.state.to_dense()
+    assert_allclose(abs(ov), 1.0)
+
+
+class TestTruncation:
+
+    @pytest.mark.parametrize("bsz", [1, 2])
+    def test_truncation_errors(self, bsz):
+        n = 10
+        if bsz == 1:
+            # padded bonds are only truncated if the subspace was expanded
+            dmrg = DMRG1(MPO_ham_heis(n), bond_dims=4,
+                         subspace_expansion=True)
+        else:
+            dmrg = DMRG2(MPO_ham_heis(n), bond_dims=4)
+        dmrg.solve(max_sweeps=3)
+        assert len(dmrg.truncation_errors) == 3
+        errors = dmrg.truncation_errors[-1]
+        assert errors.shape == (n - 1,)
+        assert np.all(errors[3:-3] > 0.0)
+        if bsz == 2:
+            # bonds at the edges can hold the whole state
+            assert_allclose(errors[[0, 1, -2, -1]], 0.0)
+        assert dmrg.max_bonds is None
+
+    @pytest.mark.parametrize("DMRG", [DMRG1, DMRG2])
+    def test_adaptive_bond_dims(self, DMRG):
+        n = 12
+        dmrg = DMRG(MPO_ham_heis(n), bond_dims=64, cutoffs=1e-10)
+        dmrg.opts['adaptive_bond_dims'] = True
+        dmrg.opts['adaptive_bond_dim_start'] = 4
+        dmrg.opts['eff_eig_tol'] = 1e-10
+        assert dmrg.solve(tol=1e-10, max_sweeps=16)
+
+        actual_e = seigsys(ham_heis(n, cyclic=False, sparse=True), k=1)[0]
+        assert_allclose(dmrg.energy, actual_e, rtol=1e-8)
+
+        # only the bonds that needed it have grown
+        assert dmrg.max_bonds[0] == dmrg.max_bonds[-1] == 4
+        assert 4 < max(dmrg.max_bonds) < 64
+        for i in range(n - 1):
+            assert dmrg._k.bond_dim(i, i + 1) <= dmrg.max_bonds[i]
+
+    def test_parallel(self):
+        n = 12
+        dmrg = DMRGParallel(MPO_ham_heis(n), bond_dims=4, num_segments=3,
+                            num_workers=1)
+        dmrg.solve(max_sweeps=2)
+        assert len(dmrg.truncation_errors) == 2
+        assert np.all(dmrg.truncation_errors[-1][3:-3] > 0.0)
+
+        dmrg.opts['adaptive_bond_dims'] = True
+        with pytest.raises(ValueError):
+            dmrg.solve(max_sweeps=1)
+
+
+class TestDMRGParallel:
+
+    def test_segments_setup(self):
+        h = MPO_ham_heis(10)
+        p0 = MPS_rand_state(10, 4)
+        dmrg = DMRGParallel(h, bond_dims=8, p0=p0, num_segments=3,
+                            num_workers=1)
+        assert dmrg.segments == (range(0, 4), range(4, 7), range(7, 10))
+
+        # stitching the segments back together recovers the initial state
+        p0d, psid = p0.to_dense(), dmrg.state.to_dense()
+        assert_allclose(abs(p0d.H @ psid)**2, p0d.H @ p0d)
+        assert_allclose(psid.H @ psid, 1.0)
+
+        with pytest.raises(ValueError):
+            DMRGParallel(h, bond_dims=8, num_segments=6)
+
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_matches_exact(self, num_workers):
+        n = 12
+        h = MPO_ham_heis(n)
+        dmrg = DMRGParallel(h, bond_dims=[4, 8, 16, 32], cutoffs=1e-10,
+                            num_segments=3, num_workers=num_workers)
+        assert dmrg.solve(tol=1e-9, max_sweeps=12)
+
+        ham_dense = ham_heis(n, cyclic=False, sparse=True)
+        actual_e, gs = seigsys(ham_dense, k=1)
+        assert_allclose(dmrg.energy, actual_e, rtol=1e-8)
+        mps_gs_dense = dmrg.state.to_dense()
+        assert_allclose(mps_gs_dense.H @ mps_gs_dense, 1.0)
+        assert_allclose(abs(expec(mps_gs_dense, gs)), 1.0, rtol=1e-6)
+
+
 class TestDMRGX:
 
     def test_explicit_sweeps(self):
@@ -236,6 +503,11 @@ class TestDMRGX:
         en1 = dmrgx.sweep_left(canonize=False)
         assert en0 != en1
 
+        # variance from the persistent environment matches full contraction
+        dmrgx._compute_post_sweep()
+        assert_allclose(dmrgx.variance, (dmrgx.TN_energy2 ^ ...) -
+                        dmrgx.energies[-1]**2, atol=1e-12)
+
         dmrgx.sweep_right(canonize=False)
         en = dmrgx.sweep_right(canonize=True)
 
@@ -268,3 +540,94 @@ class TestDMRGX:
         dmrgx = DMRGX(ham, p0, chi)
         assert dmrgx.solve(tol=1e-5, sweep_sequence='R')
         assert dmrgx.state.site[0].dtype == float
+
+
+class TestCheckpoint:
+
+    @staticmethod
+    def _solver(kind, p0=None):
+        if kind == 'DMRGX':
+            ham = MPO_ham_mbl(10, dh=5, run=42)
+            p0 = MPS_computational_state('0011011100')
+            return DMRGX(ham, p0, [4, 8, 16])
+        h = MPO_ham_heis(10)
+        if kind == 'DMRG2':
+            return DMRG2(h, bond_dims=[4, 8, 16], p0=p0)
+        if kind == 'DMRG2_block_sparse':
+            h = h.to_block_sparse([1, -1])
+            p0 = MPS_neel_state(10).to_block_sparse([1, -1])
+            return DMRG2(h, bond_dims=[4, 8, 16], p0=p0)
+        if kind == 'DMRGParallel':
+            return DMRGParallel(h, bond_dims=[4, 8, 16], p0=p0,
+                                num_segments=2, num_workers=1)
+
+    @pytest.mark.parametrize("kind", ['DMRG2', 'DMRG2_block_sparse',
+                                      'DMRGParallel', 'DMRGX'])
+    def test_resume_after_kill(self, kind, tmpdir):
+        fname = str(tmpdir.join('dmrg.ckpt'))
+        p0 = MPS_rand_state(10, 4)
+
+        dmrg = self._solver(kind, p0)
+        dmrg.solve(tol=0.0, max_sweeps=6)
+
+        class Killed(Exception):
+            pass
+
+        # interrupt the solve during the fourth sweep
+        killed = self._solver(kind, p0)
+        sweep = killed.sweep
+
+        def sweep_then_kill(*args, **kwargs):
+            if len(killed.energies) == 4:
+                raise Killed
+            return sweep(*args, **kwargs)
+
+        killed.sweep = sweep_then_kill
+        with pytest.raises(Killed):
+            killed.solve(tol=0.0, max_sweeps=6, checkpoint=fname)
+
+        # the class of the solver is recorded in the checkpoint
+        resumed = DMRG.load_checkpoint(fname)
+        assert type(resumed) is type(killed)
+        assert resumed._bond_names() == killed._bond_names()
+        assert_allclose(resumed.energies, killed.energies)
+        assert resumed._bond_dims.pos == 3
+        assert_allclose(abs(resumed.state.to_dense().H @
+                            killed.state.to_dense()), 1.0)
+
+        assert not resumed.resume()
+        assert len(resumed.energies) == 7
+        assert resumed._k.max_bond() == dmrg._k.max_bond()
+        assert_allclose(resumed.energies, dmrg.energies, rtol=1e-6)
+        if kind == 'DMRGX':
+            assert len(resumed.variances) == 7
+
+    def test_incremental_and_truncated(self, tmpdir):
+        fname = str(tmpdir.join('dmrg.ckpt'))
+        dmrg = self._solver('DMRG2', MPS_rand_state(10, 4))
+        dmrg.solve(tol=0.0, max_sweeps=1, checkpoint=fname)
+        size0 = tmpdir.join('dmrg.ckpt').size()
+
+        # nothing has changed -> only the header is appended
+        dmrg._write_checkpoint()
+        size1 = tmpdir.join('dmrg.ckpt').size()
+        assert size1 - size0 < size0 / 10
+
+        # a further sweep appends the changed sites, but not the hamiltonian
+        dmrg._solve_opts['max_sweeps'] = 2
+        dmrg.resume()
+        size2 = tmpdir.join('dmrg.ckpt').size()
+        assert size1 < size2 < size1 + size0
+
+        # a partially written record is ignored
+        with open(fname, 'r+b') as f:
+            f.truncate(size2 - 10)
+        loaded = DMRG2.load_checkpoint(fname)
+        assert len(loaded.energies) == 2
+        assert loaded._solve_progress['sweep'] == 1
+
+        with pytest.raises(TypeError):
+            DMRGX.load_checkpoint(fname)
+
+        with pytest.raises(ValueError):
+            DMRG2(MPO_ham_heis(10), bond_dims=4).resume()
@@ -0,0 +1,207 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from quimb.tensor import (
+    Tensor,
+    tensor_contract,
+    BlockIndex,
+    BlockSparseArray,
+    BlockSparseTNLinearOperator,
+    MPO_ham_heis,
+    MPS_computational_state,
+)
+from quimb.tensor.tensor_block_sparse import tensordot, concatenate
+
+
+@pytest.fixture(params=['U1', 'Z2'])
+def arrays(request):
+    symmetry = request.param
+    np.random.seed(42)
+    ixa = BlockIndex([0, 1, 1, 2])
+    ixb = BlockIndex([1, -1], flow=-1)
+    ixc = BlockIndex([0, 0, 1])
+    a = BlockSparseArray.rand([ixa, ixb, ixc], charge=1, symmetry=symmetry)
+    b = BlockSparseArray.rand([ixc.conj(), BlockIndex([0, 1, 2]), ixa.conj()],
+                              symmetry=symmetry)
+    return a, b
+
+
+class TestBlockSparseArray:
+
+    def test_dense_roundtrip(self, arrays):
+        a, _ = arrays
+        x = a.to_dense()
+        assert x.shape == a.shape == (4, 2, 3)
+        assert a.nnz < a.size
+        b = BlockSparseArray.from_dense(x, a.indices, charge=a.charge,
+                                        symmetry=a.symmetry)
+        assert_allclose(b.to_vector(), a.to_vector())
+        assert_allclose(np.asarray(a), x)
+
+    def test_from_dense_not_symmetric(self, arrays):
+        a, _ = arrays
+        x = a.to_dense()
+        with pytest.raises(ValueError):
+            BlockSparseArray.from_dense(x + 1, a.indices, charge=a.charge,
+                                        symmetry=a.symmetry)
+
+    def test_bad_block(self):
+        ix = BlockIndex([0, 1])
+        with pytest.raises(ValueError):
+            BlockSparseArray({(0, 1): np.ones((1, 1))}, [ix, ix.conj()])
+
+    def test_vector_roundtrip(self, arrays):
+        a, _ = arrays
+        v = a.to_vector()
+        b = BlockSparseArray.from_vector(v, a.indices, a.charge, a.symmetry)
+        assert_allclose(b.to_dense(), a.to_dense())
+
+    def test_transpose_conj_and_arithmetic(self, arrays):
+        a, _ = arrays
+        x = a.to_dense()
+        assert_allclose(a.transpose(2, 0, 1).to_dense(), x.transpose(2, 0, 1))
+        assert_allclose((2 * a - a / 2).to_dense(), 1.5 * x)
+        assert_allclose(a.norm(), np.linalg.norm(x))
+        ac = a.conj()
+        assert ac.flows == (-1, 1, -1)
+        assert ac.charge == (-1 if a.symmetry == 'U1' else 1)
+
+    def test_tensordot(self, arrays):
+        a, b = arrays
+        c = tensordot(a, b, ((0, 2), (2, 0)))
+        assert_allclose(c.to_dense(), np.tensordot(a.to_dense(), b.to_dense(),
+                                                   ((0, 2), (2, 0))))
+        with pytest.raises(ValueError):
+            tensordot(a, a, ((0,), (0,)))
+
+    def test_fuse(self, arrays):
+        a, _ = arrays
+        f = a.fuse([(2, 0)])
+        assert_allclose(f.to_dense(),
+                        a.to_dense().transpose(2, 0, 1).reshape(12, 2))
+
+    def test_pad(self, arrays):
+        a, _ = arrays
+        p = a.pad(1, 3)
+        assert p.shape == (4, 5, 3)
+        assert_allclose(p.to_dense()[:, :2, :], a.to_dense())
+        assert_allclose(p.to_dense()[:, 2:, :], 0.0)
+
+    def test_reverse_flow(self, arrays):
+        a, _ = arrays
+        r = a.reverse_flow(1)
+        assert r.flows == (1, 1, 1)
+        assert_allclose(r.to_dense(), a.to_dense())
+
+    def test_concatenate(self, arrays):
+        a, _ = arrays
+        c = concatenate((a, 2 * a.pad(2, 1)), axis=2)
+        assert c.shape == (4, 2, 7)
+        x = a.to_dense()
+        assert_allclose(c.to_dense()[..., :3], x)
+        assert_allclose(c.to_dense()[..., 3:6], 2 * x)
+        with pytest.raises(ValueError):
+            concatenate((a, a.conj()), axis=2)
+
+
+class TestBlockSparseTensor:
+
+    def test_contract(self, arrays):
+        a, b = arrays
+        ta, tb = Tensor(a, 'ijk'), Tensor(b, 'klm')
+        tc = tensor_contract(ta, tb, output_inds='mlji')
+        assert isinstance(tc.data, BlockSparseArray)
+        expected = tensor_contract(Tensor(a.to_dense(), 'ijk'),
+                                   Tensor(b.to_dense(), 'klm'),
+                                   output_inds='mlji')
+        assert_allclose(tc.data.to_dense(), expected.data)
+
+    def test_contract_scalar(self, arrays):
+        a, _ = arrays
+        t = Tensor(a, 'ijk')
+        assert_allclose(tensor_contract(t, t.conj()), t.norm()**2)
+
+    @pytest.mark.parametrize("method", ['svd', 'eig', 'qr', 'lq'])
+    @pytest.mark.parametrize("absorb", ['left', 'both', 'right'])
+    def test_split(self, arrays, method, absorb):
+        a, _ = arrays
+        t = Tensor(a, 'ijk')
+        tl, tr = t.split(['i', 'k'], method=method, absorb=absorb,
+                         get='tensors')
+        assert isinstance(tl.data, BlockSparseArray)
+        assert_allclose((tl @ tr).transpose(*'ijk').data.to_dense(),
+                        a.to_dense())
+
+    @pytest.mark.parametrize("max_bond", [1, 2])
+    def test_split_truncated(self, arrays, max_bond):
+        a, _ = arrays
+        t = Tensor(a, 'ijk')
+        td = Tensor(a.to_dense(), 'ijk')
+
+        assert_allclose(t.split(['i', 'k'], get='values'),
+                        td.split(['i', 'k'], get='values')[:2])
+
+        info, dinfo = {}, {}
+        tl, tr = t.split(['i', 'k'], max_bond=max_bond, get='tensors',
+                         info=info)
+        dl, dr = td.split(['i', 'k'], max_bond=max_bond, get='tensors',
+                          info=dinfo)
+        assert tl.shape == dl.shape
+        assert info['bond_dim'] == dinfo['bond_dim'] == max_bond
+        assert_allclose(info['discarded_weight'], dinfo['discarded_weight'])
+        assert_allclose((tl @ tr).transpose(*'ijk').data.to_dense(),
+                        (dl @ dr).transpose(*'ijk').data, atol=1e-12)
+
+    def test_fuse(self, arrays):
+        a, _ = arrays
+        t = Tensor(a, 'ijk').fuse({'ki': ('k', 'i')})
+        assert t.inds == ('ki', 'j')
+        assert_allclose(t.data.to_dense(),
+                        a.to_dense().transpose(2, 0, 1).reshape(12, 2))
+
+
+class TestBlockSparse1D:
+
+    def test_mpo_to_block_sparse(self):
+        h = MPO_ham_heis(6)
+        hb = h.to_block_sparse([1, -1])
+        assert all(isinstance(t.data, BlockSparseArray) for t in hb.tensors)
+        assert_allclose(hb.to_dense(), h.to_dense())
+
+    def test_mps_to_block_sparse(self):
+        p = MPS_computational_state('011000')
+        pb = p.to_block_sparse([1, -1])
+        assert pb.site[5].data.charge == 2
+        assert_allclose(pb.to_dense(), p.to_dense())
+        pb.expand_bond_dimension(4)
+        assert pb.bond_dim(2, 3) == 4
+        assert_allclose(pb.to_dense(), p.to_dense())
+
+    def test_not_symmetric(self):
+        p = MPS_computational_state('01')
+        p.site[0].modify(data=np.ones_like(p.site[0].data))
+        with pytest.raises(ValueError):
+            p.to_block_sparse([1, -1])
+
+    def test_linear_operator(self):
+        h = MPO_ham_heis(4).to_block_sparse([1, -1])
+        p = MPS_computational_state('0101').to_block_sparse([1, -1])
+        x = p ^ ...
+        hd = h.copy().reindex_lower_sites('b{}') ^ ...
+
+        A = BlockSparseTNLinearOperator(
+            [hd], upper_inds=x.inds, lower_inds=[f'b{i}' for i in range(4)],
+            like=x.data)
+
+        # only the 6 states with zero magnetization are acted on
+        assert A.shape == (6, 6)
+        Ad = A.to_dense()
+        assert_allclose(Ad, Ad.T.conj())
+        v = np.random.randn(6)
+        assert_allclose(A @ v, Ad @ v)
+
+        hfull = h.to_dense()
+        el = np.linalg.eigvalsh(Ad)
+        assert_allclose(el[0], np.linalg.eigvalsh(hfull)[0])
@@ -1,6 +1,8 @@
 import pytest
 import operator
 
+from cytoolz import unique, concat
+
 import numpy as np
 from numpy.testing import assert_allclose
 
@@ -12,8 +14,24 @@ from quimb.tensor import (
     TensorNetwork,
     rand_tensor,
     MPS_rand_state,
+    get_contract_path_cache,
+    set_contract_path_cache,
+    get_contract_strategy,
+    set_contract_strategy,
+    contract_strategy,
+    ContractionPlan,
+    EffHamLinearOperator,
+)
+import quimb.tensor.tensor_core as tc
+from quimb.tensor.tensor_core import (
+    tensor_split,
+    _trim_singular_vals,
+    _canonical_tensor_order,
+    _map_indices_to_alphabet,
+    ContractionPathCache,
+    PairwiseContractExpression,
+    RandomGreedyOptimizer,
 )
-from quimb.tensor.tensor_core import _trim_singular_vals
 
 
 def test__trim_singular_vals():
@@ -216,7 +234,7 @@ class TestBasicTensorOperations:
 
 
 class TestTensorFunctions:
-    @pytest.mark.parametrize('method', ['svd', 'eig', 'isvd', 'svds'])
+    @pytest.mark.parametrize('method', ['svd', 'eig', 'rsvd', 'isvd', 'svds'])
     @pytest.mark.parametrize('linds', ['abd', 'ce'])
     @pytest.mark.parametrize('cutoff', [-1.0, 1e-13, 1e-10])
     @pytest.mark.parametrize('cutoff_mode', ['abs', 'rel', 'sum2'])
@@ -249,6 +267,78 @@ class TestTensorFunctions:
                     (a_split.shape == (2, 3, 6, 5, 4)))
         assert (a_split ^ ...).almost_equals(a)
 
+    @pytest.mark.parametrize('method', ['svd', 'eig', 'qr'])
+    @pytest.mark.parametrize('max_bond', [None, 4])
+    def test_split_tensor_info(self, method, max_bond):
+        a = rand_tensor((2, 3, 4, 5), inds='abcd')
+        s = a.singular_values('ab')
+        info = {}
+        tl, tr = a.split('ab', method=method, max_bond=max_bond,
+                         get='tensors', info=info)
+        assert info['bond_dim'] == tl.shape[-1]
+        if method == 'qr' or max_bond is None:
+            assert info['discarded_weight'] == 0.0
+        else:
+            assert info['bond_dim'] == 4
+            assert_allclose(info['discarded_weight'],
+                            np.sum(s[4:]**2) / np.sum(s**2))
+
+    @pytest.mark.parametrize('dtype', [float, complex])
+    @pytest.mark.parametrize('cutoff_mode', ['rel', 'sum2'])
+    def test_split_rsvd(self, dtype, cutoff_mode):
+        # matrix with exponentially decaying singular values
+        U = np.linalg.qr(np.random.randn(100, 100).astype(dtype))[0]
+        V = np.linalg.qr(np.random.randn(120, 120).astype(dtype))[0]
+        s = np.exp(-np.arange(100) / 5)
+        a = Tensor(((U * s) @ V[:100]).reshape(10, 10, 12, 10), 'abcd')
+
+        for opts in [{'max_bond': 12}, {'cutoff': 1e-8}]:
+            opts['cutoff_mode'] = cutoff_mode
+            info, info_ex = {}, {}
+            rl, rr = a.split('ab', method='rsvd', get='tensors', info=info,
+                             **opts)
+            el, er = a.split('ab', method='svd', get='tensors', info=info_ex,
+                             **opts)
+            assert rl.shape == el.shape
+            assert_allclose((rl @ rr).transpose(*'abcd').data,
+                            (el @ er).transpose(*'abcd').data, atol=1e-5)
+            assert_allclose(info['discarded_weight'],
+                            info_ex['discarded_weight'], rtol=1e-4, atol=1e-12)
+
+    @pytest.mark.parametrize('dtype', [float, complex])
+    def test_split_tensor_network(self, dtype):
+        # split a network without contracting it
+        A = rand_tensor([4, 5, 6], 'abx', dtype=dtype)
+        B = rand_tensor([6, 3, 7], 'xcd', dtype=dtype)
+        tn = A & B
+        tl, tr = tensor_split(tn, 'ab', method='rsvd', cutoff=1e-12,
+                              get='tensors')
+        assert tl.inds[:2] == ('a', 'b')
+        assert tl.shape[-1] == 6
+        assert_allclose((tl @ tr).transpose(*'abcd').data,
+                        (tn ^ ...).transpose(*'abcd').data)
+
+        with pytest.raises(ValueError):
+            tensor_split(tn, 'ab', method='svd')
+
+    @pytest.mark.parametrize('max_bond', [None, 4])
+    def test_split_rsvd_values(self, max_bond):
+        U = np.linalg.qr(np.random.randn(100, 100))[0]
+        V = np.linalg.qr(np.random.randn(120, 120))[0]
+        s = np.exp(-np.arange(100) / 5)
+        a = Tensor(((U * s) @ V[:100]).reshape(10, 10, 12, 10), 'abcd')
+        rs = a.split('ab', method='rsvd', max_bond=max_bond, get='values')
+        assert_allclose(rs, s[:max_bond], rtol=1e-6)
+
+        # a network, split without being contracted
+        A = rand_tensor([4, 5, 6], 'abx')
+        B = rand_tensor([6, 3, 7], 'xcd')
+        tn = A & B
+        s = (tn ^ ...).singular_values('ab')
+        rs = tensor_split(tn, 'ab', method='rsvd', max_bond=max_bond,
+                          get='values')
+        assert_allclose(rs[:6], s[:6][:max_bond])
+
     @pytest.mark.parametrize('method', ['svd', 'eig'])
     def test_singular_values(self, method):
         psim = Tensor(np.eye(2) * 2**-0.5, inds='ab')
@@ -756,6 +846,22 @@ class TestTensorNetworkAsLinearOperator:
 
         assert_allclose(s, sd)
 
+    @pytest.mark.parametrize("dtype", (float, complex))
+    def test_rectangular_matmat(self, dtype):
+        A = rand_tensor([2, 3, 4], 'abx', dtype=dtype)
+        B = rand_tensor([4, 5], 'xc', dtype=dtype)
+        tn = A & B
+        # maps vectors with indices 'c' to vectors with indices 'ab'
+        lo = tn.aslinearoperator(('c',), ('a', 'b'))
+        assert lo.shape == (6, 5)
+        x = (tn ^ ...).transpose(*'abc').data.reshape(6, 5)
+
+        v = np.random.randn(5, 3).astype(dtype)
+        w = np.random.randn(6, 3).astype(dtype)
+        assert_allclose(lo.matvec(v[:, 0]), x @ v[:, 0])
+        assert_allclose(lo.matmat(v), x @ v)
+        assert_allclose(lo.rmatmat(w), x.conj().T @ w)
+
     @pytest.mark.parametrize("dtype", (float, complex))
     def test_replace_with_svd_using_linear_operator(self, dtype):
         k = MPS_rand_state(100, 10, dtype=dtype, cyclic=True)
@@ -782,3 +888,582 @@ class TestTensorNetworkAsLinearOperator:
         assert isinstance(tn['_V'], Tensor)
 
         assert_allclose(x1, x2, rtol=1e-4)
+
+
+class TestEffHamLinearOperator:
+
+    @pytest.mark.parametrize("dtype", (float, complex))
+    @pytest.mark.parametrize("bsz", (1, 2))
+    def test_against_dense(self, dtype, bsz):
+        # L--H--R or L--H-H--R effective hamiltonian
+        L = rand_tensor([4, 3, 4], ['ul', 'wl', 'll'], dtype=dtype)
+        R = rand_tensor([4, 3, 4], ['ur', 'wr', 'lr'], dtype=dtype)
+        if bsz == 1:
+            Hs = [rand_tensor([3, 3, 2, 2], ['wl', 'wr', 'u0', 'l0'],
+                              dtype=dtype)]
+        else:
+            Hs = [rand_tensor([3, 3, 2, 2], ['wl', 'wm', 'u0', 'l0'],
+                              dtype=dtype),
+                  rand_tensor([3, 3, 2, 2], ['wm', 'wr', 'u1', 'l1'],
+                              dtype=dtype)]
+        uix = ('ul', *(f'u{i}' for i in range(bsz)), 'ur')
+        lix = ('ll', *(f'l{i}' for i in range(bsz)), 'lr')
+
+        tn = TensorNetwork([L, *Hs, R])
+        A = EffHamLinearOperator(tn, upper_inds=uix, lower_inds=lix)
+        Ad = (tn ^ ...).fuse((('l', lix), ('u', uix))).data
+
+        x = np.random.randn(A.shape[1]).astype(dtype)
+        assert_allclose(A.matvec(x), Ad @ x)
+        assert_allclose(A.rmatvec(x), Ad.conj().T @ x)
+
+        X = np.random.randn(A.shape[1], 3).astype(dtype)
+        assert_allclose(A.matmat(X), Ad @ X)
+        assert_allclose(A.diag(), np.diag(Ad))
+
+        # the work buffers should not be handed out
+        y1 = A.matvec(x)
+        y2 = A.matvec(2 * x)
+        assert_allclose(2 * y1, y2)
+
+    def test_no_environments(self):
+        # e.g. the effective hamiltonian of the first and last sites
+        H0 = rand_tensor([2, 2, 3], ['u0', 'l0', 'w'])
+        H1 = rand_tensor([3, 2, 2], ['w', 'u1', 'l1'])
+        A = EffHamLinearOperator((H0, H1), upper_inds=('u0', 'u1'),
+                                 lower_inds=('l0', 'l1'))
+        Ad = (H0 @ H1).fuse((('l', ('l0', 'l1')), ('u', ('u0', 'u1')))).data
+        x = np.random.randn(4)
+        assert_allclose(A @ x, Ad @ x)
+
+    def test_rectangular(self):
+        # maps the upper index 'a' to the lower indices 'b', 'c'
+        X = rand_tensor((3, 4, 5), 'abc', dtype=complex)
+        A = EffHamLinearOperator([X], ('a',), ('b', 'c'))
+        assert A.shape == (20, 3)
+        Ad = X.data.reshape(3, 20).T
+        x = np.random.randn(3)
+        assert_allclose(A.matvec(x), Ad @ x)
+        X2 = np.random.randn(3, 2)
+        assert_allclose(A.matmat(X2), Ad @ X2)
+        y = np.random.randn(20)
+        assert_allclose(A.rmatvec(y), Ad.conj().T @ y)
+
+    def test_outer_product_step(self):
+        # 'u1' only enters via ``Y`` -> a step with no shared indices
+        X = rand_tensor([2, 2], ['u0', 'l0'])
+        Y = rand_tensor([3], ['u1'])
+        W = rand_tensor([3], ['l1'])
+        A = EffHamLinearOperator((X, Y, W), upper_inds=('u0', 'u1'),
+                                 lower_inds=('l0', 'l1'))
+        Ad = tensor_contract(X, Y, W, output_inds=('l0', 'l1', 'u0', 'u1'))
+        Ad = Ad.data.reshape(6, 6)
+        x = np.random.randn(6)
+        assert_allclose(A @ x, Ad @ x)
+
+    def test_batch_index_falls_back_to_einsum(self):
+        # 'b' appears in every tensor -> not a plain matrix product
+        X = rand_tensor([2, 3, 4], ['u0', 'l0', 'b'])
+        Y = rand_tensor([4, 3, 2], ['b', 'u1', 'l1'])
+        Z = rand_tensor([4], ['b'])
+        A = EffHamLinearOperator((X, Y, Z), upper_inds=('u0', 'u1'),
+                                 lower_inds=('l0', 'l1'))
+        Ad = tensor_contract(X, Y, Z, output_inds=('l0', 'l1', 'u0', 'u1'))
+        Ad = Ad.data.reshape(6, 6)
+        x = np.random.randn(6)
+        assert_allclose(A @ x, Ad @ x)
+
+
+class TestContractionPathCache:
+
+    def test_hits_and_misses(self):
+        cache = ContractionPathCache()
+        cache.get_expression('ab,bc->ac', (2, 3), (3, 4))
+        cache.get_expression('ab,bc->ac', (2, 3), (3, 4))
+        cache.get_expression('ab,bc->ac', (2, 3), (3, 5))
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['entries'] == 2
+        assert stats['nbytes'] == cache.nbytes > 0
+
+    def test_evict_by_entries(self):
+        cache = ContractionPathCache(max_entries=2)
+        for d in (2, 3, 4):
+            cache.get_path('ab,bc,cd->ad', (2, d), (d, 2), (2, 2))
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        # least recently used entry has gone
+        assert ('greedy', 'ab,bc,cd->ad', (2, 2), (2, 2), (2, 2)) not in cache
+        assert ('greedy', 'ab,bc,cd->ad', (2, 4), (4, 2), (2, 2)) in cache
+
+    def test_evict_by_bytes(self):
+        cache = ContractionPathCache(max_bytes=1)
+        cache.get_path('ab,bc->ac', (2, 3), (3, 4))
+        cache.get_path('ab,bc->ac', (2, 3), (3, 5))
+        # always keeps the latest entry
+        assert len(cache) == 1
+        assert cache.evictions == 1
+
+    def test_save_and_load(self, tmpdir):
+        fname = str(tmpdir.join('paths.pkl'))
+        cache = ContractionPathCache(filename=fname)
+        x, y, z = (np.random.randn(2, 3), np.random.randn(3, 4),
+                   np.random.randn(4, 5))
+        expr = cache.get_expression('ab,bc,cd->ad', x.shape, y.shape, z.shape)
+
+        # new cache should warm from appended paths
+        new_cache = ContractionPathCache(filename=fname)
+        assert len(new_cache) == 1
+        new_expr = new_cache.get_expression('ab,bc,cd->ad',
+                                            x.shape, y.shape, z.shape)
+        assert new_cache.stats()['hits'] == 1
+        assert_allclose(new_expr(x, y, z), expr(x, y, z))
+
+        # explicitly save and load into an empty cache
+        cache.save(str(tmpdir.join('saved.pkl')))
+        empty = ContractionPathCache()
+        assert empty.load(str(tmpdir.join('saved.pkl'))) == 1
+
+    def test_backing_file_bounded(self, tmpdir):
+        import os
+        fname = str(tmpdir.join('paths.pkl'))
+        cache = ContractionPathCache(max_entries=2, filename=fname)
+
+        def cycle():
+            for d in (2, 3, 4, 5):
+                cache.get_path('ab,bc,cd->ad', (2, d), (d, 2), (2, 2))
+
+        cycle()
+        size = os.path.getsize(fname)
+        # evicted paths found again are not written again
+        for _ in range(5):
+            cycle()
+        assert cache.evictions > 10
+        assert os.path.getsize(fname) == size
+
+        # the file holds more than ``max_entries`` -> compacted on loading
+        new_cache = ContractionPathCache(max_entries=2, filename=fname)
+        assert len(new_cache) == 2
+        assert os.path.getsize(fname) < size
+
+        # duplicates, e.g. from several processes, are also compacted
+        cache.save()
+        with open(fname, 'rb') as f:
+            data = f.read()
+        with open(fname, 'ab') as f:
+            f.write(data)
+        new_cache = ContractionPathCache(filename=fname)
+        assert len(new_cache) == 2
+        assert os.path.getsize(fname) == len(data)
+
+    def test_tensor_contract_uses_global_cache(self):
+        old_cache = get_contract_path_cache()
+        try:
+            cache = set_contract_path_cache(max_entries=10)
+            a = rand_tensor((2, 3, 4), inds='abc')
+            b = rand_tensor((3, 4, 5), inds='bcd')
+            a @ b
+            a @ b
+            assert cache.stats()['hits'] == 1
+            assert cache.stats()['misses'] == 1
+        finally:
+            tc._CONTRACT_PATH_CACHE = old_cache
+
+    def test_relabelled_contractions_share_path(self):
+        old_cache = get_contract_path_cache()
+        try:
+            cache = set_contract_path_cache()
+            a = rand_tensor((2, 3, 4), inds=['a', 'b', 'c'])
+            b = rand_tensor((3, 4, 5), inds=['b', 'c', 'd'])
+            c = rand_tensor((5, 6), inds=['d', 'e'])
+            x = tensor_contract(a, b, c)
+
+            # same structure, but new index names and tensor order
+            ar = a.reindex({'b': 'foo', 'c': 'bar', 'a': 'x'})
+            br = b.reindex({'b': 'foo', 'c': 'bar'})
+            y = tensor_contract(c, ar, br, output_inds=('x', 'e'))
+
+            assert cache.stats()['misses'] == 1
+            assert cache.stats()['hits'] == 1
+            assert x.shape == y.shape == (2, 6)
+            assert_allclose(x.data, y.data)
+        finally:
+            tc._CONTRACT_PATH_CACHE = old_cache
+
+    def test_canonical_tensor_order_ring(self):
+        i_ix1 = [('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'a')]
+        i_ix2 = [('c', 'd'), ('x', 'c'), ('d', 'a'), ('a', 'x')]
+        strs = []
+        for i_ix in (i_ix1, i_ix2):
+            order = _canonical_tensor_order(i_ix, [(2, 2)] * 4, ())
+            i_ix = [i_ix[i] for i in order]
+            a_ix = [*unique(concat(i_ix))]
+            strs.append(_map_indices_to_alphabet(a_ix, i_ix, ()))
+        assert strs[0] == strs[1]
+
+
+class TestLargeContractions:
+
+    def test_ring_more_than_52_indices(self):
+        n = 30
+        ts = [rand_tensor((2, 2, 2), inds=['b{}'.format(i),
+                                           'b{}'.format((i + 1) % n),
+                                           'k{}'.format(i)])
+              for i in range(n)]
+        x = tensor_contract(*ts, output_inds=['k1', 'k0'])
+        expr = tensor_contract(*ts, output_inds=['k1', 'k0'],
+                               return_expression=True)
+        assert isinstance(expr, PairwiseContractExpression)
+
+        # sum out the dangling indices first, then contract the ring
+        ms = [t.data.sum(axis=2) for t in ts[2:]]
+        y = np.einsum('abi,bcj->acij', ts[0].data, ts[1].data)
+        for m in ms:
+            y = np.einsum('acij,cd->adij', y, m)
+        y = np.einsum('aaij->ji', y)
+        assert_allclose(x.data, y)
+
+    def test_trace_and_batch_indices(self):
+        eq = 'aab,bcd,dce->be'
+        shapes = [(2, 2, 3), (3, 4, 5), (5, 4, 6)]
+        arrays = [np.random.randn(*s) for s in shapes]
+        path = tc._greedy_pairwise_path(
+            eq.split('->')[0].split(','), 'be',
+            {'a': 2, 'b': 3, 'c': 4, 'd': 5, 'e': 6})
+        expr = PairwiseContractExpression(eq, path)
+        assert_allclose(expr(*arrays), np.einsum(eq, *arrays))
+
+    def test_outer_product(self):
+        eq = 'ab,cd,bc->ad'
+        arrays = [np.random.randn(3, 4), np.random.randn(5, 2),
+                  np.random.randn(4, 5)]
+        expr = PairwiseContractExpression(eq, [(0, 1), (0, 1)])
+        assert_allclose(expr(*arrays), np.einsum(eq, *arrays))
+
+    def test_large_network_contract(self):
+        L = 6
+        ts = []
+        for i in range(L):
+            for j in range(L):
+                inds = ['b{}{}'.format(*sorted([(i, j), nb])) for nb in
+                        ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1))
+                        if 0 <= nb[0] < L and 0 <= nb[1] < L]
+                ts.append(rand_tensor([2] * len(inds), inds=inds))
+        tn = TensorNetwork(ts)
+        assert len(set(tn.all_inds())) > 52
+        x = tn ^ ...
+        # contract the rows one by one into a boundary
+        rows = [tensor_contract(*ts[i * L:(i + 1) * L]) for i in range(L)]
+        y = rows[0]
+        for r in rows[1:]:
+            y = tensor_contract(y, r)
+        assert_allclose(x, y)
+
+
+class TestSlicedContraction:
+
+    def test_no_slicing_needed(self):
+        a = rand_tensor((2, 3), inds='ab')
+        b = rand_tensor((3, 4), inds='bc')
+        expr = tensor_contract(a, b, max_memory=2**20, return_expression=True)
+        assert expr.sliced == ()
+        x = tensor_contract(a, b, max_memory=2**20)
+        assert_allclose(x.data, a.data @ b.data)
+
+    @pytest.mark.parametrize("parallel", [False, True, 2])
+    def test_sliced_matches_full(self, parallel):
+        a = rand_tensor((4, 5, 6), inds='abc')
+        b = rand_tensor((5, 6, 7, 3), inds='bcde')
+        c = rand_tensor((7, 4), inds='da')
+        expr = tensor_contract(a, b, c, output_inds=['e'], max_memory=8 * 20,
+                               return_expression=True)
+        assert len(expr.sliced) > 0
+        assert expr.nslices > 1
+        x = tensor_contract(a, b, c, output_inds=['e'])
+        y = tensor_contract(a, b, c, output_inds=['e'], max_memory=8 * 20,
+                            parallel=parallel)
+        assert_allclose(x.data, y.data)
+
+    def test_sliced_trace(self):
+        a = rand_tensor((3, 3, 4), inds='aab')
+        b = rand_tensor((4, 5), inds='bc')
+        x = tensor_contract(a, b)
+        y = tensor_contract(a, b, max_memory=8 * 5)
+        assert_allclose(x.data, y.data)
+
+    @pytest.mark.parametrize("parallel", [False, 2])
+    def test_slice_traced_index(self, parallel):
+        a = rand_tensor((3, 3, 4), inds='aab')
+        b = rand_tensor((4, 3), inds='ba')
+        eq = 'aab,ba->'
+        path = [(0, 1)]
+        expr = tc.SlicedContractExpression(eq, path, [a.shape, b.shape], 'a')
+        assert expr.nslices == 3
+        assert_allclose(expr(a.data, b.data, parallel=parallel),
+                        np.einsum(eq, a.data, b.data))
+
+    def test_impossible_budget(self):
+        a = rand_tensor((10, 3), inds='ab')
+        b = rand_tensor((3, 10), inds='bc')
+        with pytest.raises(ValueError):
+            tensor_contract(a, b, max_memory=8 * 10)
+
+    def test_mps_to_dense(self):
+        psi = MPS_rand_state(6, 4)
+        assert_allclose(psi.to_dense(), psi.to_dense(max_memory=2**10))
+
+
+class TestContractionPlan:
+
+    def test_plan_matches_tensor_contract(self):
+        a = rand_tensor((2, 3, 4), inds='abc', tags='A')
+        b = rand_tensor((3, 4, 5), inds='bcd', tags='B')
+        c = rand_tensor((5, 6), inds='de', tags='C')
+        plan = ContractionPlan((a, b, c), output_inds='ea')
+        assert plan.output_inds == ('e', 'a')
+
+        for _ in range(3):
+            for t in (a, b, c):
+                t.modify(data=np.random.randn(*t.shape))
+            x = tensor_contract(a, b, c, output_inds='ea')
+            assert_allclose(plan(a.data, b.data, c.data), x.data)
+            y = plan.contract(a, b, c)
+            assert y.tags == {'A', 'B', 'C'}
+            assert_allclose(y.data, x.data)
+
+    def test_compile_scalar(self):
+        psi = MPS_rand_state(6, 5)
+        tn = psi.H & psi
+        plan = tn.compile()
+        arrays = [t.data for t in tn.tensors]
+        assert_allclose(plan(*arrays), 1.0)
+        assert_allclose(plan(*(2 * x for x in arrays)), 2**12)
+
+    def test_compile_sliced(self):
+        a = rand_tensor((4, 5, 6), inds='abc')
+        b = rand_tensor((5, 6, 7, 3), inds='bcde')
+        c = rand_tensor((7, 4), inds='da')
+        tn = TensorNetwork((a, b, c))
+        plan = tn.compile(max_memory=8 * 20)
+        assert len(plan.expression.sliced) > 0
+        arrays = [t.data for t in tn.tensors]
+        assert_allclose(plan(*arrays), (tn ^ ...).data)
+
+
+class TestContractionCost:
+
+    def test_matrix_chain(self):
+        a = rand_tensor((2, 3), inds='ab', tags='A')
+        b = rand_tensor((3, 4), inds='bc', tags='B')
+        c = rand_tensor((4, 5), inds='cd', tags='C')
+        tn = TensorNetwork((a, b, c))
+        cost = tn.contraction_cost()
+        assert len(cost['steps']) == 2
+        # greedy first contracts the pair which most reduces the size
+        assert cost['steps'][0]['output'] == ('b', 'd')
+        assert cost['flops'] == 2 * (3 * 4 * 5) + 2 * (2 * 3 * 5)
+        assert cost['max_size'] == 15
+        assert cost['peak_memory'] == 8 * (6 + 12 + 20 + 15 + 10)
+
+    def test_optimizers_agree_for_small(self):
+        a = rand_tensor((2, 3, 4), inds='abc')
+        b = rand_tensor((3, 4, 5), inds='bcd')
+        c = rand_tensor((5, 6), inds='de')
+        tn = TensorNetwork((a, b, c))
+        greedy = tn.contraction_cost(optimize='greedy')
+        optimal = tn.contraction_cost(optimize='optimal')
+        assert optimal['optimize'] == 'optimal'
+        assert optimal['flops'] <= greedy['flops']
+
+    def test_structured_mps_overlap(self):
+        psi = MPS_rand_state(6, 4)
+        tn = psi.H & psi
+        cost = tn.contraction_cost()
+        # every tensor is contracted once, one pair at a time
+        assert len(cost['steps']) == len(tn.tensors) - 1
+        assert cost['max_size'] <= 4 * 4 * 2
+
+        cost = tn.contraction_cost(slice(0, 3))
+        assert len(cost['steps']) == 5
+
+    def test_tags(self):
+        a = rand_tensor((2, 3), inds='ab', tags='A')
+        b = rand_tensor((3, 4), inds='bc', tags='B')
+        c = rand_tensor((4, 5), inds='cd', tags='C')
+        tn = TensorNetwork((a, b, c))
+        cost = tn.contraction_cost(['A', 'B'])
+        assert cost['steps'] == [{'inds': (('a', 'b'), ('b', 'c')),
+                                  'output': ('a', 'c'),
+                                  'flops': 2 * 2 * 3 * 4,
+                                  'size': 8}]
+        with pytest.raises(ValueError):
+            tn.contraction_cost('D')
+
+
+class TestContractStrategy:
+
+    def test_set_and_context(self):
+        assert get_contract_strategy() == 'greedy'
+        with contract_strategy('random-greedy'):
+            assert get_contract_strategy() == 'random-greedy'
+        assert get_contract_strategy() == 'greedy'
+
+        with pytest.raises(TypeError):
+            set_contract_strategy(42)
+
+    @pytest.mark.parametrize("optimize", [
+        'greedy', 'optimal', 'random-greedy',
+        RandomGreedyOptimizer(max_repeats=4, seed=7),
+    ])
+    def test_optimizers_give_same_result(self, optimize):
+        a = rand_tensor((2, 3, 4), inds='abc')
+        b = rand_tensor((3, 4, 5), inds='bcd')
+        c = rand_tensor((5, 6, 2), inds='dea')
+        x = tensor_contract(a, b, c)
+        y = tensor_contract(a, b, c, optimize=optimize)
+        assert_allclose(x.data, y.data)
+        with contract_strategy(optimize):
+            z = tensor_contract(a, b, c)
+        assert_allclose(x.data, z.data)
+
+    def test_random_greedy_memoized(self):
+        old_cache = get_contract_path_cache()
+        try:
+            cache = set_contract_path_cache()
+            psi = MPS_rand_state(8, 4)
+            tn = psi.H & psi
+            cache.clear()
+            with contract_strategy('random-greedy'):
+                tn.contract_tags(...)
+                tn.contract_tags(...)
+            # one search for random-greedy, one for its greedy baseline
+            assert cache.stats()['misses'] == 2
+            assert cache.stats()['hits'] == 1
+        finally:
+            tc._CONTRACT_PATH_CACHE = old_cache
+
+    def test_opt_einsum_optimizer_large_network(self):
+        # a ring of 56 indices, more than ``einsum`` can label
+        bonds = [['b{}{}'.format(i, j) for j in range(14)] for i in range(4)]
+        shape = ([1] * 13 + [2]) * 2
+        ts = [rand_tensor(shape, inds=bonds[i - 1] + bonds[i])
+              for i in range(4)]
+        x = tensor_contract(*ts)
+        y = tensor_contract(*ts, optimize='optimal')
+        assert_allclose(x, y)
+
+    def test_random_greedy_key_includes_seed(self):
+        assert (RandomGreedyOptimizer(seed=7).key !=
+                RandomGreedyOptimizer(seed=8).key)
+        assert RandomGreedyOptimizer(seed=7) == RandomGreedyOptimizer(seed=7)
+
+    def test_random_greedy_no_worse_than_greedy(self):
+        L = 5
+        ts = []
+        for i in range(L):
+            for j in range(L):
+                inds = ['b{}{}'.format(*sorted([(i, j), nb])) for nb in
+                        ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1))
+                        if 0 <= nb[0] < L and 0 <= nb[1] < L]
+                ts.append(rand_tensor([3] * len(inds), inds=inds))
+        tn = TensorNetwork(ts)
+        greedy = tn.contraction_cost(optimize='greedy')
+        rgreedy = tn.contraction_cost(
+            optimize=RandomGreedyOptimizer(max_repeats=16, seed=42))
+        assert rgreedy['flops'] <= greedy['flops']
+
+
+class TestIndexMap:
+
+    def test_tensor_slots(self):
+        t = rand_tensor((2, 3), inds='ab', tags='X')
+        assert not hasattr(t, '__dict__')
+        with pytest.raises(AttributeError):
+            t.foo = 'bar'
+
+    def test_built_and_maintained(self):
+        a = rand_tensor((2, 3), inds='ab', tags='A')
+        b = rand_tensor((3, 4), inds='bc', tags='B')
+        tn = TensorNetwork((a, b), virtual=True)
+        assert tn.ind_index == {'a': {tn.tag_index['A'].copy().pop()},
+                                'b': tn.tag_index['A'] | tn.tag_index['B'],
+                                'c': {tn.tag_index['B'].copy().pop()}}
+        assert tn.ind_size('c') == 4
+        assert tn.select_tensors_from_ind('a') == (a,)
+
+        # changing a viewed tensor's indices directly updates the network
+        b.reindex({'c': 'd'}, inplace=True)
+        assert 'c' not in tn.ind_index
+        assert tn.outer_inds() == ('a', 'd')
+
+        tn.reindex({'d': 'e'}, inplace=True)
+        assert b.inds == ('b', 'e')
+        assert set(tn.ind_index) == {'a', 'b', 'e'}
+
+        # removed tensors don't update the network any more
+        del tn['B']
+        b.reindex({'b': 'x'}, inplace=True)
+        assert set(tn.ind_index) == {'a', 'b'}
+        assert tn.outer_inds() == ('a', 'b')
+
+    def test_multiple_owners(self):
+        a = rand_tensor((2, 3), inds='ab', tags='A')
+        b = rand_tensor((3, 4), inds='bc', tags='B')
+        tn1 = TensorNetwork((a, b), virtual=True)
+        tn2 = TensorNetwork((a,), virtual=True)
+        tn3 = tn1.copy()
+        tn1.ind_index, tn2.ind_index, tn3.ind_index
+        a.modify(inds=('z', 'b'))
+        assert 'z' in tn1.ind_index
+        assert 'z' in tn2.ind_index
+        assert 'z' not in tn3.ind_index
+
+    def test_inner_and_outer_inds_agree_with_scan(self):
+        a = rand_tensor((2, 3, 4), inds='hxy', tags='A')
+        b = rand_tensor((2, 5), inds='hz', tags='B')
+        c = rand_tensor((2, 4), inds='hy', tags='C')
+        d = rand_tensor((6, 7), inds='pq', tags='D')
+        tn = TensorNetwork((a, b, c, d), virtual=True)
+        tn.ind_index
+        d.reindex({'p': 'r'}, inplace=True)
+
+        scan = tn.copy()
+        assert scan._ind_index is None
+        # the hyperindex 'h' is neither inner nor outer
+        assert tn.inner_inds() == scan.inner_inds() == ('y',)
+        assert (tn.outer_dims_inds() == scan.outer_dims_inds() ==
+                ((3, 'x'), (5, 'z'), (6, 'r'), (7, 'q')))
+
+        # removing and adding tensors, including a trace
+        del tn['B']
+        tn &= rand_tensor((8, 8, 3), inds='ttx')
+        scan = tn.copy()
+        assert tn.inner_inds() == scan.inner_inds() == ('h', 'x', 'y', 't')
+        assert tn.outer_inds() == scan.outer_inds() == ('r', 'q')
+
+    def test_indexed_queries_not_slower_than_scan(self):
+        import timeit
+        psi = MPS_rand_state(500, 2)
+        scan = psi.copy()
+        # e.g. after some reindexing, with the first query reordering the map
+        psi.reindex({'k0': 'q0'}, inplace=True)
+        psi.outer_inds()
+        for fn in ('inner_inds', 'outer_inds'):
+            t_map = min(timeit.repeat(getattr(psi, fn), number=5, repeat=5))
+            t_scan = min(timeit.repeat(getattr(scan, fn), number=5,
+                                       repeat=5))
+            assert t_map < t_scan
+        assert scan._ind_index is None
+
+    def test_copies_and_pickle(self):
+        import pickle
+        psi = MPS_rand_state(5, 3)
+        psi.ind_index
+        for other in (psi.copy(), psi.copy(deep=True),
+                      pickle.loads(pickle.dumps(psi))):
+            assert other.ind_index == psi.ind_index
+            other.reindex({'k0': 'q0'}, inplace=True)
+            assert 'q0' in other.ind_index
+            assert 'q0' not in psi.ind_index
+            assert 'k0' in psi.ind_index
@@ -0,0 +1,112 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import quimb as qu
+from quimb.tensor import (
+    MPS_rand_state,
+    MPO_ham_heis,
+    DMRG2,
+    MPSObservables,
+)
+
+X, Y, Z = (np.asarray(qu.spin_operator(s)) for s in 'XYZ')
+
+
+def dense_expec(psi, ops):
+    """The normalized expectation of the dict of single site ``ops``.
+    """
+    v = np.asarray(psi.to_dense()).ravel()
+    op = np.eye(1)
+    for i in range(psi.nsites):
+        op = np.kron(op, ops.get(i, np.eye(2)))
+    return np.vdot(v, op @ v) / np.vdot(v, v)
+
+
+def dense_correlation(psi, A, B, i, j, string=None):
+    if i == j:
+        return dense_expec(psi, {i: A @ B})
+    ops = {i: A, j: B}
+    if string is not None:
+        ops.update({k: string for k in range(min(i, j) + 1, max(i, j))})
+    return dense_expec(psi, ops)
+
+
+@pytest.fixture
+def psi():
+    psi = MPS_rand_state(6, 5, dtype=complex)
+    # not normalized or in any canonical form
+    return 1.7 * psi
+
+
+class TestMPSObservables:
+
+    def test_norm(self, psi):
+        assert_allclose(MPSObservables(psi).norm(), psi.H @ psi)
+
+    @pytest.mark.parametrize("op", [X, Y, Z])
+    def test_local_expecs(self, psi, op):
+        obs = MPSObservables(psi)
+        ex = [dense_expec(psi, {i: op}) for i in range(6)]
+        assert_allclose(obs.local_expecs(op), ex)
+        assert_allclose(obs.expec(op, 2), ex[2])
+        assert_allclose(obs.local_expecs(op, sites=[4, 1]), [ex[1], ex[4]])
+
+    @pytest.mark.parametrize("string", [None, Z])
+    def test_correlation(self, psi, string):
+        obs = MPSObservables(psi)
+        for i, j in [(1, 4), (4, 1), (2, 2), (0, 5)]:
+            assert_allclose(obs.correlation(X, i, j, B=Y, string=string),
+                            dense_correlation(psi, X, Y, i, j, string))
+
+    @pytest.mark.parametrize("B", [None, Y])
+    @pytest.mark.parametrize("string", [None, Z])
+    def test_correlation_matrix(self, psi, B, string):
+        obs = MPSObservables(psi)
+        C = obs.correlation_matrix(X, B=B, string=string)
+        B = X if B is None else B
+        ex = [[dense_correlation(psi, X, B, i, j, string) for j in range(6)]
+              for i in range(6)]
+        assert_allclose(C, ex, atol=1e-12)
+
+    def test_correlation_matrix_connected(self, psi):
+        obs = MPSObservables(psi)
+        sites = [0, 2, 5]
+        C = obs.correlation_matrix(Z, sites=sites, connected=True)
+        mz = [dense_expec(psi, {i: Z}) for i in sites]
+        ex = [[dense_correlation(psi, Z, Z, i, j) - mi * mj
+               for j, mj in zip(sites, mz)] for i, mi in zip(sites, mz)]
+        assert_allclose(C, ex, atol=1e-12)
+
+    def test_bad_sites(self, psi):
+        with pytest.raises(ValueError):
+            MPSObservables(psi).local_expecs(Z, sites=[2, 6])
+
+    def test_incremental(self, psi):
+        obs = MPSObservables(psi)
+        obs.correlation_matrix(Z)
+
+        psi.site[3].modify(data=np.random.randn(*psi.site[3].shape))
+        assert obs.invalidate() == (3,)
+        # only the environments containing site 3 are dropped
+        assert sorted(obs._left) == [0, 1, 2, 3]
+        assert sorted(obs._right) == [3, 4, 5]
+        assert obs.invalidate() == ()
+
+        ex = [dense_expec(psi, {i: Z}) for i in range(6)]
+        assert_allclose(obs.local_expecs(Z), ex)
+
+    def test_follows_dmrg(self):
+        n = 8
+        dmrg = DMRG2(MPO_ham_heis(n), bond_dims=[4, 16])
+        dmrg.solve(max_sweeps=1)
+        obs = MPSObservables(dmrg._k)
+        c1 = obs.correlation_matrix(Z)
+
+        # the state is modified in place by further sweeps
+        dmrg.solve(tol=1e-8)
+        c2 = obs.correlation_matrix(Z)
+        assert not np.allclose(c1, c2)
+        assert_allclose(c2, MPSObservables(dmrg.state).correlation_matrix(Z),
+                        atol=1e-12)
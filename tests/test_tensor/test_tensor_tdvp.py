@@ -0,0 +1,127 @@
+import pytest
+
+import numpy as np
+import scipy.linalg as sla
+from numpy.testing import assert_allclose
+
+from quimb.tensor import (
+    MPS_neel_state,
+    MPS_rand_state,
+    MPOSpinHam,
+    MPO_ham_heis,
+    MPO_ham_mbl,
+    TDVP,
+)
+
+
+def dense_vec(psi):
+    return np.asarray(psi.to_dense()).ravel()
+
+
+def infidelity(x, y):
+    return 1 - abs(np.vdot(x, y))**2 / (np.vdot(x, x) * np.vdot(y, y)).real
+
+
+class TestTDVP:
+
+    @pytest.mark.parametrize("bsz", [1, 2])
+    @pytest.mark.parametrize("ham", [
+        MPO_ham_heis(8, bz=0.3),
+        MPO_ham_mbl(8, dh=2.0, run=42),
+    ])
+    @pytest.mark.parametrize("dense", [None, False])
+    def test_real_time(self, bsz, ham, dense):
+        n = 8
+        # the single site version can't grow the bonds
+        psi0 = MPS_neel_state(n) if bsz == 2 else MPS_rand_state(n, 16)
+        p0 = dense_vec(psi0)
+        tdvp = TDVP(psi0, ham, dt=0.05, bsz=bsz,
+                    split_opts={'cutoff': 1e-12})
+        tdvp.opts['eff_ham_dense'] = dense
+        tdvp.update_to(1.0)
+        assert tdvp.t == 1.0
+
+        ex = sla.expm(-1j * np.asarray(ham.to_dense())) @ p0
+        assert infidelity(ex, dense_vec(tdvp.pt)) < 1e-8
+
+        # the initial state is untouched
+        assert_allclose(dense_vec(psi0), p0)
+
+    def test_complex_ham(self):
+        n = 6
+        builder = MPOSpinHam(S=1 / 2)
+        builder.add_term(1.0, 'X', 'Y')
+        builder.add_term(0.7, 'Z', 'Z')
+        builder.add_term(0.4, 'Y')
+        ham = builder.build(n)
+        psi0 = MPS_neel_state(n)
+        tdvp = TDVP(psi0, ham, dt=0.05, split_opts={'cutoff': 1e-12})
+        tdvp.update_to(0.5)
+        ex = sla.expm(-0.5j * np.asarray(ham.to_dense())) @ dense_vec(psi0)
+        assert infidelity(ex, dense_vec(tdvp.pt)) < 1e-8
+
+    def test_imag_time(self):
+        n = 6
+        ham = MPO_ham_heis(n)
+        tdvp = TDVP(MPS_rand_state(n, 4), ham, dt=0.1, imag=True)
+        tdvp.update_to(20.0)
+        pt = tdvp.pt
+        assert_allclose(pt.H @ pt, 1.0)
+        en = pt.H @ ham.apply(pt)
+        assert_allclose(en, np.linalg.eigvalsh(ham.to_dense())[0], rtol=1e-6)
+
+    def test_truncation(self):
+        n = 12
+        tdvp = TDVP(MPS_neel_state(n), MPO_ham_heis(n), dt=0.1,
+                    split_opts={'max_bond': 4, 'cutoff': 1e-10})
+        tdvp.update_to(2.0)
+        assert tdvp.pt.max_bond() == 4
+        assert tdvp.err > 0.0
+
+    def test_1site_conserves_energy(self):
+        n = 10
+        ham = MPO_ham_heis(n)
+        psi0 = MPS_rand_state(n, 4)
+        psi0.right_canonize(normalize=True)
+        en0 = psi0.H @ ham.apply(psi0)
+        tdvp = TDVP(psi0, ham, dt=0.1, bsz=1)
+        tdvp.update_to(1.0)
+        pt = tdvp.pt
+        assert pt.max_bond() == 4
+        assert_allclose(pt.H @ ham.apply(pt), en0)
+
+    def test_compute_and_checkpoint(self, tmpdir):
+        n = 6
+        fname = str(tmpdir.join('tdvp.ckpt'))
+        ham = MPO_ham_heis(n)
+        ts = np.linspace(0, 1, 5)
+
+        def compute():
+            return {'t': lambda t, _: t, 'norm': lambda _, p: p.H @ p}
+
+        tdvp = TDVP(MPS_neel_state(n), ham, dt=0.05, compute=compute(),
+                    checkpoint=fname, split_opts={'cutoff': 1e-12})
+        for _ in tdvp.at_times(ts[:3]):
+            pass
+
+        # e.g. the first process is killed, then picked back up
+        tdvp2 = TDVP.load_checkpoint(fname, compute=compute())
+        assert tdvp2.t == ts[2]
+        assert tdvp2.bsz == 2
+        for _ in tdvp2.at_times(ts[3:]):
+            pass
+        assert_allclose(tdvp2.results['t'], ts)
+        assert_allclose(tdvp2.results['norm'], 1.0)
+
+        for _ in tdvp.at_times(ts[3:]):
+            pass
+        assert infidelity(dense_vec(tdvp.pt), dense_vec(tdvp2.pt)) < 1e-10
+
+    def test_bad_inputs(self):
+        tdvp = TDVP(MPS_neel_state(4), MPO_ham_heis(4))
+        with pytest.raises(ValueError):
+            tdvp.step()
+        with pytest.raises(ValueError):
+            TDVP(MPS_neel_state(5), MPO_ham_heis(4))
+        with pytest.raises(ValueError):
+            TDVP(MPS_neel_state(4), MPO_ham_heis(4), bsz=3)
@@ -0,0 +1,113 @@
+import pytest
+
+import numpy as np
+import scipy.linalg as sla
+from numpy.testing import assert_allclose
+
+from quimb.tensor import (
+    MPS_neel_state,
+    MPS_rand_state,
+    MPOSpinHam,
+    MPO_ham_heis,
+    MPO_ham_ising,
+    NNI_ham_heis,
+    NNI_ham_ising,
+    NNI,
+    TEBD,
+)
+
+
+def dense_nni(H):
+    return sum(np.kron(np.kron(np.eye(2**i), H.bond_term(i)),
+                       np.eye(2**(H.n - i - 2)))
+               for i in range(H.n - 1))
+
+
+class TestNNI:
+
+    @pytest.mark.parametrize("nni,mpo", [
+        (NNI_ham_heis(6, j=(0.5, 0.7, 1.0), bz=0.3),
+         MPO_ham_heis(6, j=(0.5, 0.7, 1.0), bz=0.3)),
+        (NNI_ham_ising(5, bx=0.6), MPO_ham_ising(5, bx=0.6)),
+    ])
+    def test_matches_mpo(self, nni, mpo):
+        assert_allclose(dense_nni(nni), mpo.to_dense())
+
+    def test_build_nni(self):
+        builder = MPOSpinHam(S=1)
+        builder.add_term(1.0, 'Z', 'Z')
+        builder.add_term(-0.3, 'X')
+        H = builder.build_nni(4)
+        assert H.phys_dim == 3
+        assert_allclose(H.bond_term(1), H.bond_term(1).conj().T)
+
+    def test_site_dependent(self):
+        Z = np.diag([1.0, -1.0])
+        H = NNI(np.kron(Z, Z), 3, H1={0: Z, None: np.zeros((2, 2))})
+        assert_allclose(H.bond_term(0), np.kron(Z, Z) + np.kron(Z, np.eye(2)))
+        assert_allclose(H.bond_term(1), np.kron(Z, Z))
+
+    def test_gate_cached(self):
+        H = NNI_ham_heis(4)
+        G = H.get_gate_expm(1, -0.1j)
+        assert G.shape == (2, 2, 2, 2)
+        assert H.get_gate_expm(1, -0.1j) is G
+        assert_allclose(G.reshape(4, 4), sla.expm(-0.1j * H.bond_term(1)))
+
+
+class TestTEBD:
+
+    @pytest.mark.parametrize("order,tol", [(2, 1e-4), (4, 1e-7)])
+    def test_real_time(self, order, tol):
+        n = 8
+        H = NNI_ham_heis(n, bz=0.3)
+        psi0 = MPS_neel_state(n)
+        p0 = np.asarray(psi0.to_dense()).ravel()
+        tebd = TEBD(psi0, H, dt=0.1, split_opts={'cutoff': 1e-12})
+        tebd.update_to(1.0, order=order)
+        assert tebd.t == 1.0
+
+        pt = np.asarray(tebd.pt.to_dense()).ravel()
+        ex = sla.expm(-1j * dense_nni(H)) @ p0
+        assert 1 - abs(np.vdot(ex, pt))**2 < tol
+
+        # the initial state is untouched
+        assert_allclose(np.asarray(psi0.to_dense()).ravel(), p0)
+
+    def test_imag_time(self):
+        n = 8
+        H = NNI_ham_heis(n)
+        tebd = TEBD(MPS_rand_state(n, 4), H, dt=0.05, imag=True)
+        tebd.update_to(20.0, order=2)
+        pt = tebd.pt
+        assert_allclose(pt.H @ pt, 1.0)
+        en = pt.H @ MPO_ham_heis(n).apply(pt)
+        assert_allclose(en, np.linalg.eigvalsh(dense_nni(H))[0], rtol=1e-3)
+
+    def test_truncation(self):
+        n = 12
+        tebd = TEBD(MPS_neel_state(n), NNI_ham_heis(n), dt=0.1,
+                    split_opts={'max_bond': 4, 'cutoff': 1e-10})
+        tebd.update_to(2.0)
+        assert tebd.pt.max_bond() == 4
+        assert tebd.err > 0.0
+
+    def test_compute_at_times(self):
+        n = 6
+        ts = np.linspace(0, 1, 6)
+        tebd = TEBD(MPS_neel_state(n), NNI_ham_heis(n), dt=0.05,
+                    compute={'t': lambda t, _: t,
+                             'norm': lambda _, p: p.H @ p})
+        for _ in tebd.at_times(ts):
+            pass
+        assert_allclose(tebd.results['t'], ts)
+        assert_allclose(tebd.results['norm'], 1.0)
+
+    def test_bad_inputs(self):
+        tebd = TEBD(MPS_neel_state(4), NNI_ham_heis(4))
+        with pytest.raises(ValueError):
+            tebd.step()
+        with pytest.raises(ValueError):
+            tebd.step(order=3, dt=0.1)
+        with pytest.raises(ValueError):
+            TEBD(MPS_neel_state(5), NNI_ham_heis(4))